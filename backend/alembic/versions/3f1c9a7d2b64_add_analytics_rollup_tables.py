@@ -0,0 +1,37 @@
+"""Add hourly and daily analytics rollup tables
+
+Revision ID: 3f1c9a7d2b64
+Revises: 8a80393bd3f2
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '8a80393bd3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('analytics_rollup_hourly', 'analytics_rollup_daily'):
+        op.create_table(table,
+        sa.Column('interaction_type', sa.String(), nullable=False),
+        sa.Column('target_id', sa.String(), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('interaction_type', 'target_id', 'bucket')
+        )
+        op.create_index(op.f(f'ix_{table}_bucket'), table, ['bucket'], unique=False)
+    # Populate with: python scripts/backfill_analytics_rollups.py
+
+
+def downgrade() -> None:
+    for table in ('analytics_rollup_daily', 'analytics_rollup_hourly'):
+        op.drop_index(op.f(f'ix_{table}_bucket'), table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,35 @@
+"""Add metrics snapshots table
+
+Revision ID: 4a6f0c2e8d15
+Revises: e71b3c58a0d4
+Create Date: 2026-10-18 14:05:12.318840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6f0c2e8d15'
+down_revision: Union[str, None] = 'e71b3c58a0d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('metrics_snapshots',
+    sa.Column('captured_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('visitors_month', sa.Integer(), nullable=False),
+    sa.Column('active_sessions', sa.Integer(), nullable=False),
+    sa.Column('sessions_today', sa.Integer(), nullable=False),
+    sa.Column('users_total', sa.Integer(), nullable=False),
+    sa.Column('projects_total', sa.Integer(), nullable=False),
+    sa.Column('interactions_total', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('captured_at')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('metrics_snapshots')
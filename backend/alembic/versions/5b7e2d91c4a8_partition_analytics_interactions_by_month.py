@@ -0,0 +1,117 @@
+"""Partition analytics_interactions by month
+
+Converts the existing heap table in place: it is renamed and attached as
+the first range partition (MINVALUE .. start of next month), so no rows
+are copied. Every slow step (constraint validation, index builds) runs
+outside the short ACCESS EXCLUSIVE window, so writes keep flowing.
+
+Revision ID: 5b7e2d91c4a8
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:02:17.540391
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d91c4a8'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    month = dt.month - 1 + months
+    return dt.replace(year=dt.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def upgrade() -> None:
+    now = datetime.now(timezone.utc)
+    cutoff = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), 1)
+
+    # 1. Prepare the heap table without blocking writers
+    with op.get_context().autocommit_block():
+        op.execute("UPDATE analytics_interactions SET timestamp = now() WHERE timestamp IS NULL")
+        op.execute(
+            "ALTER TABLE analytics_interactions ADD CONSTRAINT analytics_interactions_legacy_range "
+            f"CHECK (timestamp IS NOT NULL AND timestamp < '{cutoff.isoformat()}') NOT VALID"
+        )
+        op.execute("ALTER TABLE analytics_interactions VALIDATE CONSTRAINT analytics_interactions_legacy_range")
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS analytics_interactions_legacy_pkey "
+            "ON analytics_interactions (id, timestamp)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analytics_interactions_legacy_timestamp "
+            "ON analytics_interactions (timestamp)"
+        )
+
+    # 2. Swap in the partitioned parent (metadata-only operations)
+    op.execute("LOCK TABLE analytics_interactions IN ACCESS EXCLUSIVE MODE")
+    # The validated CHECK constraint lets SET NOT NULL and ATTACH skip their table scans
+    op.execute("ALTER TABLE analytics_interactions ALTER COLUMN timestamp SET NOT NULL")
+    op.execute("ALTER TABLE analytics_interactions DROP CONSTRAINT analytics_interactions_pkey")
+    op.execute(
+        "ALTER TABLE analytics_interactions ADD CONSTRAINT analytics_interactions_legacy_pkey "
+        "PRIMARY KEY USING INDEX analytics_interactions_legacy_pkey"
+    )
+    op.execute("ALTER TABLE analytics_interactions RENAME TO analytics_interactions_legacy")
+    for column in ('id', 'interaction_type', 'target_id'):
+        op.execute(f"ALTER INDEX ix_analytics_interactions_{column} RENAME TO ix_analytics_interactions_legacy_{column}")
+
+    op.execute("""
+        CREATE TABLE analytics_interactions (
+            id INTEGER NOT NULL DEFAULT nextval('analytics_interactions_id_seq'::regclass),
+            interaction_type VARCHAR NOT NULL,
+            target_id VARCHAR NOT NULL,
+            metadata_json JSON,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT analytics_interactions_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE analytics_interactions_id_seq OWNED BY analytics_interactions.id")
+    for column in ('interaction_type', 'target_id', 'timestamp'):
+        op.execute(f"CREATE INDEX ix_analytics_interactions_{column} ON ONLY analytics_interactions ({column})")
+
+    op.execute(
+        "ALTER TABLE analytics_interactions ATTACH PARTITION analytics_interactions_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{cutoff.isoformat()}')"
+    )
+    for column in ('interaction_type', 'target_id', 'timestamp'):
+        op.execute(
+            f"ALTER INDEX ix_analytics_interactions_{column} "
+            f"ATTACH PARTITION ix_analytics_interactions_legacy_{column}"
+        )
+
+    # 3. Future partitions; app.services.analytics_partitions keeps extending these
+    for i in range(MONTHS_AHEAD):
+        start = _add_months(cutoff, i)
+        end = _add_months(cutoff, i + 1)
+        op.execute(
+            f"CREATE TABLE analytics_interactions_p{start:%Y%m} PARTITION OF analytics_interactions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE analytics_interactions DETACH PARTITION analytics_interactions_legacy")
+    op.execute("ALTER TABLE analytics_interactions_legacy DROP CONSTRAINT analytics_interactions_legacy_range")
+    op.execute(
+        "INSERT INTO analytics_interactions_legacy (id, interaction_type, target_id, metadata_json, timestamp) "
+        "SELECT id, interaction_type, target_id, metadata_json, timestamp FROM analytics_interactions"
+    )
+    op.execute("ALTER SEQUENCE analytics_interactions_id_seq OWNED BY analytics_interactions_legacy.id")
+    op.execute("DROP TABLE analytics_interactions CASCADE")
+
+    op.execute("ALTER TABLE analytics_interactions_legacy RENAME TO analytics_interactions")
+    op.execute("ALTER TABLE analytics_interactions DROP CONSTRAINT analytics_interactions_legacy_pkey")
+    op.execute("ALTER TABLE analytics_interactions ADD CONSTRAINT analytics_interactions_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE analytics_interactions ALTER COLUMN timestamp DROP NOT NULL")
+    op.execute("DROP INDEX IF EXISTS ix_analytics_interactions_legacy_timestamp")
+    for column in ('id', 'interaction_type', 'target_id'):
+        op.execute(f"ALTER INDEX ix_analytics_interactions_legacy_{column} RENAME TO ix_analytics_interactions_{column}")
@@ -0,0 +1,53 @@
+"""Add activity events feed
+
+Revision ID: b58e13d7c926
+Revises: 4a6f0c2e8d15
+Create Date: 2026-10-18 15:02:37.604512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b58e13d7c926'
+down_revision: Union[str, None] = '4a6f0c2e8d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('activity_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('event_type', sa.String(length=32), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_activity_events_created_at_id', 'activity_events', ['created_at', 'id'], unique=False)
+
+    # Seed the feed with the history the old recent-activity query derived
+    op.execute("""
+        INSERT INTO activity_events (created_at, event_type, actor_id, description, payload)
+        SELECT s.created_at, 'session', u.id, 'User logged in',
+               jsonb_build_object('username', u.username, 'email', u.email)
+        FROM user_sessions s JOIN users u ON u.id = s.user_id
+        WHERE s.created_at IS NOT NULL
+        UNION ALL
+        SELECT p.created_at, 'project', NULL, 'New project created: ' || p.title,
+               jsonb_build_object('title', p.title)
+        FROM projects p
+        WHERE p.created_at IS NOT NULL
+        ORDER BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activity_events_created_at_id', table_name='activity_events')
+    op.drop_table('activity_events')
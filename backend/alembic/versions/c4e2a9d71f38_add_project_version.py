@@ -0,0 +1,26 @@
+"""Add project version for ETags
+
+Revision ID: c4e2a9d71f38
+Revises: b58e13d7c926
+Create Date: 2026-10-18 16:41:09.218733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e2a9d71f38'
+down_revision: Union[str, None] = 'b58e13d7c926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'version')
@@ -0,0 +1,46 @@
+"""Add event_id to analytics_interactions for idempotent replays
+
+Revision ID: d2a84f6b90e1
+Revises: 9c4d6e0a1f37
+Create Date: 2026-10-18 12:31:52.664019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a84f6b90e1'
+down_revision: Union[str, None] = '9c4d6e0a1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'uq_analytics_interactions_event_id'
+
+
+def upgrade() -> None:
+    # Nullable column without a default: metadata-only, no rewrite
+    op.add_column('analytics_interactions', sa.Column('event_id', postgresql.UUID(as_uuid=False), nullable=True))
+    # Partitioned unique index must include the partition key
+    op.execute(f"CREATE UNIQUE INDEX {INDEX} ON ONLY analytics_interactions (event_id, timestamp)")
+
+    partitions = [row[0] for row in op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'analytics_interactions'::regclass"
+    ))]
+    # Build each partition's index without blocking writes, then attach it
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {partition}_event_id_key "
+                f"ON {partition} (event_id, timestamp)"
+            )
+            op.execute(f"ALTER INDEX {INDEX} ATTACH PARTITION {partition}_event_id_key")
+
+
+def downgrade() -> None:
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    op.drop_column('analytics_interactions', 'event_id')
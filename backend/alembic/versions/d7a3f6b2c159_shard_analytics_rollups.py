@@ -0,0 +1,40 @@
+"""Shard analytics rollup rows
+
+Revision ID: d7a3f6b2c159
+Revises: c4e2a9d71f38
+Create Date: 2026-10-18 18:05:27.531904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f6b2c159'
+down_revision: Union[str, None] = 'c4e2a9d71f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('analytics_rollup_hourly', 'analytics_rollup_daily'):
+        op.add_column(table, sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.create_primary_key(f'{table}_pkey', table, ['interaction_type', 'target_id', 'bucket', 'shard'])
+
+
+def downgrade() -> None:
+    for table in ('analytics_rollup_daily', 'analytics_rollup_hourly'):
+        # Fold the shards back into one row per bucket before restoring the old key
+        groups = f"""
+            SELECT interaction_type, target_id, bucket, MIN(shard) AS keep, SUM(count) AS total
+            FROM {table} GROUP BY interaction_type, target_id, bucket
+        """
+        match = "r.interaction_type = s.interaction_type AND r.target_id = s.target_id AND r.bucket = s.bucket"
+        op.execute(f"UPDATE {table} r SET count = s.total FROM ({groups}) s WHERE {match} AND r.shard = s.keep")
+        op.execute(f"DELETE FROM {table} r USING ({groups}) s WHERE {match} AND r.shard <> s.keep")
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.create_primary_key(f'{table}_pkey', table, ['interaction_type', 'target_id', 'bucket'])
+        op.drop_column(table, 'shard')
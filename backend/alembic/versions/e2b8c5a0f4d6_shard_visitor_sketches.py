@@ -0,0 +1,50 @@
+"""Allow several sketch rows per visitor day
+
+Revision ID: e2b8c5a0f4d6
+Revises: d7a3f6b2c159
+Create Date: 2026-10-18 18:32:51.804117
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8c5a0f4d6'
+down_revision: Union[str, None] = 'd7a3f6b2c159'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('visitor_sketches', sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+    op.drop_constraint('visitor_sketches_pkey', 'visitor_sketches', type_='primary')
+    op.create_primary_key('visitor_sketches_pkey', 'visitor_sketches', ['day', 'shard'])
+
+
+def downgrade() -> None:
+    # Merge each day's shards (register-wise max) into shard 0 before restoring the one-row key
+    bind = op.get_bind()
+    days = bind.execute(sa.text(
+        "SELECT day FROM visitor_sketches GROUP BY day HAVING COUNT(*) > 1"
+    )).scalars().all()
+    for day in days:
+        rows = bind.execute(
+            sa.text("SELECT registers FROM visitor_sketches WHERE day = :day"), {"day": day}
+        ).scalars().all()
+        merged = bytes(map(max, *(zlib.decompress(r) for r in rows)))
+        bind.execute(
+            sa.text(
+                "INSERT INTO visitor_sketches (day, shard, precision, registers) "
+                "SELECT :day, 0, MAX(precision), :registers FROM visitor_sketches WHERE day = :day "
+                "ON CONFLICT (day, shard) DO UPDATE SET registers = excluded.registers"
+            ),
+            {"day": day, "registers": zlib.compress(merged, 6)}
+        )
+        bind.execute(sa.text("DELETE FROM visitor_sketches WHERE day = :day AND shard <> 0"), {"day": day})
+    op.drop_constraint('visitor_sketches_pkey', 'visitor_sketches', type_='primary')
+    op.create_primary_key('visitor_sketches_pkey', 'visitor_sketches', ['day'])
+    op.drop_column('visitor_sketches', 'shard')
@@ -0,0 +1,36 @@
+"""Add dictionary-encoded analytics metadata
+
+Revision ID: e71b3c58a0d4
+Revises: d2a84f6b90e1
+Create Date: 2026-10-18 13:20:44.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e71b3c58a0d4'
+down_revision: Union[str, None] = 'd2a84f6b90e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analytics_metadata_values',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('field', 'value', name='uq_analytics_metadata_values_field_value')
+    )
+    # Existing rows keep their full metadata_json; new rows store references
+    op.add_column('analytics_interactions', sa.Column('metadata_refs', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analytics_interactions', 'metadata_refs')
+    op.drop_table('analytics_metadata_values')
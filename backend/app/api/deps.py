@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.utils import get_db
-from app.crud import crud_user
+from app.crud import crud_user, crud_activity
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -47,6 +47,10 @@ async def get_current_user(
         if not session:
             session = UserSession(user_id=user.id)
             db.add(session)
+            crud_activity.record_activity(
+                db, "session", "User logged in", actor_id=user.id,
+                username=user.username, email=user.email
+            )
         else:
             session.last_activity = datetime.now(timezone.utc)
         db.commit()
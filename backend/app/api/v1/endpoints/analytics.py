@@ -1,25 +1,200 @@
 # app/api/v1/endpoints/analytics.py
-from fastapi import APIRouter, Depends, Query
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any
 from app.api.deps import get_db, get_current_active_user
+from app.core.config import settings
 from app.services.analytics import AnalyticsService
+from app.services.analytics_ingest import ingest_queue, IngestQueueFull, prepare_rows
+from app.services.analytics_spool import spool
+from app.services.analytics_dedup import deduplicator, client_key
+from app.services.metadata_dictionary import metadata_dictionary
+from app.services.visitors import VisitorService
+from app.services import analytics_export
+from app.services.analytics_batch import parse_interaction_batch, interaction_error, BatchPayloadError
 from app.schemas.analytics import InteractionCreate
+from app.utils.client_address import client_address, parse_networks
+from app.utils.cursor import parse_cursor
 
 router = APIRouter()
 
+_trusted_proxies = parse_networks(settings.TRUSTED_PROXIES)
+
+
+def _request_client(request: Request) -> str:
+    host = client_address(
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for"),
+        _trusted_proxies
+    )
+    return f"{host}|{request.headers.get('user-agent', '')}"
+
+def _saturated() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Analytics ingest is saturated, retry later",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/track")
 async def track_interaction(
     interaction: InteractionCreate,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Public endpoint to track site interactions"""
-    return AnalyticsService.track_interaction(
-        db, 
-        interaction.interaction_type, 
-        interaction.target_id, 
-        interaction.metadata
-    )
+    error = interaction_error(interaction.interaction_type, interaction.target_id, interaction.metadata)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    client = client_key(interaction.metadata, _request_client(request))
+    if deduplicator.is_duplicate(interaction.interaction_type, interaction.target_id, client):
+        return JSONResponse(status_code=202, content={"status": "duplicate"})
+    try:
+        return await _store_interaction(interaction, db)
+    except BaseException:
+        # Not accepted, so the client's retry must not be dropped as a duplicate
+        deduplicator.forget(interaction.interaction_type, interaction.target_id, client)
+        raise
+
+async def _store_interaction(interaction: InteractionCreate, db: Session):
+    if settings.ANALYTICS_BUFFERED_INGEST and ingest_queue.running:
+        try:
+            await ingest_queue.enqueue(
+                interaction.interaction_type,
+                interaction.target_id,
+                interaction.metadata
+            )
+        except IngestQueueFull:
+            raise _saturated()
+        return JSONResponse(status_code=202, content={"status": "queued"})
+
+    try:
+        return AnalyticsService.track_interaction(
+            db, 
+            interaction.interaction_type, 
+            interaction.target_id, 
+            interaction.metadata
+        )
+    except (SQLAlchemyError, ValueError):
+        # ValueError: psycopg2 refusing a parameter; the spool replay quarantines such rows
+        db.rollback()
+        await asyncio.to_thread(spool.append, prepare_rows([{
+            "interaction_type": interaction.interaction_type,
+            "target_id": interaction.target_id,
+            "metadata_json": interaction.metadata,
+        }]))
+        return JSONResponse(status_code=202, content={"status": "spooled"})
+
+@router.post("/track/batch")
+async def track_interaction_batch(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Public endpoint to track many interactions in one request.
+    Accepts a JSON array or NDJSON body, optionally gzipped (sendBeacon friendly).
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > settings.ANALYTICS_BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch payload too large")
+
+    try:
+        rows = parse_interaction_batch(bytes(body))
+    except BatchPayloadError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "errors": e.errors})
+
+    received = len(rows)
+    client = _request_client(request)
+    rows = deduplicator.filter_rows(rows, client)
+    if not rows:
+        return JSONResponse(status_code=202, content={"status": "queued", "accepted": 0, "duplicates": received})
+    try:
+        return await _store_batch(rows, received, db)
+    except BaseException:
+        deduplicator.forget_rows(rows, client)
+        raise
+
+async def _store_batch(rows: List[Dict[str, Any]], received: int, db: Session):
+    if settings.ANALYTICS_BUFFERED_INGEST and ingest_queue.running:
+        try:
+            await ingest_queue.enqueue_many(rows)
+        except IngestQueueFull:
+            raise _saturated()
+        return JSONResponse(
+            status_code=202,
+            content={"status": "queued", "accepted": len(rows), "duplicates": received - len(rows)}
+        )
+
+    prepare_rows(rows)
+    try:
+        accepted = AnalyticsService.bulk_insert_interactions(db, rows)
+    except (SQLAlchemyError, ValueError):
+        db.rollback()
+        await asyncio.to_thread(spool.append, rows)
+        return JSONResponse(status_code=202, content={"status": "spooled", "accepted": len(rows)})
+    return {"status": "stored", "accepted": accepted}
+
+@router.get("/ingest")
+async def get_ingest_status(
+    current_user = Depends(get_current_active_user)
+):
+    """Protected endpoint: ingest queue depth and local spool / replay lag"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    return {
+        "queue": {"running": ingest_queue.running, "depth": ingest_queue.depth, **ingest_queue.stats},
+        "spool": spool.status(),
+        "dedup": {"window_seconds": deduplicator.window_seconds, **deduplicator.stats},
+        "metadata_dictionary": metadata_dictionary.stats
+    }
+
+@router.get("/export")
+async def export_interactions(
+    start: datetime,
+    end: Optional[datetime] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    after: Optional[str] = Query(None, description="Resume cursor '<timestamp>,<id>' of the last row received"),
+    limit: Optional[int] = Query(None, ge=1),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Protected endpoint: stream raw interactions in [start, end) as NDJSON or CSV.
+    Rows are ordered by (timestamp, id); pass the last row's values as `after`
+    to fetch the next chunk.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = end or datetime.now(timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+
+    cursor = None
+    if after:
+        try:
+            cursor = parse_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor, expected '<timestamp>,<id>'")
+
+    rows = analytics_export.iter_interactions(start, end, after=cursor, limit=limit)
+    if format == "csv":
+        return StreamingResponse(
+            analytics_export.to_csv(rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=analytics_interactions.csv"}
+        )
+    return StreamingResponse(analytics_export.to_ndjson(rows), media_type="application/x-ndjson")
 
 @router.get("/stats")
 async def get_analytics_stats(
@@ -29,10 +204,27 @@ async def get_analytics_stats(
 ):
     """Protected endpoint to get interaction stats"""
     if not current_user.is_superuser:
-        from fastapi import HTTPException
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     return {
         "summary": AnalyticsService.get_total_counts(db),
         "details": AnalyticsService.get_interaction_stats(db, days)
     }
+
+
+@router.get("/visitors")
+async def get_unique_visitors(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Protected endpoint: approximate unique visitors for a UTC day range (HyperLogLog)"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    return VisitorService.get_unique_visitors(db, start, end)
@@ -1,14 +1,28 @@
 # app/api/v1/endpoints/metrics.py
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import hmac
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any
-from app.api.deps import get_db, get_current_active_user
+from typing import Dict, List, Any, Optional
+from app.api.deps import get_db, get_current_active_user, get_current_user, oauth2_scheme
 # from app.api.v1.auth import get_current_active_user  # Removed incorrect import
 from app.models.user import User
 from app.crud import crud_metrics
 from app.services.system import SystemService
+from app.services.system_collector import system_collector
+from app.services.metrics_ring import MAX_WINDOW_SECONDS, parse_window, system_history
+from app.services.host_tsdb import host_tsdb
+from app.services.metrics_stream import metrics_broadcaster
+from app.services.metrics_history import get_history
+from app.utils.cursor import parse_cursor
+from app.services.prometheus_metrics import snapshots as prometheus_snapshots
+from app.utils.prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from app.core.config import settings
 from app.schemas import metrics as metrics_schemas
-from fastapi_cache.decorator import cache
+from app.core.cache import cache, cache_stats, flights
+from fastapi_cache import FastAPICache
 
 router = APIRouter()
 
@@ -18,8 +32,43 @@ async def verify_admin(current_user: User = Depends(get_current_active_user)):
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
+async def verify_scraper(request: Request, db: Session = Depends(get_db)) -> None:
+    """Scrapers present METRICS_SCRAPE_TOKEN; without one configured, fall back to admin login"""
+    if settings.METRICS_SCRAPE_TOKEN:
+        expected = f"Bearer {settings.METRICS_SCRAPE_TOKEN}".encode()
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected):
+            raise HTTPException(status_code=401, detail="Invalid scrape token", headers={"WWW-Authenticate": "Bearer"})
+        return
+    user = await get_current_user(db, await oauth2_scheme(request))
+    await verify_admin(await get_current_active_user(user))
+
+@router.get("/dashboard", response_model=metrics_schemas.DashboardMetrics)
+@cache(expire=60, stale_while_revalidate=240)
+async def get_dashboard_metrics(
+    db: Session = Depends(get_db),
+    _ = Depends(verify_admin)
+) -> Any:
+    """Visitors, sessions, users and projects in one request and a few statements"""
+    return crud_metrics.get_dashboard_metrics(db)
+
+@router.get("/history", response_model=metrics_schemas.MetricsHistory)
+@cache(expire=60, stale_while_revalidate=240)
+async def get_metrics_history(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(settings.METRICS_HISTORY_MAX_POINTS, ge=10, le=5000),
+    db: Session = Depends(get_db),
+    _ = Depends(verify_admin)
+) -> Any:
+    """Snapshotted metrics for a time range (default: last 24 hours), downsampled to `points`"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return get_history(db, start, end, points)
+
 @router.get("/visitors", response_model=metrics_schemas.VisitorMetrics)
-@cache(expire=300)
+@cache(expire=300, stale_while_revalidate=900)
 async def get_visitor_metrics(
     db: Session = Depends(get_db),
     _ = Depends(verify_admin)
@@ -27,7 +76,7 @@ async def get_visitor_metrics(
     return crud_metrics.get_visitor_metrics(db)
 
 @router.get("/sessions", response_model=metrics_schemas.SessionMetrics)
-@cache(expire=60)
+@cache(expire=60, stale_while_revalidate=120)
 async def get_session_metrics(
     db: Session = Depends(get_db),
     _ = Depends(verify_admin)
@@ -35,7 +84,7 @@ async def get_session_metrics(
     return crud_metrics.get_session_metrics(db)
 
 @router.get("/users")
-@cache(expire=300)
+@cache(expire=300, stale_while_revalidate=900)
 async def get_user_metrics(
     db: Session = Depends(get_db),
     _ = Depends(verify_admin)
@@ -43,16 +92,21 @@ async def get_user_metrics(
     return crud_metrics.get_user_metrics(db)
 
 @router.get("/recent-activity")
-@cache(expire=60)
+@cache(expire=60, stale_while_revalidate=120)
 async def get_recent_activity(
     db: Session = Depends(get_db),
-    limit: int = 5,
+    limit: int = Query(5, ge=1, le=100),
+    before: Optional[str] = Query(None, description="Cursor '<timestamp>,<id>' of the last entry received"),
     _ = Depends(verify_admin)
 ) -> List:
-    return crud_metrics.get_recent_activity(db, limit)
+    try:
+        cursor = parse_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return crud_metrics.get_recent_activity(db, limit, cursor)
 
 @router.get("/projects")
-@cache(expire=300)
+@cache(expire=300, stale_while_revalidate=900)
 async def get_project_metrics(
     db: Session = Depends(get_db),
     _ = Depends(verify_admin)
@@ -60,36 +114,100 @@ async def get_project_metrics(
     return crud_metrics.get_project_metrics(db)
 
 @router.get("/system", response_model=metrics_schemas.SystemMetrics)
-@cache(expire=60)
 async def get_system_metrics(
     _ = Depends(verify_admin)
 ) -> Any:
-    return SystemService.get_system_metrics()
+    return system_collector.latest("system")
+
+@router.get("/system/history")
+async def get_system_metrics_history(
+    window: str = Query("1h", description="Look-back window such as 15m, 6h, 1d or 30d"),
+    points: int = Query(60, ge=1, le=1000),
+    _ = Depends(verify_admin)
+) -> Dict:
+    """
+    CPU, memory, disk, load and network samples as per-bucket min/max/avg
+    series. Up to a day is served from memory; longer windows from disk.
+    """
+    try:
+        window_seconds = parse_window(window, max_seconds=(settings.HOST_METRICS_RETENTION_DAYS or 365) * 86400)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if window_seconds <= MAX_WINDOW_SECONDS:
+        return system_history.query(window_seconds, points)
+    return await asyncio.to_thread(host_tsdb.history, window_seconds, points)
+
+@router.get("/stream")
+async def stream_metrics(
+    _ = Depends(verify_admin)
+) -> StreamingResponse:
+    """
+    Server-sent events: a `full` snapshot of system, network, health and
+    session metrics, then `delta` frames holding only the changed fields.
+    Authentication runs once per connection instead of once per poll.
+    """
+    if metrics_broadcaster.full:
+        raise HTTPException(status_code=503, detail="Too many metrics streams", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        metrics_broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/network", response_model=metrics_schemas.NetworkMetrics)
-@cache(expire=60)
 async def get_network_metrics(
     _ = Depends(verify_admin)
 ) -> Any:
-    return SystemService.get_network_metrics()
+    return system_collector.latest("network")
 
 @router.get("/health")
-@cache(expire=30)
 async def get_application_health(
     _ = Depends(verify_admin)
 ) -> Dict:
-    return SystemService.get_application_health()
+    return system_collector.latest("health")
 
 @router.get("/deployment", response_model=metrics_schemas.DeploymentInfo)
-@cache(expire=300)
+@cache(expire=300, stale_while_revalidate=900)
 async def get_deployment_info(
     _ = Depends(verify_admin)
 ) -> Any:
     return SystemService.get_deployment_info()
 
 @router.get("/disk", response_model=metrics_schemas.DiskMetrics)
-@cache(expire=300)
+@cache(expire=300, stale_while_revalidate=900)
 async def get_disk_metrics(
     _ = Depends(verify_admin)
 ) -> Any:
     return SystemService.get_disk_details()
+
+@router.get("/collectors")
+async def get_collector_stats(
+    _ = Depends(verify_admin)
+) -> Dict:
+    """Sampling cost and freshness of each background system-metrics collector"""
+    return {
+        **system_collector.stats(),
+        "host_tsdb": host_tsdb.status(),
+        "stream": metrics_broadcaster.status()
+    }
+
+@router.get("/cache")
+async def get_cache_stats(
+    _ = Depends(verify_admin)
+) -> Dict:
+    """Per-route cache hits, misses and compute time for this worker, plus backend status"""
+    backend = FastAPICache.get_backend()
+    status = getattr(backend, "status", None)
+    return {
+        "routes": cache_stats.snapshot(),
+        "single_flight": flights.stats,
+        "backend": status() if status else {"type": type(backend).__name__},
+    }
+
+@router.get("/prometheus")
+async def get_prometheus_metrics(
+    _ = Depends(verify_scraper)
+) -> Response:
+    """Request, cache, database pool, analytics ingest and process metrics of every worker in Prometheus text format"""
+    content = await asyncio.to_thread(prometheus_snapshots.render)
+    return Response(content=content, media_type=PROMETHEUS_CONTENT_TYPE)
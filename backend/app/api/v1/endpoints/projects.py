@@ -1,15 +1,33 @@
 # app/api/v1/endpoints/projects.py
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.schemas import project as project_schemas
 from app.models.project import Project
+from app.crud import crud_activity
 from app.db.utils import get_db
+from app.core.cache import etag_matches
+from app.core.config import settings
 
 router = APIRouter()
 
+# Part of every ETag, so a change to the response schema invalidates what clients hold
+_REPRESENTATION = hashlib.md5(",".join(project_schemas.Project.model_fields).encode()).hexdigest()[:8]
+
+def _conditional(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """304 if the client already has this representation, else tag the full response"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.PROJECTS_CACHE_MAX_AGE_SECONDS}"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 @router.get("/", response_model=List[project_schemas.Project])
 def read_projects(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100
@@ -17,24 +35,44 @@ def read_projects(
     """
     Retrieve all projects.
     """
-    projects = db.query(Project).offset(skip).limit(limit).all()
+    # The ETag needs only (id, version) per row and the catalog's latest change
+    page = db.query(
+        Project.id,
+        Project.version,
+        func.max(func.coalesce(Project.updated_at, Project.created_at)).over(),
+    ).order_by(Project.id).offset(skip).limit(limit).all()
+    fingerprint = ",".join(f"{id}.{version}" for id, version, _ in page)
+    latest = page[0][2] if page else None
+    digest = hashlib.md5(f"{latest}|{fingerprint}".encode()).hexdigest()
+    not_modified = _conditional(request, response, f'"{_REPRESENTATION}-{digest}"')
+    if not_modified:
+        return not_modified
+
+    projects = db.query(Project).order_by(Project.id).offset(skip).limit(limit).all()
     return projects
 
 @router.get("/{slug}", response_model=project_schemas.Project)
 def read_project_by_slug(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     slug: str,
 ) -> Any:
     """
     Get project by slug.
     """
-    project = db.query(Project).filter(Project.slug == slug).first()
-    if not project:
+    current = db.query(Project.id, Project.version).filter(Project.slug == slug).first()
+    if not current:
         raise HTTPException(
             status_code=404,
             detail="Project not found"
         )
+    not_modified = _conditional(request, response, f'"{_REPRESENTATION}-{current.id}.{current.version}"')
+    if not_modified:
+        return not_modified
+
+    project = db.query(Project).filter(Project.id == current.id).first()
     return project
 
 @router.post("/", response_model=project_schemas.Project)
@@ -55,6 +93,9 @@ def create_project(
     
     db_obj = Project(**project_in.model_dump())
     db.add(db_obj)
+    crud_activity.record_activity(
+        db, "project", f"New project created: {db_obj.title}", title=db_obj.title
+    )
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -92,8 +133,12 @@ def update_project(
     
     for field, value in update_data.items():
         setattr(project, field, value)
+    project.version = Project.version + 1  # Incremented in SQL, so concurrent updates each count
     
     db.add(project)
+    crud_activity.record_activity(
+        db, "project", f"Project updated: {project.title}", title=project.title
+    )
     db.commit()
     db.refresh(project)
     return project
@@ -115,5 +160,8 @@ def delete_project(
         )
     
     db.delete(project)
+    crud_activity.record_activity(
+        db, "project", f"Project deleted: {project.title}", title=project.title
+    )
     db.commit()
     return {"status": "success", "message": "Project deleted"}
\ No newline at end of file
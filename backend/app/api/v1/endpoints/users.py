@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.schemas import user as user_schemas
-from app.crud import crud_user
+from app.crud import crud_user, crud_activity
 from app.db.utils import get_db
 
 router = APIRouter()
@@ -36,7 +36,14 @@ def create_user(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = crud_user.create(db, obj_in=user_in)
+    # One transaction: the feed entry and the user are stored together or not at all
+    user = crud_user.create(db, obj_in=user_in, commit=False)
+    crud_activity.record_activity(
+        db, "user", f"New user registered: {user.username}", actor_id=user.id,
+        username=user.username, email=user.email
+    )
+    db.commit()
+    db.refresh(user)
     return user
 
 @router.put("/{user_id}", response_model=user_schemas.User)
@@ -0,0 +1,608 @@
+# app/core/cache.py
+import asyncio
+import hashlib
+import inspect
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from fastapi import params
+from fastapi.concurrency import run_in_threadpool
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.prometheus_metrics import cache_requests, response_cache_hits, response_cache_misses
+
+logger = logging.getLogger(__name__)
+
+CacheValue = Union[str, bytes]
+
+# Delete the lock only if it still holds our token (it may have expired and been retaken)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class InstrumentedBackend(Backend):
+    """Wraps the fastapi-cache backend to count response cache hits and misses"""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        ttl, value = await self.backend.get_with_ttl(key)
+        (response_cache_misses if value is None else response_cache_hits).inc()
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.backend.get(key)
+        (response_cache_misses if value is None else response_cache_hits).inc()
+        return value
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        await self.backend.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        return await self.backend.clear(namespace, key)
+
+    def __getattr__(self, name: str) -> Any:
+        # Optional capabilities of the wrapped backend (locks, status)
+        return getattr(self.backend, name)
+
+
+class TieredBackend(Backend):
+    """
+    Per-worker L1 dict in front of a shared Redis L2.
+
+    Reads try L1, then one pipelined GET + PTTL against Redis; an L2 hit is
+    copied into L1 for the key's remaining TTL, so every worker serves the
+    same entry and only one of them has to compute it. Writes and clears
+    go to both tiers and publish the key on `channel`; the other workers
+    drop their L1 copy when the message arrives.
+
+    L1 is only trusted while the invalidation subscription is live (it is
+    emptied on every (re)subscribe, since messages may have been missed).
+    If Redis itself is unreachable the backend degrades to L1 alone: after
+    an L2 error, requests skip Redis for `backoff_seconds` (or until the
+    listener resubscribes) instead of each waiting out a connect timeout.
+    """
+
+    def __init__(
+        self,
+        redis,
+        channel: str = "vadimcastro-cache:invalidate",
+        l1_max_entries: int = settings.CACHE_L1_MAX_ENTRIES,
+        reconnect_seconds: float = 1.0,
+        backoff_seconds: float = settings.CACHE_L2_BACKOFF_SECONDS,
+    ):
+        self.redis = redis
+        self.channel = channel
+        self.l1_max_entries = l1_max_entries
+        self.reconnect_seconds = reconnect_seconds
+        self.backoff_seconds = backoff_seconds
+        self._l2_down_until = 0.0
+        self.worker_id = uuid.uuid4().hex
+        self._l1: "OrderedDict[str, Tuple[Optional[float], CacheValue]]" = OrderedDict()
+        self._subscribed = asyncio.Event()
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "sets": 0, "invalidations": 0, "errors": 0, "l2_skipped": 0}
+
+    # --- L1 ---
+
+    def _l1_get(self, key: str) -> Optional[Tuple[int, CacheValue]]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at is not None and expires_at <= now:
+            self._l1.pop(key, None)
+            return None
+        self._l1.move_to_end(key)
+        return (-1 if expires_at is None else int(expires_at - now)), value
+
+    def _l1_put(self, key: str, value: CacheValue, ttl: Optional[float]) -> None:
+        self._l1[key] = (None if ttl is None else time.monotonic() + ttl, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+
+    def _l1_drop(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if key is not None:
+            return 1 if self._l1.pop(key, None) is not None else 0
+        stale = [k for k in self._l1 if k.startswith(namespace or "")]
+        for k in stale:
+            del self._l1[k]
+        return len(stale)
+
+    # --- Backend API ---
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[CacheValue]]:
+        if self._subscribed.is_set():
+            hit = self._l1_get(key)
+            if hit is not None:
+                self.stats["l1_hits"] += 1
+                cache_requests.labels("response_l1", "hit").inc()
+                return hit
+        cache_requests.labels("response_l1", "miss").inc()
+
+        if not self._l2_available():
+            hit = self._l1_get(key)
+            return hit if hit is not None else (0, None)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value, pttl = await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._redis_failed("get", e)
+            hit = self._l1_get(key)  # Redis down: a possibly stale L1 copy beats recomputing
+            return hit if hit is not None else (0, None)
+
+        if value is None or pttl == -2:
+            self.stats["misses"] += 1
+            cache_requests.labels("response_l2", "miss").inc()
+            return 0, None
+        self.stats["l2_hits"] += 1
+        cache_requests.labels("response_l2", "hit").inc()
+        ttl = None if pttl < 0 else pttl / 1000
+        self._l1_put(key, value, ttl)
+        return (-1 if ttl is None else int(ttl)), value
+
+    async def get(self, key: str) -> Optional[CacheValue]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: CacheValue, expire: Optional[int] = None) -> None:
+        self.stats["sets"] += 1
+        self._l1_put(key, value, expire or None)
+        if not self._l2_available():
+            return
+        try:
+            await self.redis.set(key, value, ex=expire or None)
+            await self._publish("k", key)
+        except (RedisError, OSError) as e:
+            self._redis_failed("set", e)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        count = self._l1_drop(namespace, key)
+        if not self._l2_available():
+            return count
+        try:
+            if key is not None:
+                count = await self.redis.delete(key)
+                await self._publish("k", key)
+            elif namespace:
+                keys = [k async for k in self.redis.scan_iter(match=f"{namespace}*", count=500)]
+                count = await self.redis.delete(*keys) if keys else 0
+                await self._publish("n", namespace)
+        except (RedisError, OSError) as e:
+            self._redis_failed("clear", e)
+        return count
+
+    # --- Invalidation ---
+
+    async def _publish(self, kind: str, target: str) -> None:
+        await self.redis.publish(self.channel, f"{self.worker_id} {kind} {target}")
+
+    def _on_message(self, data: CacheValue) -> None:
+        if isinstance(data, bytes):
+            data = data.decode()
+        origin, kind, target = data.split(" ", 2)
+        if origin == self.worker_id:
+            return
+        self.stats["invalidations"] += 1
+        if kind == "k":
+            self._l1_drop(key=target)
+            waiter = self._waiters.pop(target, None)
+            if waiter is not None:
+                waiter.set()
+        else:
+            self._l1_drop(namespace=target)
+
+    # --- Cross-worker single-flight ---
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Token if this worker should compute `key`, None if another worker
+        holds the lock. Without Redis every worker computes for itself.
+        """
+        token = f"{self.worker_id}:{uuid.uuid4().hex}"
+        if not self._l2_available():
+            return token
+        try:
+            acquired = await self.redis.set(f"{key}:lock", token, px=int(ttl * 1000), nx=True)
+        except (RedisError, OSError) as e:
+            self._redis_failed("lock", e)
+            return token
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        if not self._l2_available():
+            return
+        try:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, f"{key}:lock", token)
+        except (RedisError, OSError) as e:
+            self._redis_failed("unlock", e)
+
+    async def wait_for(self, key: str, timeout: float) -> Tuple[int, Optional[CacheValue]]:
+        """
+        Wait for another worker to fill `key`. Wakes on its invalidation
+        message and polls as a fallback; gives up early if the lock is
+        released without a value (the other computation failed).
+        """
+        deadline = time.monotonic() + timeout
+        waiter = None
+        try:
+            while True:
+                waiter = self._waiters.setdefault(key, asyncio.Event())
+                ttl, value = await self.get_with_ttl(key)
+                remaining = deadline - time.monotonic()
+                if value is not None or remaining <= 0:
+                    return ttl, value
+                if not self._l2_available():
+                    return 0, None  # Without Redis the other worker's result cannot reach us
+                try:
+                    await asyncio.wait_for(waiter.wait(), min(remaining, 0.25))
+                except asyncio.TimeoutError:
+                    try:
+                        if await self.redis.get(f"{key}:lock") is None:
+                            return await self.get_with_ttl(key)
+                    except (RedisError, OSError) as e:
+                        self._redis_failed("wait", e)
+                        return 0, None
+        finally:
+            # Keys that never get an invalidation message would otherwise pile up here
+            if waiter is not None and self._waiters.get(key) is waiter:
+                del self._waiters[key]
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._l1.clear()
+                self._l2_down_until = 0.0  # Redis is reachable again
+                self._subscribed.set()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._redis_failed("subscribe", e)
+            finally:
+                self._subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        self.stats["errors"] += 1
+        self._l2_down_until = time.monotonic() + self.backoff_seconds
+        logger.warning(f"Cache L2 {operation} failed: {error}")
+
+    def _l2_available(self) -> bool:
+        if time.monotonic() >= self._l2_down_until:
+            return True
+        self.stats["l2_skipped"] += 1
+        return False
+
+    # --- lifecycle ---
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="cache-invalidation-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.redis.aclose()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "l1_entries": len(self._l1),
+            "subscribed": self._subscribed.is_set(),
+            "l2_backoff_seconds": round(max(self._l2_down_until - time.monotonic(), 0.0), 3),
+            **self.stats,
+        }
+
+
+class SingleFlight:
+    """At most one in-flight computation per key in this worker; others await it"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.stats = {"computations": 0, "coalesced": 0}
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            self.stats["computations"] += 1
+            # A task of its own, so a leader whose client disconnects does not cancel the followers
+            task = self._tasks[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._tasks.pop(key, None) if self._tasks.get(key) is done else None)
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+
+flights = SingleFlight()
+
+
+def route_name(func: Callable, request: Optional[Request]) -> str:
+    """Route template ("/api/v1/metrics/history") when known, else the function's dotted name"""
+    route = request.scope.get("route") if request is not None else None
+    return getattr(route, "path", None) or f"{func.__module__}.{func.__qualname__}"
+
+
+def _is_injected(param: inspect.Parameter) -> bool:
+    return isinstance(param.default, params.Depends) or param.annotation in (Request, Response, Session)
+
+
+def route_key_builder(
+    func: Callable,
+    namespace: Optional[str] = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Optional[tuple] = None,
+    kwargs: Optional[dict] = None,
+) -> str:
+    """
+    Key on the route and its own parameters (query/path values) only.
+
+    fastapi-cache's default builder hashes `repr(kwargs)`, which includes
+    the request's `Session` and the `Depends(verify_admin)` user, so no
+    two requests ever shared a key. Dependency results are skipped here;
+    the dependencies still run before the endpoint is called, so auth is
+    enforced on hits too. Only use it for responses that are the same for
+    every caller who passes those dependencies.
+    """
+    signature = inspect.signature(func)
+    values = []
+    for name, value in sorted((kwargs or {}).items()):
+        param = signature.parameters.get(name)
+        if param is None or _is_injected(param) or isinstance(value, Session):
+            continue
+        values.append(f"{name}={value.isoformat() if hasattr(value, 'isoformat') else value!r}")
+    if args:
+        values.append(f"args={args!r}")
+    digest = hashlib.md5("&".join(values).encode()).hexdigest()  # nosec: not used for security
+    return f"{FastAPICache.get_prefix()}:{namespace}:{route_name(func, request)}:{digest}"
+
+
+class CacheStats:
+    """Per-route lookups and compute time for the cache decorator (event loop only)"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def _route(self, route: str) -> Dict[str, float]:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "hits": 0, "stale": 0, "misses": 0, "computations": 0, "compute_seconds": 0.0, "compute_max_seconds": 0.0
+            }
+        return stats
+
+    def looked_up(self, route: str, status: str) -> None:
+        self._route(route)[{"HIT": "hits", "STALE": "stale", "MISS": "misses"}[status]] += 1
+
+    def computed(self, route: str, seconds: float) -> None:
+        stats = self._route(route)
+        stats["computations"] += 1
+        stats["compute_seconds"] += seconds
+        stats["compute_max_seconds"] = max(stats["compute_max_seconds"], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for route, stats in sorted(self._routes.items()):
+            lookups = stats["hits"] + stats["stale"] + stats["misses"]
+            computations = stats["computations"]
+            out[route] = {
+                **stats,
+                "hit_ratio": round((stats["hits"] + stats["stale"]) / lookups, 4) if lookups else None,
+                "compute_avg_seconds": round(stats["compute_seconds"] / computations, 4) if computations else None,
+                "compute_seconds": round(stats["compute_seconds"], 4),
+                "compute_max_seconds": round(stats["compute_max_seconds"], 4),
+            }
+        return out
+
+
+cache_stats = CacheStats()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check; uses weak comparison, as RFC 9110 requires for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+@contextmanager
+def _fresh_sessions(kwargs: Dict[str, Any]):
+    """
+    Shared computations (single-flight misses and background refreshes)
+    can outlive the request whose injected Session is closed when it
+    ends, so they get sessions of their own.
+    """
+    sessions = {name: SessionLocal() for name, value in kwargs.items() if isinstance(value, Session)}
+    try:
+        yield {**kwargs, **sessions}
+    finally:
+        for session in sessions.values():
+            session.close()
+
+
+def cache(
+    expire: Optional[int] = None,
+    namespace: str = "",
+    stale_while_revalidate: int = 0,
+    lock_seconds: float = settings.CACHE_LOCK_SECONDS,
+) -> Callable:
+    """
+    Drop-in for `fastapi_cache.decorator.cache` that coalesces misses.
+
+    Concurrent requests that miss the same key share one computation in
+    this worker. When the backend supports locks (TieredBackend), the
+    computing request also takes a Redis lock for up to `lock_seconds`;
+    a request in another worker that finds the lock held waits for the
+    value to land in the shared cache instead of computing it again.
+
+    With `stale_while_revalidate`, entries are kept for `expire +
+    stale_while_revalidate` seconds (the hard TTL). Past `expire` a hit is
+    served as is while one background task recomputes it; past the hard
+    TTL it is a normal miss. The entry's age is derived from its remaining
+    TTL, so stored values need no envelope. Responses carry `Age` and
+    `X-Cache: HIT | STALE | MISS`.
+    """
+
+    def wrapper(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(func)
+        request_param = next((p for p in signature.parameters.values() if p.annotation is Request), None)
+        response_param = next((p for p in signature.parameters.values() if p.annotation is Response), None)
+        parameters = list(signature.parameters.values())
+        extra = [p for p in parameters if p.kind > inspect.Parameter.KEYWORD_ONLY]
+        parameters = [p for p in parameters if p.kind <= inspect.Parameter.KEYWORD_ONLY]
+        if not request_param:
+            parameters.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        if not response_param:
+            parameters.append(inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+        func.__signature__ = signature.replace(parameters=parameters + extra)
+
+        async def call(*args, **kwargs) -> Any:
+            if not request_param:
+                kwargs.pop("request", None)
+            if not response_param:
+                kwargs.pop("response", None)
+            if inspect.iscoroutinefunction(func):
+                return await func(*args, **kwargs)
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        @wraps(func)
+        async def inner(*args, **kwargs) -> Any:
+            request: Optional[Request] = kwargs.get("request")
+            response: Optional[Response] = kwargs.get("response")
+            if (
+                not FastAPICache.get_enable()
+                or (request is not None and request.method != "GET")
+                or (request is not None and request.headers.get("Cache-Control") in ("no-store", "no-cache"))
+            ):
+                return await call(*args, **kwargs)
+
+            coder = FastAPICache.get_coder()
+            fresh_seconds = expire or FastAPICache.get_expire()
+            hard_seconds = fresh_seconds + stale_while_revalidate if fresh_seconds else None
+            backend = FastAPICache.get_backend()
+            key_kwargs = {k: v for k, v in kwargs.items() if k not in ("request", "response")}
+            cache_key = FastAPICache.get_key_builder()(
+                func, namespace, request=request, response=response, args=args, kwargs=key_kwargs
+            )
+            if inspect.isawaitable(cache_key):
+                cache_key = await cache_key
+            route = route_name(func, request)
+
+            async def fill(background: bool = False) -> Tuple[Any, CacheValue]:
+                acquire = getattr(backend, "acquire_lock", None)
+                token = await acquire(cache_key, lock_seconds) if acquire else None
+                if acquire and token is None:
+                    if background:
+                        return None, None  # Another worker is already refreshing it
+                    _, ready = await backend.wait_for(cache_key, lock_seconds)
+                    if ready is not None:
+                        return coder.decode(ready), ready
+                try:
+                    started = time.perf_counter()
+                    # Followers await this even after the leader's request is gone (and its session closed)
+                    with _fresh_sessions(kwargs) as fresh_kwargs:
+                        value = await call(*args, **fresh_kwargs)
+                    cache_stats.computed(route, time.perf_counter() - started)
+                    encoded_value = coder.encode(value)
+                    try:
+                        await backend.set(cache_key, encoded_value, hard_seconds)
+                    except Exception:
+                        logger.warning(f"Error setting cache key '{cache_key}'", exc_info=True)
+                    return value, encoded_value
+                finally:
+                    if token is not None:
+                        await backend.release_lock(cache_key, token)
+
+            try:
+                ttl, cached = await backend.get_with_ttl(cache_key)
+            except Exception:
+                logger.warning(f"Error retrieving cache key '{cache_key}'", exc_info=True)
+                ttl, cached = 0, None
+
+            if cached is not None:
+                result, encoded = coder.decode(cached), cached
+                age = max(hard_seconds - ttl, 0) if hard_seconds and ttl >= 0 else 0
+                status = "HIT"
+                if stale_while_revalidate and age >= fresh_seconds:
+                    status = "STALE"
+                    _revalidate(cache_key, lambda: fill(background=True))
+            else:
+                result, encoded = await flights.run(cache_key, fill)
+                age, status = 0, "MISS"
+            cache_stats.looked_up(route, status)
+
+            if response is not None:
+                directives = f"max-age={max(fresh_seconds - age, 0) if fresh_seconds else 0}"
+                if stale_while_revalidate:
+                    directives += f", stale-while-revalidate={stale_while_revalidate}"
+                response.headers["Cache-Control"] = directives
+                response.headers["Age"] = str(age)
+                response.headers["X-Cache"] = status
+                # Stable across workers and restarts, unlike hash(), which is salted per process
+                body = encoded if isinstance(encoded, bytes) else encoded.encode()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'  # nosec: not used for security
+                response.headers["ETag"] = etag
+                if request is not None and etag_matches(request.headers.get("if-none-match"), etag):
+                    response.status_code = 304
+                    return response
+            return result
+
+        return inner
+
+    return wrapper
+
+
+_revalidating: Dict[str, asyncio.Task] = {}
+
+
+def _revalidate(key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+    """Start at most one background refresh per key; failures keep serving the stale entry"""
+    if key in _revalidating:
+        return
+
+    async def run() -> None:
+        try:
+            await refresh()
+        except Exception as e:
+            logger.warning(f"Background refresh of '{key}' failed: {e}")
+        finally:
+            _revalidating.pop(key, None)
+
+    _revalidating[key] = asyncio.create_task(run())
@@ -65,6 +65,8 @@ class Settings(BaseSettings):
         return os.getenv('SECRET_KEY', secrets.token_urlsafe(32))
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Comma-separated proxy addresses/CIDRs whose X-Forwarded-For is believed (nginx on the Docker network)
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "127.0.0.1/32,::1/128,172.16.0.0/12")
     
     # CORS Settings
     CORS_ORIGINS: List[str] = [
@@ -88,6 +90,73 @@ class Settings(BaseSettings):
     ]
     CORS_MAX_AGE: int = 3600
 
+    # Analytics ingestion settings
+    ANALYTICS_BUFFERED_INGEST: bool = os.getenv("ANALYTICS_BUFFERED_INGEST", "true").lower() == "true"
+    ANALYTICS_QUEUE_MAXSIZE: int = int(os.getenv("ANALYTICS_QUEUE_MAXSIZE", "10000"))
+    ANALYTICS_FLUSH_BATCH_SIZE: int = int(os.getenv("ANALYTICS_FLUSH_BATCH_SIZE", "500"))
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("ANALYTICS_FLUSH_INTERVAL_SECONDS", "2.0"))
+    ANALYTICS_ENQUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ANALYTICS_ENQUEUE_TIMEOUT_SECONDS", "0.05"))
+    ANALYTICS_BATCH_MAX_EVENTS: int = int(os.getenv("ANALYTICS_BATCH_MAX_EVENTS", "1000"))
+    ANALYTICS_BATCH_MAX_BYTES: int = int(os.getenv("ANALYTICS_BATCH_MAX_BYTES", str(1024 * 1024)))
+    ANALYTICS_MAX_FIELD_LENGTH: int = int(os.getenv("ANALYTICS_MAX_FIELD_LENGTH", "256"))  # interaction_type / target_id
+    ANALYTICS_MAX_METADATA_BYTES: int = int(os.getenv("ANALYTICS_MAX_METADATA_BYTES", "4096"))
+    ANALYTICS_PARTITION_MONTHS_AHEAD: int = int(os.getenv("ANALYTICS_PARTITION_MONTHS_AHEAD", "3"))
+    ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = float(os.getenv("ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS", "86400"))
+    ANALYTICS_RETENTION_MONTHS: int = int(os.getenv("ANALYTICS_RETENTION_MONTHS", "0"))  # 0 keeps everything
+    ANALYTICS_RETENTION_MODE: str = os.getenv("ANALYTICS_RETENTION_MODE", "detach")  # 'detach' or 'drop'
+    ANALYTICS_SPOOL_DIR: str = os.getenv("ANALYTICS_SPOOL_DIR", "data/analytics-spool")
+    ANALYTICS_SPOOL_SEGMENT_MAX_BYTES: int = int(os.getenv("ANALYTICS_SPOOL_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+    ANALYTICS_SPOOL_REPLAY_INTERVAL_SECONDS: float = float(os.getenv("ANALYTICS_SPOOL_REPLAY_INTERVAL_SECONDS", "5.0"))
+    ANALYTICS_ROLLUP_SHARDS: int = int(os.getenv("ANALYTICS_ROLLUP_SHARDS", "8"))
+    ANALYTICS_DEDUP_WINDOW_SECONDS: float = float(os.getenv("ANALYTICS_DEDUP_WINDOW_SECONDS", "2.0"))  # 0 disables
+    ANALYTICS_DEDUP_MAX_KEYS: int = int(os.getenv("ANALYTICS_DEDUP_MAX_KEYS", "100000"))
+    # Comma-separated metadata keys stored as dictionary references instead of inline JSON
+    ANALYTICS_INTERNED_METADATA_FIELDS: str = os.getenv(
+        "ANALYTICS_INTERNED_METADATA_FIELDS", "user_agent,referrer,viewport,location,project,title,browser,os,language"
+    )
+    ANALYTICS_METADATA_CACHE_SIZE: int = int(os.getenv("ANALYTICS_METADATA_CACHE_SIZE", "50000"))
+    ANALYTICS_SPOOL_REPLAY_BATCH_SIZE: int = int(os.getenv("ANALYTICS_SPOOL_REPLAY_BATCH_SIZE", "1000"))
+    ANALYTICS_SPOOL_MAX_ATTEMPTS: int = int(os.getenv("ANALYTICS_SPOOL_MAX_ATTEMPTS", "5"))
+
+    # Metrics history settings
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: int = int(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", "300"))
+    METRICS_SNAPSHOT_RETENTION_DAYS: int = int(os.getenv("METRICS_SNAPSHOT_RETENTION_DAYS", "400"))  # 0 keeps everything
+    METRICS_HISTORY_MAX_POINTS: int = int(os.getenv("METRICS_HISTORY_MAX_POINTS", "500"))
+    SYSTEM_METRICS_INTERVAL_SECONDS: float = float(os.getenv("SYSTEM_METRICS_INTERVAL_SECONDS", "5.0"))
+    METRICS_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("METRICS_STREAM_HEARTBEAT_SECONDS", "15"))
+    METRICS_STREAM_MAX_SUBSCRIBERS: int = int(os.getenv("METRICS_STREAM_MAX_SUBSCRIBERS", "50"))
+    # Response cache: 'tiered' (per-worker L1 + Redis L2) or 'memory' (per-worker only)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "tiered")
+    CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+    CACHE_LOCK_SECONDS: float = float(os.getenv("CACHE_LOCK_SECONDS", "10"))
+    # After a Redis error, workers serve from L1 alone for this long (or until they resubscribe)
+    CACHE_L2_BACKOFF_SECONDS: float = float(os.getenv("CACHE_L2_BACKOFF_SECONDS", "5"))
+    # How long browsers may reuse project responses before revalidating with If-None-Match
+    PROJECTS_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("PROJECTS_CACHE_MAX_AGE_SECONDS", "60"))
+    # Bearer token for /metrics/prometheus scrapers; unset means admin login is required
+    METRICS_SCRAPE_TOKEN: str = os.getenv("METRICS_SCRAPE_TOKEN", "")
+    # Per-worker Prometheus snapshots merged at scrape time; empty serves the scraped worker only
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/vadimcastro-prometheus")
+    PROMETHEUS_SNAPSHOT_SECONDS: float = float(os.getenv("PROMETHEUS_SNAPSHOT_SECONDS", "5"))
+    HOST_METRICS_TSDB_DIR: str = os.getenv("HOST_METRICS_TSDB_DIR", "data/host-metrics")
+    HOST_METRICS_FLUSH_SECONDS: float = float(os.getenv("HOST_METRICS_FLUSH_SECONDS", "300"))
+    HOST_METRICS_RETENTION_DAYS: int = int(os.getenv("HOST_METRICS_RETENTION_DAYS", "90"))  # 0 keeps everything
+    HOST_METRICS_DOWNSAMPLE_AFTER_DAYS: int = int(os.getenv("HOST_METRICS_DOWNSAMPLE_AFTER_DAYS", "7"))  # 0 disables
+    HOST_METRICS_CACHED_DAYS: int = int(os.getenv("HOST_METRICS_CACHED_DAYS", "14"))
+    HOST_METRICS_MAINTENANCE_INTERVAL_SECONDS: float = float(os.getenv("HOST_METRICS_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+    DISK_SCAN_INTERVAL_SECONDS: float = float(os.getenv("DISK_SCAN_INTERVAL_SECONDS", "600"))
+    DISK_SCAN_WORKERS: int = int(os.getenv("DISK_SCAN_WORKERS", "4"))
+    # Shared by the API workers: one holds the scanner lock, the others read its published result
+    DISK_SCAN_STATE_DIR: str = os.getenv("DISK_SCAN_STATE_DIR", "data/disk-scan")
+    # Comma-separated paths (files or directories) per cleanup category
+    DISK_SCAN_LOG_PATHS: str = os.getenv("DISK_SCAN_LOG_PATHS", "app.log,logs,/var/log")
+    DISK_SCAN_PACKAGE_CACHE_PATHS: str = os.getenv(
+        "DISK_SCAN_PACKAGE_CACHE_PATHS", "~/.cache/pip,~/.npm/_cacache,/var/cache/apt/archives"
+    )
+    DISK_SCAN_DOCKER_PATHS: str = os.getenv("DISK_SCAN_DOCKER_PATHS", "/var/lib/docker")
+    DOCKER_SOCKET_PATH: str = os.getenv("DOCKER_SOCKET_PATH", "/var/run/docker.sock")
+    DOCKER_RESYNC_INTERVAL_SECONDS: float = float(os.getenv("DOCKER_RESYNC_INTERVAL_SECONDS", "60"))
+
     model_config = ConfigDict(case_sensitive=True, env_file=".env", extra="allow")
 
 settings = Settings()
\ No newline at end of file
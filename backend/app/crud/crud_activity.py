@@ -0,0 +1,58 @@
+# app/crud/crud_activity.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.activity_event import ActivityEvent
+from app.utils.cursor import format_cursor
+
+
+def record_activity(
+    db: Session,
+    event_type: str,
+    description: str,
+    actor_id: Optional[int] = None,
+    **payload: Any
+) -> ActivityEvent:
+    """
+    Add a feed entry to the caller's transaction; it commits (or rolls
+    back) together with the write it describes.
+    """
+    event = ActivityEvent(
+        event_type=event_type,
+        description=description,
+        actor_id=actor_id,
+        payload=payload or None
+    )
+    db.add(event)
+    return event
+
+
+def get_activity_page(
+    db: Session,
+    limit: int = 5,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[Dict]:
+    """
+    Newest-first page of the feed. `before` is the (timestamp, id) cursor of
+    the last entry already seen; seeking past it uses the (created_at, id)
+    index, so every page costs the same regardless of depth.
+    """
+    stmt = select(ActivityEvent).order_by(
+        ActivityEvent.created_at.desc(), ActivityEvent.id.desc()
+    ).limit(limit)
+    if before is not None:
+        stmt = stmt.where(tuple_(ActivityEvent.created_at, ActivityEvent.id) < tuple_(*before))
+
+    activities = []
+    for event in db.scalars(stmt):
+        activities.append({
+            **(event.payload or {}),
+            "type": event.event_type,
+            "timestamp": event.created_at,
+            "description": event.description,
+            "cursor": format_cursor({"timestamp": event.created_at, "id": event.id})
+        })
+    return activities
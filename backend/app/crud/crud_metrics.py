@@ -1,36 +1,32 @@
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List
+from sqlalchemy import func, select, true
+from typing import Dict, List, Optional, Tuple
 from app.models.user import User
 from app.models.user_session import UserSession
 from app.models.project import Project
-from app.models.interaction import AnalyticsInteraction
+from app.crud import crud_activity
+from app.services.analytics import AnalyticsService
+from app.services.visitors import VisitorService
 
 def get_visitor_metrics(db: Session) -> Dict:
     """Get visitor metrics with month-over-month comparison and total interactions"""
-    # Individual interaction counts
-    interactions = db.query(
-        AnalyticsInteraction.interaction_type,
-        func.count(AnalyticsInteraction.id).label('count')
-    ).group_by(AnalyticsInteraction.interaction_type).all()
-    
-    interaction_counts = {i.interaction_type: i.count for i in interactions}
+    # Individual interaction counts (read from the daily rollup)
+    interaction_counts = AnalyticsService.get_total_counts(db)
     total_interactions = sum(interaction_counts.values())
     
     current_month_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
     
-    # Get unique visitors (users with sessions) for current month
-    current_visitors = db.query(func.count(func.distinct(UserSession.user_id))).filter(
-        UserSession.created_at >= current_month_start
-    ).scalar() or 0
-    
-    # Get unique visitors from last month
-    last_month_visitors = db.query(func.count(func.distinct(UserSession.user_id))).filter(
-        UserSession.created_at >= last_month_start,
-        UserSession.created_at < current_month_start
-    ).scalar() or 0
+    # Approximate unique visitors from the daily HyperLogLog sketches
+    current = VisitorService.get_unique_visitors(
+        db, current_month_start.date(), datetime.now(timezone.utc).date()
+    )
+    last_month = VisitorService.get_unique_visitors(
+        db, last_month_start.date(), (current_month_start - timedelta(days=1)).date()
+    )
+    current_visitors = current["estimate"]
+    last_month_visitors = last_month["estimate"]
     
     percentage_change = (
         ((current_visitors - last_month_visitors) / last_month_visitors * 100)
@@ -43,7 +39,8 @@ def get_visitor_metrics(db: Session) -> Dict:
         "percentageChange": round(percentage_change, 1),
         "lastMonthTotal": last_month_visitors,
         "totalInteractions": total_interactions,
-        "interactionCounts": interaction_counts
+        "interactionCounts": interaction_counts,
+        "errorMargin": round(current["relativeError"] * 100, 1)
     }
 
 def get_session_metrics(db: Session) -> Dict:
@@ -118,48 +115,9 @@ def get_user_metrics(db: Session) -> Dict:
         "lastMonthNew": last_month_users
     }
 
-def get_recent_activity(db: Session, limit: int = 5) -> List[Dict]:
-    """Get recent activity across all types"""
-    # Get recent sessions
-    recent_sessions = db.query(
-        UserSession.user_id,
-        User.username,
-        User.email,
-        UserSession.created_at
-    ).join(
-        User, User.id == UserSession.user_id
-    ).order_by(
-        UserSession.created_at.desc()
-    ).limit(limit).all()
-    
-    # Get recent projects
-    recent_projects = db.query(Project).order_by(
-        Project.created_at.desc()
-    ).limit(limit).all()
-    
-    # Combine and format activities
-    activities = []
-    
-    for session in recent_sessions:
-        activities.append({
-            "type": "session",
-            "username": session.username,
-            "email": session.email,
-            "timestamp": session.created_at,
-            "description": f"User logged in"
-        })
-    
-    for project in recent_projects:
-        activities.append({
-            "type": "project",
-            "title": project.title,
-            "timestamp": project.created_at,
-            "description": f"New project created: {project.title}"
-        })
-    
-    # Sort combined activities by timestamp
-    activities.sort(key=lambda x: x["timestamp"], reverse=True)
-    return activities[:limit]
+def get_recent_activity(db: Session, limit: int = 5, before: Optional[Tuple[datetime, int]] = None) -> List[Dict]:
+    """Get recent activity across all types from the activity feed"""
+    return crud_activity.get_activity_page(db, limit=limit, before=before)
 
 
 def get_project_metrics(db: Session) -> Dict:
@@ -194,3 +152,96 @@ def get_project_metrics(db: Session) -> Dict:
         "percentageChange": round(percentage_change, 1),
         "lastMonthTotal": last_month_projects
     }
+
+
+def _percentage_change(current: int, previous: int) -> float:
+    change = (
+        ((current - previous) / previous * 100)
+        if previous > 0 else
+        100 if current > 0 else 0
+    )
+    return round(change, 1)
+
+def get_dashboard_metrics(db: Session) -> Dict:
+    """
+    Visitor, session, user and project metrics in one round trip.
+
+    Each table is scanned once with COUNT(...) FILTER (WHERE ...) aggregates,
+    and the three one-row aggregates are cross joined into a single
+    SELECT. Values match get_session_metrics, get_user_metrics and
+    get_project_metrics; visitors come from the rollups and sketches.
+    """
+    now = datetime.now(timezone.utc)
+    active_cutoff = now - timedelta(minutes=15)
+    previous_hour = now - timedelta(hours=1)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+
+    distinct_users = func.count(func.distinct(UserSession.user_id))
+    sessions = select(
+        distinct_users.filter(UserSession.last_activity >= active_cutoff).label("active"),
+        distinct_users.filter(
+            UserSession.last_activity >= previous_hour,
+            UserSession.last_activity < active_cutoff
+        ).label("previous_hour"),
+        distinct_users.filter(UserSession.created_at >= today_start).label("today"),
+    ).subquery()
+
+    active_users = func.count(User.id).filter(User.is_active == True)
+    users = select(
+        active_users.label("total"),
+        func.count(User.id).filter(
+            User.is_active == True,
+            User.created_at >= current_month_start
+        ).label("this_month"),
+        func.count(User.id).filter(
+            User.is_active == True,
+            User.created_at >= last_month_start,
+            User.created_at < current_month_start
+        ).label("last_month"),
+    ).subquery()
+
+    projects = select(
+        func.count(Project.id).label("total"),
+        func.count(Project.id).filter(Project.created_at >= current_month_start).label("this_month"),
+        func.count(Project.id).filter(
+            Project.created_at >= last_month_start,
+            Project.created_at < current_month_start
+        ).label("last_month"),
+    ).subquery()
+
+    # Each subquery returns exactly one row, so the cross join is a single row
+    row = db.execute(select(
+        sessions,
+        users.c.total.label("users_total"),
+        users.c.this_month.label("users_this_month"),
+        users.c.last_month.label("users_last_month"),
+        projects.c.total.label("projects_total"),
+        projects.c.this_month.label("projects_this_month"),
+        projects.c.last_month.label("projects_last_month")
+    ).select_from(
+        sessions.join(users, true()).join(projects, true())
+    )).one()
+
+    return {
+        "visitors": get_visitor_metrics(db),
+        "sessions": {
+            "active": row.active,
+            "percentageChange": _percentage_change(row.active, row.previous_hour),
+            "previousHourActive": row.previous_hour,
+            "totalToday": row.today
+        },
+        "users": {
+            "total": row.users_total,
+            "newThisMonth": row.users_this_month,
+            "percentageChange": _percentage_change(row.users_this_month, row.users_last_month),
+            "lastMonthNew": row.users_last_month
+        },
+        "projects": {
+            "total": row.projects_total,
+            "newThisMonth": row.projects_this_month,
+            "percentageChange": _percentage_change(row.projects_this_month, row.projects_last_month),
+            "lastMonthTotal": row.projects_last_month
+        }
+    }
@@ -10,6 +10,11 @@ from app.models.project import Project
 from app.models.user_session import UserSession
 from app.models.note import Note
 from app.models.interaction import AnalyticsInteraction
+from app.models.analytics_rollup import AnalyticsRollupHourly, AnalyticsRollupDaily
+from app.models.visitor_sketch import VisitorSketch
+from app.models.metadata_value import AnalyticsMetadataValue
+from app.models.metrics_snapshot import MetricsSnapshot
+from app.models.activity_event import ActivityEvent
 
 # Create SQLAlchemy engine
 engine = create_engine(settings.DATABASE_URL)
@@ -2,6 +2,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+import asyncio
 import logging
 import sys
 import os
@@ -10,8 +11,22 @@ from app.db.session import SessionLocal
 from app.db.init_db import init_db
 from app.db.utils import test_db_connection
 from app.middleware.security import setup_security
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.core.cache import InstrumentedBackend, TieredBackend, route_key_builder
+from app.services.analytics_ingest import ingest_queue, write_rows
+from app.services.analytics_spool import spool, spool_replay_loop
+from app.services.analytics_partitions import partition_maintenance_loop
+from app.services.metrics_history import metrics_snapshot_loop
+from app.services.system_collector import system_collector
+from app.services.metrics_ring import system_history
+from app.services.host_tsdb import host_tsdb, host_tsdb_maintenance_loop
+from app.services.metrics_stream import metrics_broadcaster
+from app.services.docker_client import docker_state
+from app.services.disk_scanner import disk_scanner
+from app.services.prometheus_metrics import snapshots as prometheus_snapshots
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.inmemory import InMemoryBackend
+from redis import asyncio as aioredis
 from contextlib import asynccontextmanager
 
 # Configure logging
@@ -33,8 +48,32 @@ logger.info(f"Environment: {ENVIRONMENT}")
 async def lifespan(app: FastAPI):
     # Setup
     logger.info("App startup - initializing cache...")
-    FastAPICache.init(InMemoryBackend(), prefix="vadimcastro-cache")
+    cache_backend = None
+    if settings.CACHE_BACKEND == "tiered":
+        cache_backend = TieredBackend(aioredis.from_url(
+            settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=1
+        ))
+        await cache_backend.start()
+    FastAPICache.init(
+        InstrumentedBackend(cache_backend or InMemoryBackend()),
+        prefix="vadimcastro-cache",
+        key_builder=route_key_builder,
+    )
     logger.info("Cache initialized successfully")
+
+    if settings.ANALYTICS_BUFFERED_INGEST:
+        await ingest_queue.start()
+    partition_task = asyncio.create_task(partition_maintenance_loop())
+    spool_task = asyncio.create_task(spool_replay_loop(spool, write_rows))
+    snapshot_task = asyncio.create_task(metrics_snapshot_loop())
+    tsdb_task = asyncio.create_task(host_tsdb_maintenance_loop())
+    docker_state.start()
+    disk_scanner.start()
+    prometheus_snapshots.start()
+    system_collector.listeners.append(system_history.record)
+    system_collector.listeners.append(host_tsdb.record)
+    metrics_broadcaster.attach(system_collector)
+    system_collector.start()
     
     # Initialize database with admin user in development
     if ENVIRONMENT == "development":
@@ -53,6 +92,20 @@ async def lifespan(app: FastAPI):
     yield
     
     # Cleanup
+    partition_task.cancel()
+    spool_task.cancel()
+    snapshot_task.cancel()
+    tsdb_task.cancel()
+    system_collector.stop()
+    host_tsdb.close()
+    docker_state.stop()
+    disk_scanner.stop()
+    prometheus_snapshots.stop()
+    if cache_backend is not None:
+        await cache_backend.stop()
+    logger.info("App shutdown - draining analytics ingest queue...")
+    await ingest_queue.stop()
+    spool.seal()
     logger.info("App shutdown")
 
 app = FastAPI(
@@ -102,6 +155,9 @@ async def add_cors_headers_on_error(request: Request, call_next):
             }
         )
 
+# Outermost, so latency covers every other middleware
+app.add_middleware(RequestMetricsMiddleware)
+
 # Check middleware stack
 print(f"Total middleware count: {len(app.user_middleware)}")
 for i, middleware in enumerate(app.user_middleware):
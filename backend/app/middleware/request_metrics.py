@@ -0,0 +1,47 @@
+# app/middleware/request_metrics.py
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.prometheus_metrics import http_request_duration, http_requests, http_requests_in_progress
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """
+    Counts requests and observes latency per route template.
+
+    Plain ASGI rather than `BaseHTTPMiddleware`, so it adds no task or
+    stream copy per request. The route comes from `scope["route"]`, which
+    FastAPI sets on a match; labelling by template ("/projects/{id}")
+    instead of the raw path keeps the number of series bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_requests.labels(method, route, status).inc()
+            http_request_duration.labels(method, route).observe(elapsed)
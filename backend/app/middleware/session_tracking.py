@@ -2,6 +2,7 @@
 from fastapi import Request
 from app.db.session import SessionLocal
 from app.models.user_session import UserSession
+from app.crud.crud_activity import record_activity
 from datetime import datetime
 
 async def track_user_session(request: Request, call_next):
@@ -17,6 +18,10 @@ async def track_user_session(request: Request, call_next):
             if not session:
                 session = UserSession(user_id=request.user.id)
                 db.add(session)
+                record_activity(
+                    db, "session", "User logged in", actor_id=request.user.id,
+                    username=request.user.username, email=request.user.email
+                )
             else:
                 session.last_activity = datetime.now()
             
@@ -0,0 +1,22 @@
+# app/models/activity_event.py
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class ActivityEvent(Base):
+    """Append-only feed of notable writes (logins, project changes, new users)"""
+    __tablename__ = "activity_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    event_type = Column(String(32), nullable=False)
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    description = Column(Text, nullable=False)
+    # Display fields captured at write time (username, title, ...) so reads need no joins
+    payload = Column(JSONB, nullable=True)
+
+    __table_args__ = (
+        # Serves the feed's keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_activity_events_created_at_id", "created_at", "id"),
+    )
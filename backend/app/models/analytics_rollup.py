@@ -0,0 +1,21 @@
+# app/models/analytics_rollup.py
+from sqlalchemy import Column, String, DateTime, BigInteger, SmallInteger
+from app.db.base_class import Base
+
+class AnalyticsRollupHourly(Base):
+    __tablename__ = "analytics_rollup_hourly"
+
+    interaction_type = Column(String, primary_key=True)
+    target_id = Column(String, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True, index=True)  # UTC hour start
+    shard = Column(SmallInteger, primary_key=True, default=0, server_default="0")  # Spreads concurrent writers; readers sum
+    count = Column(BigInteger, nullable=False, default=0)
+
+class AnalyticsRollupDaily(Base):
+    __tablename__ = "analytics_rollup_daily"
+
+    interaction_type = Column(String, primary_key=True)
+    target_id = Column(String, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True, index=True)  # UTC day start
+    shard = Column(SmallInteger, primary_key=True, default=0, server_default="0")  # Spreads concurrent writers; readers sum
+    count = Column(BigInteger, nullable=False, default=0)
@@ -1,13 +1,17 @@
 # app/models/interaction.py
 from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class AnalyticsInteraction(Base):
     __tablename__ = "analytics_interactions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month on timestamp, so the primary key must include it (and its index covers id)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     interaction_type = Column(String, index=True, nullable=False)  # 'project_click', 'resume_view', 'social_click'
     target_id = Column(String, index=True, nullable=False)  # e.g., project slug, 'linkedin', 'github'
-    metadata_json = Column(JSON, nullable=True)  # Store browser info, etc.
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    metadata_json = Column(JSON, nullable=True)  # Non-interned metadata only (see metadata_refs)
+    metadata_refs = Column(ARRAY(Integer), nullable=True)  # ids into analytics_metadata_values
+    event_id = Column(UUID(as_uuid=False), nullable=True)  # Client-side id, unique with timestamp; makes replays idempotent
+    timestamp = Column(DateTime(timezone=True), primary_key=True, index=True, server_default=func.now(), nullable=False)
@@ -0,0 +1,11 @@
+# app/models/metadata_value.py
+from sqlalchemy import Column, Integer, String, Text, UniqueConstraint
+from app.db.base_class import Base
+
+class AnalyticsMetadataValue(Base):
+    __tablename__ = "analytics_metadata_values"
+    __table_args__ = (UniqueConstraint("field", "value", name="uq_analytics_metadata_values_field_value"),)
+
+    id = Column(Integer, primary_key=True)
+    field = Column(String, nullable=False)  # e.g. 'user_agent', 'referrer', 'viewport'
+    value = Column(Text, nullable=False)
@@ -0,0 +1,15 @@
+# app/models/metrics_snapshot.py
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+from app.db.base_class import Base
+
+class MetricsSnapshot(Base):
+    __tablename__ = "metrics_snapshots"
+
+    # Aligned to the snapshot interval, so concurrent workers collapse onto one row
+    captured_at = Column(DateTime(timezone=True), primary_key=True)
+    visitors_month = Column(Integer, nullable=False)  # HyperLogLog estimate, current month
+    active_sessions = Column(Integer, nullable=False)
+    sessions_today = Column(Integer, nullable=False)
+    users_total = Column(Integer, nullable=False)
+    projects_total = Column(Integer, nullable=False)
+    interactions_total = Column(BigInteger, nullable=False)
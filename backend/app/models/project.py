@@ -18,5 +18,6 @@ class Project(Base):
     github_url = Column(String, nullable=True)
     technical_implementation = Column(JSON, nullable=True)  # Stored as JSON object
     status = Column(String, nullable=False, server_default="active")  # 'active', 'archived', 'in_progress'
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every update; feeds the ETag
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
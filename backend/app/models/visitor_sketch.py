@@ -0,0 +1,13 @@
+# app/models/visitor_sketch.py
+from sqlalchemy import Column, Date, DateTime, LargeBinary, SmallInteger
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class VisitorSketch(Base):
+    __tablename__ = "visitor_sketches"
+
+    day = Column(Date, primary_key=True)  # UTC day
+    shard = Column(SmallInteger, primary_key=True, default=0, server_default="0")  # Concurrent writers use separate rows; readers merge
+    precision = Column(SmallInteger, nullable=False)
+    registers = Column(LargeBinary, nullable=False)  # zlib-compressed HyperLogLog registers
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
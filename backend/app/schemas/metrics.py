@@ -1,5 +1,6 @@
 # app/schemas/metrics.py
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 
 # --- System Metrics Components ---
@@ -46,13 +47,25 @@ class SystemMetrics(BaseModel):
 
 # --- Network Metrics ---
 
+class TCPStateCounts(BaseModel):
+    established: int = 0
+    time_wait: int = 0
+    orphaned: int = 0
+    retransmitted_segments: int = 0
+
 class NetworkMetrics(BaseModel):
     bytes_sent: int = 0
     bytes_recv: int = 0
     packets_sent: int = 0
     packets_recv: int = 0
+    bytes_sent_per_sec: float = 0.0
+    bytes_recv_per_sec: float = 0.0
+    packets_sent_per_sec: float = 0.0
+    packets_recv_per_sec: float = 0.0
+    sample_interval_seconds: float = 0.0
     active_connections: int = 0
     total_connections: int = 0
+    tcp: Optional[TCPStateCounts] = None
     error: Optional[str] = None
 
 # --- Disk Metrics (Detailed for Modal) ---
@@ -75,6 +88,7 @@ class DiskMetrics(BaseModel):
     docker_usage: Optional[DockerUsage] = None
     cleanup_potential: Optional[CleanupPotential] = None
     health_status: str = "unknown"
+    scanned_at: Optional[float] = None  # Epoch seconds of the disk scan the figures come from
     error: Optional[str] = None
 
 # --- Analytics & Visitor Metrics ---
@@ -85,6 +99,7 @@ class VisitorMetrics(BaseModel):
     lastMonthTotal: int = 0
     totalInteractions: int = 0
     interactionCounts: Dict[str, int] = {}
+    errorMargin: float = 0.0  # Relative standard error of the visitor estimate, in percent
     error: Optional[str] = None
 
 class SessionMetrics(BaseModel):
@@ -94,6 +109,24 @@ class SessionMetrics(BaseModel):
     totalToday: int = 0
     error: Optional[str] = None
 
+class UserMetrics(BaseModel):
+    total: int = 0
+    newThisMonth: int = 0
+    percentageChange: float = 0.0
+    lastMonthNew: int = 0
+
+class ProjectMetrics(BaseModel):
+    total: int = 0
+    newThisMonth: int = 0
+    percentageChange: float = 0.0
+    lastMonthTotal: int = 0
+
+class DashboardMetrics(BaseModel):
+    visitors: VisitorMetrics
+    sessions: SessionMetrics
+    users: UserMetrics
+    projects: ProjectMetrics
+
 # --- Health & Deployment ---
 
 class HealthMetrics(BaseModel):
@@ -112,3 +145,21 @@ class DeploymentInfo(BaseModel):
     environment: str = "unknown"
     deploy_time: str = "unknown"
     error: Optional[str] = None
+
+
+# --- Metrics History ---
+
+class MetricsHistoryPoint(BaseModel):
+    timestamp: datetime
+    visitorsMonth: int
+    activeSessions: int
+    sessionsToday: int
+    usersTotal: int
+    projectsTotal: int
+    interactionsTotal: int
+
+class MetricsHistory(BaseModel):
+    start: datetime
+    end: datetime
+    bucketSeconds: int
+    points: List[MetricsHistoryPoint]
@@ -1,51 +1,196 @@
 # app/services/analytics.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import delete, func, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.interaction import AnalyticsInteraction
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from app.models.analytics_rollup import AnalyticsRollupHourly, AnalyticsRollupDaily
+from app.core.config import settings
+from app.services.visitors import VisitorService
+from app.services.metadata_dictionary import metadata_dictionary
+from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+def _hour_bucket(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def _day_bucket(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
 
 class AnalyticsService:
     @staticmethod
     def track_interaction(
-        db: Session, 
-        interaction_type: str, 
-        target_id: str, 
+        db: Session,
+        interaction_type: str,
+        target_id: str,
         metadata: Optional[Dict[str, Any]] = None
     ) -> AnalyticsInteraction:
         """Create a new interaction record"""
-        db_interaction = AnalyticsInteraction(
-            interaction_type=interaction_type,
-            target_id=target_id,
-            metadata_json=metadata
-        )
+        row = {
+            "interaction_type": interaction_type,
+            "target_id": target_id,
+            "metadata_json": metadata,
+            "event_id": str(uuid.uuid4()),
+            "timestamp": datetime.now(timezone.utc)
+        }
+        db_interaction = AnalyticsInteraction(**metadata_dictionary.encode_rows(db, [row])[0])
         db.add(db_interaction)
+        AnalyticsService.upsert_rollups(db, [row])
+        VisitorService.record_visitors(db, [row])
         db.commit()
         db.refresh(db_interaction)
         return db_interaction
 
+    @staticmethod
+    def bulk_insert_interactions(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many interaction rows in a single multi-row statement.
+
+        Rows carrying an `event_id` that is already stored are skipped, and
+        only rows actually inserted feed the rollups and visitor sketches,
+        so replaying the same batch twice is harmless.
+        """
+        if not rows:
+            return 0
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("timestamp", now)
+        values = [
+            {
+                "interaction_type": row["interaction_type"],
+                "target_id": row["target_id"],
+                "metadata_json": row["metadata_json"],
+                "metadata_refs": row["metadata_refs"],
+                "event_id": row.get("event_id"),
+                "timestamp": row["timestamp"],
+            }
+            for row in metadata_dictionary.encode_rows(db, rows)
+        ]
+        stmt = pg_insert(AnalyticsInteraction).values(values).on_conflict_do_nothing(
+            index_elements=[AnalyticsInteraction.event_id, AnalyticsInteraction.timestamp]
+        ).returning(AnalyticsInteraction.event_id)
+        stored_ids = {r.event_id for r in db.execute(stmt)}
+        # Rows without an event_id cannot conflict, so they were always inserted
+        inserted = [row for row in rows if row.get("event_id") is None or row["event_id"] in stored_ids]
+        if inserted:
+            AnalyticsService.upsert_rollups(db, inserted)
+            VisitorService.record_visitors(db, inserted)
+        db.commit()
+        return len(inserted)
+
+    @staticmethod
+    def upsert_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Fold a batch of interactions into the hourly and daily rollups.
+
+        Counts are pre-aggregated so each bucket row is touched once per
+        batch. Each batch adds to one randomly chosen shard row per bucket,
+        so concurrent batches rarely wait on each other's row locks; when
+        they do meet, keys are upserted in sorted order so they never
+        deadlock. Readers sum over shards.
+        """
+        shard = random.randrange(settings.ANALYTICS_ROLLUP_SHARDS)
+        hourly: Counter = Counter()
+        daily: Counter = Counter()
+        for row in rows:
+            ts = row.get("timestamp") or datetime.now(timezone.utc)
+            key = (row["interaction_type"], row["target_id"])
+            hourly[key + (_hour_bucket(ts),)] += 1
+            daily[key + (_day_bucket(ts),)] += 1
+
+        for model, counts in ((AnalyticsRollupHourly, hourly), (AnalyticsRollupDaily, daily)):
+            values = [
+                {"interaction_type": t, "target_id": target, "bucket": bucket, "shard": shard, "count": n}
+                for (t, target, bucket), n in sorted(counts.items())
+            ]
+            stmt = pg_insert(model).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.interaction_type, model.target_id, model.bucket, model.shard],
+                set_={"count": model.count + stmt.excluded.count}
+            )
+            db.execute(stmt)
+
+    @staticmethod
+    def rebuild_rollups(db: Session, since: Optional[datetime] = None) -> Tuple[int, int]:
+        """
+        Recompute rollup buckets from the raw table (used for backfills).
+        Buckets are replaced by a single shard-0 row, so running it more
+        than once is safe.
+        """
+        if since is not None:
+            # Whole days only, so no bucket is overwritten with a partial count
+            since = _day_bucket(since)
+        counts = []
+        for model, unit in ((AnalyticsRollupHourly, "hour"), (AnalyticsRollupDaily, "day")):
+            bucket = func.date_trunc(unit, func.timezone("UTC", AnalyticsInteraction.timestamp))
+            source = select(
+                AnalyticsInteraction.interaction_type,
+                AnalyticsInteraction.target_id,
+                func.timezone("UTC", bucket).label("bucket"),
+                func.count().label("count")
+            ).where(AnalyticsInteraction.timestamp.isnot(None))
+            if since is not None:
+                source = source.where(AnalyticsInteraction.timestamp >= since)
+            source = source.group_by(
+                AnalyticsInteraction.interaction_type,
+                AnalyticsInteraction.target_id,
+                bucket
+            )
+            stale = delete(model)
+            if since is not None:
+                stale = stale.where(model.bucket >= since)
+            db.execute(stale)
+            stmt = pg_insert(model).from_select(
+                ["interaction_type", "target_id", "bucket", "count"], source
+            )
+            counts.append(db.execute(stmt).rowcount)
+        db.commit()
+        return counts[0], counts[1]
+
     @staticmethod
     def get_interaction_stats(db: Session, days: int = 30) -> List[Dict[str, Any]]:
         """Get summarized stats for the last N days"""
-        since_date = datetime.now() - timedelta(days=days)
-        
+        since_date = datetime.now(timezone.utc) - timedelta(days=days)
+        # Hourly buckets cover the partial first day, daily buckets the rest
+        first_full_day = _day_bucket(since_date) + timedelta(days=1)
+
+        parts = union_all(
+            select(
+                AnalyticsRollupHourly.interaction_type,
+                AnalyticsRollupHourly.target_id,
+                AnalyticsRollupHourly.count
+            ).where(
+                AnalyticsRollupHourly.bucket >= _hour_bucket(since_date),
+                AnalyticsRollupHourly.bucket < first_full_day
+            ),
+            select(
+                AnalyticsRollupDaily.interaction_type,
+                AnalyticsRollupDaily.target_id,
+                AnalyticsRollupDaily.count
+            ).where(
+                AnalyticsRollupDaily.bucket >= first_full_day
+            )
+        ).subquery()
+
         # Group by type and target
-        stats = db.query(
-            AnalyticsInteraction.interaction_type,
-            AnalyticsInteraction.target_id,
-            func.count(AnalyticsInteraction.id).label("count")
-        ).filter(
-            AnalyticsInteraction.timestamp >= since_date
-        ).group_by(
-            AnalyticsInteraction.interaction_type,
-            AnalyticsInteraction.target_id
+        stats = db.execute(
+            select(
+                parts.c.interaction_type,
+                parts.c.target_id,
+                func.sum(parts.c.count).label("count")
+            ).group_by(
+                parts.c.interaction_type,
+                parts.c.target_id
+            )
         ).all()
-        
+
         return [
             {
                 "type": s.interaction_type,
                 "target": s.target_id,
-                "count": s.count
+                "count": int(s.count)
             } for s in stats
         ]
 
@@ -53,10 +198,10 @@ class AnalyticsService:
     def get_total_counts(db: Session) -> Dict[str, int]:
         """Get total counts per type"""
         stats = db.query(
-            AnalyticsInteraction.interaction_type,
-            func.count(AnalyticsInteraction.id).label("count")
+            AnalyticsRollupDaily.interaction_type,
+            func.sum(AnalyticsRollupDaily.count).label("count")
         ).group_by(
-            AnalyticsInteraction.interaction_type
+            AnalyticsRollupDaily.interaction_type
         ).all()
-        
-        return {s.interaction_type: s.count for s in stats}
+
+        return {s.interaction_type: int(s.count) for s in stats}
@@ -0,0 +1,145 @@
+# app/services/analytics_batch.py
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class BatchPayloadError(ValueError):
+    """Raised when a batch payload cannot be decoded or fails validation"""
+
+    def __init__(self, message: str, errors: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def decompress(body: bytes, max_bytes: int = settings.ANALYTICS_BATCH_MAX_BYTES) -> bytes:
+    """
+    Inflate a gzip body, refusing to expand beyond `max_bytes`.
+
+    `navigator.sendBeacon` cannot set Content-Encoding, so gzip is detected
+    from the magic bytes rather than from headers.
+    """
+    if not body.startswith(GZIP_MAGIC):
+        return body
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, max_bytes + 1)
+    except zlib.error as e:
+        raise BatchPayloadError(f"Invalid gzip payload: {e}")
+    if len(data) > max_bytes or inflater.unconsumed_tail:
+        raise BatchPayloadError(f"Decompressed payload exceeds {max_bytes} bytes")
+    return data
+
+
+def _has_nul(value: Any) -> bool:
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_has_nul(k) or _has_nul(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_has_nul(v) for v in value)
+    return False
+
+
+def interaction_error(
+    interaction_type: Any,
+    target_id: Any,
+    metadata: Any,
+    max_length: int = settings.ANALYTICS_MAX_FIELD_LENGTH,
+    max_metadata_bytes: int = settings.ANALYTICS_MAX_METADATA_BYTES,
+) -> Optional[str]:
+    """
+    Why one interaction can't be stored, or None if it is valid.
+
+    Postgres text columns reject NUL characters, so an event carrying one
+    would fail every insert (and every spool replay) instead of just its own.
+    """
+    for field, value in (("interaction_type", interaction_type), ("target_id", target_id)):
+        if not isinstance(value, str) or not value:
+            return f"{field} must be a non-empty string"
+        if len(value) > max_length:
+            return f"{field} exceeds {max_length} characters"
+        if "\x00" in value:
+            return f"{field} must not contain NUL characters"
+    if metadata is None:
+        return None
+    if not isinstance(metadata, dict):
+        return "metadata must be an object"
+    if _has_nul(metadata):
+        return "metadata must not contain NUL characters"
+    if len(json.dumps(metadata, separators=(",", ":")).encode("utf-8")) > max_metadata_bytes:
+        return f"metadata exceeds {max_metadata_bytes} bytes"
+    return None
+
+
+def _decode(data: bytes) -> List[Any]:
+    text = data.decode("utf-8").strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        try:
+            events = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BatchPayloadError(f"Invalid JSON array: {e}")
+        if not isinstance(events, list):
+            raise BatchPayloadError("Expected a JSON array of interactions")
+        return events
+    # NDJSON: one interaction object per line
+    events = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise BatchPayloadError(f"Invalid NDJSON on line {line_no}: {e}")
+    return events
+
+
+def parse_interaction_batch(
+    body: bytes,
+    max_events: int = settings.ANALYTICS_BATCH_MAX_EVENTS,
+    max_bytes: int = settings.ANALYTICS_BATCH_MAX_BYTES,
+) -> List[Dict[str, Any]]:
+    """
+    Decode a JSON array or NDJSON batch (optionally gzipped) into rows
+    ready for a bulk insert into `analytics_interactions`.
+
+    Validation mirrors `InteractionCreate` but runs as a single pass over
+    plain dicts instead of building a Pydantic model per event. The whole
+    batch is rejected if any event is invalid.
+    """
+    try:
+        events = _decode(decompress(body, max_bytes))
+    except UnicodeDecodeError:
+        raise BatchPayloadError("Payload is not valid UTF-8")
+
+    if len(events) > max_events:
+        raise BatchPayloadError(f"Batch exceeds {max_events} events")
+
+    rows = []
+    errors = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            errors.append({"index": index, "msg": "Interaction must be an object"})
+            continue
+        interaction_type = event.get("interaction_type")
+        target_id = event.get("target_id")
+        metadata = event.get("metadata")
+        error = interaction_error(interaction_type, target_id, metadata)
+        if error:
+            errors.append({"index": index, "msg": error})
+        else:
+            rows.append({
+                "interaction_type": interaction_type,
+                "target_id": target_id,
+                "metadata_json": metadata,
+            })
+
+    if errors:
+        raise BatchPayloadError(f"{len(errors)} invalid interactions in batch", errors[:20])
+    return rows
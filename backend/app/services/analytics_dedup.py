@@ -0,0 +1,106 @@
+# app/services/analytics_dedup.py
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.visitors import VisitorService
+
+
+class InteractionDeduplicator:
+    """
+    Drops repeats of the same (interaction_type, target_id, client) seen
+    within `window_seconds`.
+
+    Keys live in two rotating generations of {key_hash: last_seen}; a
+    generation is retired after one window, so memory holds at most two
+    windows of distinct keys. If a burst fills the current generation past
+    `max_keys`, it rotates early rather than growing without bound.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = settings.ANALYTICS_DEDUP_WINDOW_SECONDS,
+        max_keys: int = settings.ANALYTICS_DEDUP_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        self._current: Dict[int, float] = {}
+        self._previous: Dict[int, float] = {}
+        self._rotated_at = clock()
+        self.stats = {"checked": 0, "suppressed": 0, "rotations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    @staticmethod
+    def _key(interaction_type: str, target_id: str, client: str) -> int:
+        digest = hashlib.blake2b(
+            f"{interaction_type}\x00{target_id}\x00{client}".encode("utf-8"), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big")
+
+    def _rotate_if_needed(self, now: float) -> None:
+        if now - self._rotated_at >= self.window_seconds or len(self._current) >= self.max_keys:
+            self._previous = self._current
+            self._current = {}
+            self._rotated_at = now
+            self.stats["rotations"] += 1
+
+    def is_duplicate(self, interaction_type: str, target_id: str, client: str) -> bool:
+        """Record the event and report whether it repeats one inside the window"""
+        if not self.enabled:
+            return False
+        now = self.clock()
+        self._rotate_if_needed(now)
+        self.stats["checked"] += 1
+
+        key = self._key(interaction_type, target_id, client)
+        last_seen = self._current.get(key)
+        if last_seen is None:
+            last_seen = self._previous.get(key)
+        # Sliding window: each repeat extends it, so a burst is collapsed to one event
+        self._current[key] = now
+        if last_seen is not None and now - last_seen < self.window_seconds:
+            self.stats["suppressed"] += 1
+            return True
+        return False
+
+    def forget(self, interaction_type: str, target_id: str, client: str) -> None:
+        """
+        Undo `is_duplicate` for an event that was then not accepted (queue
+        full, write failed), so the client's retry is not suppressed.
+        """
+        key = self._key(interaction_type, target_id, client)
+        self._current.pop(key, None)
+        self._previous.pop(key, None)
+
+    def forget_rows(self, rows: List[Dict[str, Any]], fallback_client: str) -> None:
+        for row in rows:
+            self.forget(
+                row["interaction_type"],
+                row["target_id"],
+                client_key(row.get("metadata_json"), fallback_client)
+            )
+
+    def filter_rows(self, rows: List[Dict[str, Any]], fallback_client: str) -> List[Dict[str, Any]]:
+        """Keep only rows that are not duplicates of a recent event"""
+        return [
+            row for row in rows
+            if not self.is_duplicate(
+                row["interaction_type"],
+                row["target_id"],
+                client_key(row.get("metadata_json"), fallback_client)
+            )
+        ]
+
+
+def client_key(metadata: Optional[Dict[str, Any]], fallback: str) -> str:
+    """Prefer the visitor fingerprint; otherwise the request's address and user agent"""
+    return VisitorService.fingerprint(metadata) or fallback
+
+
+deduplicator = InteractionDeduplicator()
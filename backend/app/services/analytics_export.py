@@ -0,0 +1,99 @@
+# app/services/analytics_export.py
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from app.db.session import SessionLocal
+from app.models.interaction import AnalyticsInteraction
+from app.services.metadata_dictionary import metadata_dictionary
+from app.utils.cursor import format_cursor
+
+EXPORT_COLUMNS = ["id", "event_id", "timestamp", "interaction_type", "target_id", "metadata"]
+
+
+def iter_interactions(
+    start: datetime,
+    end: datetime,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw interactions in (timestamp, id) order through a server-side cursor.
+
+    Owns its session because it outlives the request's dependencies when
+    used from a StreamingResponse. Rows are fetched `batch_size` at a time,
+    so memory stays flat no matter how many rows match.
+    """
+    stmt = select(
+        AnalyticsInteraction.id,
+        AnalyticsInteraction.event_id,
+        AnalyticsInteraction.timestamp,
+        AnalyticsInteraction.interaction_type,
+        AnalyticsInteraction.target_id,
+        AnalyticsInteraction.metadata_json,
+        AnalyticsInteraction.metadata_refs,
+    ).where(
+        # Range on the partition key lets Postgres prune monthly partitions
+        AnalyticsInteraction.timestamp >= start,
+        AnalyticsInteraction.timestamp < end,
+    ).order_by(AnalyticsInteraction.timestamp, AnalyticsInteraction.id)
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(AnalyticsInteraction.timestamp, AnalyticsInteraction.id) > tuple_(*after)
+        )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for row in result:
+            data = dict(row._mapping)
+            data["metadata_json"] = metadata_dictionary.decode(
+                db, data.pop("metadata_refs"), data["metadata_json"]
+            )
+            yield data
+    finally:
+        db.close()
+
+
+def to_ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({
+            "id": row["id"],
+            "event_id": row["event_id"],
+            "timestamp": row["timestamp"].isoformat(),
+            "interaction_type": row["interaction_type"],
+            "target_id": row["target_id"],
+            "metadata": row["metadata_json"],
+            "cursor": format_cursor(row),
+        }, separators=(",", ":")) + "\n"
+
+
+def to_csv(rows: Iterator[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[str]:
+    """CSV with metadata as a JSON column; emits output in chunks of `chunk_rows`"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow([
+            row["id"],
+            row["event_id"] or "",
+            row["timestamp"].isoformat(),
+            row["interaction_type"],
+            row["target_id"],
+            json.dumps(row["metadata_json"]) if row["metadata_json"] is not None else "",
+        ])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
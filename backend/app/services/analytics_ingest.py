@@ -0,0 +1,206 @@
+# app/services/analytics_ingest.py
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.analytics import AnalyticsService
+from app.services.analytics_spool import AnalyticsSpool, is_connection_error, spool as default_spool
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    """Raised when the ingest queue stays full for longer than the enqueue timeout"""
+
+
+def prepare_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stamp rows with a timestamp and event_id before their first write attempt"""
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        row.setdefault("timestamp", now)
+        row.setdefault("event_id", str(uuid.uuid4()))
+    return rows
+
+
+def write_rows(rows: List[Dict[str, Any]]) -> int:
+    """Default writer: one session, one multi-row INSERT, one commit"""
+    db = SessionLocal()
+    try:
+        return AnalyticsService.bulk_insert_interactions(db, rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class AnalyticsIngestQueue:
+    """
+    In-process bounded buffer in front of `analytics_interactions`.
+
+    Events are flushed as a single multi-row INSERT whenever `batch_size`
+    rows are waiting or `flush_interval` seconds have passed, whichever
+    comes first. Database writes run in a worker thread so the event loop
+    is never blocked by the sync SQLAlchemy session.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.ANALYTICS_QUEUE_MAXSIZE,
+        batch_size: int = settings.ANALYTICS_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.ANALYTICS_FLUSH_INTERVAL_SECONDS,
+        enqueue_timeout: float = settings.ANALYTICS_ENQUEUE_TIMEOUT_SECONDS,
+        writer: Callable[[List[Dict[str, Any]]], int] = write_rows,
+        spool: Optional[AnalyticsSpool] = default_spool,
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.writer = writer
+        self.spool = spool
+        self._queue: Optional[asyncio.Queue] = None
+        self._room = asyncio.Event()  # Set whenever the flusher takes events off the queue
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = {"enqueued": 0, "flushed": 0, "rejected": 0, "failed": 0, "spooled": 0, "batches": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._room = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="analytics-ingest-flusher")
+        logger.info(
+            f"Analytics ingest queue started (maxsize={self.maxsize}, "
+            f"batch_size={self.batch_size}, interval={self.flush_interval}s)"
+        )
+
+    async def stop(self) -> None:
+        """Stop accepting events and wait until every queued event is flushed"""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+        logger.info(f"Analytics ingest queue drained: {self.stats}")
+
+    async def enqueue(
+        self,
+        interaction_type: str,
+        target_id: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue one event, waiting briefly for room before applying backpressure"""
+        await self.enqueue_many([{
+            "interaction_type": interaction_type,
+            "target_id": target_id,
+            "metadata_json": metadata,
+        }])
+
+    async def enqueue_many(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Queue all of `rows` or none of them. A partly queued batch would be
+        stored and then stored again when the client retries the 503.
+        """
+        if not self.running:
+            raise RuntimeError("Analytics ingest queue is not running")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.enqueue_timeout
+        while self.maxsize > 0 and self.maxsize - self._queue.qsize() < len(rows):
+            remaining = deadline - loop.time()
+            if remaining <= 0 or len(rows) > self.maxsize:
+                self.stats["rejected"] += len(rows)
+                raise IngestQueueFull(f"Analytics queue full ({self.maxsize} events)")
+            self._room.clear()
+            try:
+                await asyncio.wait_for(self._room.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        # No await from the room check on, so nothing else can take the space
+        for row in prepare_rows(rows):
+            self._queue.put_nowait(row)
+        self.stats["enqueued"] += len(rows)
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if batch:
+            self._room.set()
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        if self.spool is not None and not self.spool.db_available:
+            # Database known to be down: don't wait on the pool, spool directly
+            await self._spool(batch)
+            return
+        try:
+            await asyncio.to_thread(self.writer, batch)
+            self.stats["flushed"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} analytics events: {e}")
+            if self.spool is None:
+                self.stats["failed"] += len(batch)
+                return
+            if is_connection_error(e):
+                self.spool.db_available = False
+            self.spool.last_error = str(e)
+            # Rows the database rejected are isolated and quarantined by the replay
+            await self._spool(batch)
+
+    async def _spool(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await asyncio.to_thread(self.spool.append, batch)
+            self.stats["spooled"] += len(batch)
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            logger.error(f"Failed to spool {len(batch)} analytics events: {e}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                if self._closing:
+                    return
+                try:
+                    batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+                except asyncio.TimeoutError:
+                    continue
+                self._room.set()
+            # Keep gathering until the size or time trigger fires
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+                self._room.set()
+                batch.extend(self._take(self.batch_size - len(batch)))
+            await self._flush(batch)
+
+
+ingest_queue = AnalyticsIngestQueue()
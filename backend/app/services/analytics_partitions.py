@@ -0,0 +1,140 @@
+# app/services/analytics_partitions.py
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "analytics_interactions"
+# Arbitrary constant so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_ID = 7_310_042
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def _month_start(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    month = dt.month - 1 + months
+    return dt.replace(year=dt.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def list_partitions(db: Session) -> List[Dict]:
+    """Attached partitions with their upper bound, oldest first"""
+    rows = db.execute(text("""
+        SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": PARENT_TABLE}).all()
+
+    partitions = []
+    for row in rows:
+        match = _UPPER_BOUND.search(row.bound or "")
+        upper = datetime.fromisoformat(match.group(1)) if match else None
+        if upper is not None and upper.tzinfo is None:
+            upper = upper.replace(tzinfo=timezone.utc)
+        partitions.append({"name": row.name, "upper_bound": upper})
+    return sorted(partitions, key=lambda p: p["upper_bound"] or datetime.max.replace(tzinfo=timezone.utc))
+
+
+def ensure_partitions(
+    db: Session,
+    months_ahead: int = settings.ANALYTICS_PARTITION_MONTHS_AHEAD,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Create monthly partitions from the current month up to `months_ahead` months out"""
+    existing = list_partitions(db)
+    covered_until = max((p["upper_bound"] for p in existing if p["upper_bound"]), default=None)
+    current = _month_start(now or datetime.now(timezone.utc))
+
+    created = []
+    for i in range(months_ahead + 1):
+        start = _add_months(current, i)
+        end = _add_months(current, i + 1)
+        if covered_until is not None and end <= covered_until:
+            continue
+        name = partition_name(start)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def apply_retention(
+    db: Session,
+    retention_months: int = settings.ANALYTICS_RETENTION_MONTHS,
+    mode: str = settings.ANALYTICS_RETENTION_MODE,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Detach (or drop) partitions whose rows are all older than the retention window.
+    Rollup tables keep the aggregated history, so dashboard totals are unaffected.
+    """
+    if retention_months <= 0:
+        return []
+    if mode not in ("detach", "drop"):
+        raise ValueError(f"Unknown retention mode: {mode}")
+
+    cutoff = _add_months(_month_start(now or datetime.now(timezone.utc)), -retention_months)
+    removed = []
+    for partition in list_partitions(db):
+        upper = partition["upper_bound"]
+        if upper is None or upper > cutoff:
+            continue
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition['name']}"))
+        if mode == "drop":
+            db.execute(text(f"DROP TABLE {partition['name']}"))
+        removed.append(partition["name"])
+    return removed
+
+
+def run_maintenance(db: Optional[Session] = None) -> Dict[str, List[str]]:
+    """Create upcoming partitions and enforce retention, guarded by an advisory lock"""
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        ).scalar()
+        if not locked:
+            db.rollback()
+            return {"created": [], "removed": []}
+        result = {"created": ensure_partitions(db), "removed": apply_retention(db)}
+        db.commit()
+        if result["created"] or result["removed"]:
+            logger.info(f"Analytics partition maintenance: {result}")
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+async def partition_maintenance_loop(
+    interval_seconds: float = settings.ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+) -> None:
+    """Background task started from the app lifespan"""
+    while True:
+        try:
+            await asyncio.to_thread(run_maintenance)
+        except Exception as e:
+            logger.error(f"Analytics partition maintenance failed: {e}")
+        await asyncio.sleep(interval_seconds)
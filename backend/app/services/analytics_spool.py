@@ -0,0 +1,334 @@
+# app/services/analytics_spool.py
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import (
+    DataError,
+    DBAPIError,
+    DisconnectionError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    TimeoutError as PoolTimeoutError,
+)
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+OPENING_SUFFIX = ".opening"
+ACTIVE_SUFFIX = ".active"
+SEALED_SUFFIX = ".sealed"
+CLAIMED_MARKER = ".claimed."
+QUARANTINE_DIR = "quarantine"
+
+# Errors that single out rows of a batch (e.g. a NUL byte psycopg2 refuses to send)
+ROW_ERRORS = (ValueError, DataError, IntegrityError)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """True when the database is unreachable, as opposed to rejecting a row or query"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(
+        error, (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError, ConnectionError)
+    )
+
+
+def _try_lock(handle) -> bool:
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _encode(row: Dict[str, Any]) -> str:
+    row = dict(row)
+    if isinstance(row.get("timestamp"), datetime):
+        row["timestamp"] = row["timestamp"].isoformat()
+    return json.dumps(row, separators=(",", ":"))
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    row = json.loads(line)
+    if row.get("timestamp"):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+def _db_ping() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+class AnalyticsSpool:
+    """
+    Local append-only fallback for analytics events while Postgres is unavailable.
+
+    Events are appended as NDJSON to a per-process `.active` segment and
+    fsync'd once per appended batch. Full segments are sealed by renaming
+    them; the replay loop claims sealed segments by rename (so several
+    workers can share one directory) and bulk inserts them. Every row
+    carries an `event_id`, so a segment replayed twice after a crash does
+    not duplicate data.
+
+    Active and claimed segments are held under an flock, which the kernel
+    drops when the owner dies, so orphans are told apart from live
+    segments without trusting PIDs (which repeat across container
+    restarts). Rows the database rejects are moved to `quarantine/`, as is
+    a segment that keeps failing for `max_attempts` passes, so one bad
+    event cannot block newer segments; move a file back to retry it.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.ANALYTICS_SPOOL_DIR,
+        segment_max_bytes: int = settings.ANALYTICS_SPOOL_SEGMENT_MAX_BYTES,
+        replay_batch_size: int = settings.ANALYTICS_SPOOL_REPLAY_BATCH_SIZE,
+        max_attempts: int = settings.ANALYTICS_SPOOL_MAX_ATTEMPTS,
+    ):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.replay_batch_size = replay_batch_size
+        self.max_attempts = max_attempts
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[Path] = None
+        self._seq = 0
+        # Circuit breaker: while the database is down, skip it and spool directly
+        self.db_available = True
+        self.stats = {"spooled": 0, "replayed": 0, "duplicates": 0, "corrupt_lines": 0, "quarantined": 0}
+        self.last_error: Optional[str] = None
+        self.last_replay_at: Optional[datetime] = None
+
+    # --- writing ---
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        payload = "".join(_encode(row) + "\n" for row in rows).encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.stats["spooled"] += len(rows)
+            if self._file.tell() >= self.segment_max_bytes:
+                self._seal_current()
+
+    def _open_segment(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        self._path = self.directory / f"{os.getpid()}-{int(time.time() * 1000)}-{self._seq:06d}{ACTIVE_SUFFIX}"
+        # Locked before it gets a name recover_orphans looks at
+        opening = self._path.with_suffix(OPENING_SUFFIX)
+        self._file = open(opening, "ab")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        opening.rename(self._path)
+
+    def _seal_current(self) -> None:
+        if self._file is None:
+            return
+        # Renamed while still locked, so it is never seen as an unlocked .active orphan
+        self._path.rename(self._path.with_suffix(SEALED_SUFFIX))
+        self._file.close()
+        self._file = None
+        self._path = None
+
+    def seal(self) -> None:
+        with self._lock:
+            self._seal_current()
+
+    # --- replay ---
+
+    def recover_orphans(self) -> None:
+        """Re-queue segments whose writer or replayer died (their flock is gone)"""
+        if not self.directory.exists():
+            return
+        for path in self.directory.iterdir():
+            name = path.name
+            if name.endswith(OPENING_SUFFIX):
+                # Never written to; left behind only by a crash inside _open_segment
+                try:
+                    if time.time() - path.stat().st_mtime > 60:
+                        path.unlink()
+                except FileNotFoundError:
+                    pass
+                continue
+            if name.endswith(ACTIVE_SUFFIX):
+                target = path.with_suffix(SEALED_SUFFIX)
+            elif CLAIMED_MARKER in name:
+                target = self.directory / name.split(CLAIMED_MARKER, 1)[0]
+            else:
+                continue
+            try:
+                with open(path, "rb") as handle:
+                    if _try_lock(handle):
+                        path.rename(target)
+            except FileNotFoundError:
+                continue  # Sealed, finished or recovered by another process meanwhile
+
+    def _claim(self, path: Path) -> Optional[Tuple[Any, Path]]:
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        claimed = path.with_name(f"{path.name}{CLAIMED_MARKER}{os.getpid()}")
+        try:
+            if _try_lock(handle):
+                path.rename(claimed)
+                return handle, claimed
+        except FileNotFoundError:
+            pass  # Another worker claimed and finished it first
+        handle.close()
+        return None
+
+    def replay(self, writer: Callable[[List[Dict[str, Any]]], int]) -> int:
+        """
+        Replay every sealed segment through `writer`; returns rows inserted.
+        Connection errors stop the pass and propagate; any other failure
+        only defers (and eventually quarantines) the segment at hand.
+        """
+        self.seal()
+        self.recover_orphans()
+        inserted = 0
+        for path in sorted(self.directory.glob(f"*{SEALED_SUFFIX}")):
+            claim = self._claim(path)
+            if claim is None:
+                continue
+            handle, claimed = claim
+            try:
+                inserted += self._replay_segment(handle, path, writer)
+                claimed.unlink()  # Before the lock is released, so it can't look orphaned
+                self._attempts.pop(path.name, None)
+            except Exception as e:
+                if is_connection_error(e):
+                    claimed.rename(path)  # Give it back for the next attempt
+                    raise
+                self._segment_failed(path, claimed, e)
+            finally:
+                handle.close()
+        self.last_replay_at = datetime.now(timezone.utc)
+        return inserted
+
+    def _replay_segment(self, handle, path: Path, writer: Callable[[List[Dict[str, Any]]], int]) -> int:
+        inserted = 0
+        rows = []
+        for line in handle:
+            try:
+                rows.append(_decode(line.decode("utf-8")))
+            except (ValueError, json.JSONDecodeError):
+                # Torn final line from a crash mid-append
+                self.stats["corrupt_lines"] += 1
+            if len(rows) >= self.replay_batch_size:
+                inserted += self._write(writer, rows, path)
+                rows = []
+        return inserted + self._write(writer, rows, path)
+
+    def _write(self, writer: Callable[[List[Dict[str, Any]]], int], rows: List[Dict[str, Any]], path: Path) -> int:
+        if not rows:
+            return 0
+        try:
+            written = writer(rows)
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                self._quarantine_rows(path, rows, e)
+                return 0
+            # Bisect to isolate the rejected rows; committed halves replay as duplicates at worst
+            middle = len(rows) // 2
+            return self._write(writer, rows[:middle], path) + self._write(writer, rows[middle:], path)
+        self.stats["replayed"] += written
+        self.stats["duplicates"] += len(rows) - written
+        return written
+
+    def _quarantine_rows(self, path: Path, rows: List[Dict[str, Any]], error: Exception) -> None:
+        quarantine = self.directory / QUARANTINE_DIR
+        quarantine.mkdir(exist_ok=True)
+        with open(quarantine / f"{path.stem}-rows{SEALED_SUFFIX}", "a", encoding="utf-8") as f:
+            f.write("".join(_encode(row) + "\n" for row in rows))
+        self.stats["quarantined"] += len(rows)
+        logger.error(f"Quarantined {len(rows)} analytics event(s) from {path.name}: {error}")
+
+    def _segment_failed(self, path: Path, claimed: Path, error: Exception) -> None:
+        attempts = self._attempts.get(path.name, 0) + 1
+        self.last_error = str(error)
+        if attempts < self.max_attempts:
+            self._attempts[path.name] = attempts
+            claimed.rename(path)
+            logger.warning(f"Analytics spool segment {path.name} failed (attempt {attempts}): {error}")
+            return
+        self._attempts.pop(path.name, None)
+        quarantine = self.directory / QUARANTINE_DIR
+        quarantine.mkdir(exist_ok=True)
+        with open(claimed, "rb") as f:
+            self.stats["quarantined"] += sum(1 for _ in f)
+        claimed.rename(quarantine / path.name)
+        logger.error(f"Quarantined analytics spool segment {path.name} after {attempts} attempts: {error}")
+
+    # --- observability ---
+
+    def status(self) -> Dict[str, Any]:
+        segments = []
+        quarantined = []
+        if self.directory.exists():
+            segments = [p for p in self.directory.iterdir() if p.is_file()]
+            quarantine = self.directory / QUARANTINE_DIR
+            if quarantine.exists():
+                quarantined = list(quarantine.iterdir())
+        pending_bytes = sum(p.stat().st_size for p in segments)
+        oldest = min((p.stat().st_mtime for p in segments), default=None)
+        return {
+            "db_available": self.db_available,
+            "segments": len(segments),
+            "pending_bytes": pending_bytes,
+            # Segment mtime is the last append, so this is a lower bound on the oldest event's age
+            "replay_lag_seconds": round(time.time() - oldest, 1) if oldest else 0.0,
+            "last_replay_at": self.last_replay_at.isoformat() if self.last_replay_at else None,
+            "last_error": self.last_error,
+            "quarantine_files": len(quarantined),
+            **self.stats,
+        }
+
+
+async def spool_replay_loop(
+    spool: AnalyticsSpool,
+    writer: Callable[[List[Dict[str, Any]]], int],
+    interval_seconds: float = settings.ANALYTICS_SPOOL_REPLAY_INTERVAL_SECONDS,
+) -> None:
+    """Probe the database and drain the spool once it answers again"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            if not spool.db_available:
+                await asyncio.to_thread(_db_ping)
+                spool.db_available = True
+                logger.info("Database reachable again - replaying analytics spool")
+            replayed = await asyncio.to_thread(spool.replay, writer)
+            if replayed:
+                logger.info(f"Replayed {replayed} spooled analytics events")
+            spool.last_error = None
+        except Exception as e:
+            # Only an unreachable database opens the breaker; anything else is the spool's problem
+            if is_connection_error(e):
+                spool.db_available = False
+            spool.last_error = str(e)
+            logger.warning(f"Analytics spool replay deferred: {e}")
+
+
+spool = AnalyticsSpool()
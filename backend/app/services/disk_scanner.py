@@ -0,0 +1,310 @@
+# app/services/disk_scanner.py
+import fcntl
+import json
+import logging
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.docker_client import DockerError, docker_client
+
+logger = logging.getLogger(__name__)
+
+
+def _split_paths(value: str) -> List[str]:
+    return [os.path.expanduser(p.strip()) for p in value.split(",") if p.strip()]
+
+
+@dataclass
+class _DirEntry:
+    mtime_ns: int
+    file_sizes: Dict[str, int] = field(default_factory=dict)
+    subdirs: List[str] = field(default_factory=list)
+
+
+class DiskScanner:
+    """
+    Background disk-usage scanner for the dashboard's cleanup figures.
+
+    Each directory's listing (file sizes and subdirectory names) is cached
+    against its mtime. A rescan still stats every directory, which is how
+    changes deep in a subtree are found, but only re-reads directories
+    whose mtime moved. Files that grow in place do not touch their
+    directory's mtime, so categories listed in `restat_categories` (logs)
+    re-stat their known files instead of trusting the cached sizes.
+    Top-level subtrees are scanned in parallel on a thread pool.
+
+    Only one process scans (an flock in `state_dir`); it publishes each
+    result to a file there, which the other workers serve from.
+    """
+
+    def __init__(
+        self,
+        targets: Optional[Dict[str, List[str]]] = None,
+        interval_seconds: float = settings.DISK_SCAN_INTERVAL_SECONDS,
+        workers: int = settings.DISK_SCAN_WORKERS,
+        restat_categories: Tuple[str, ...] = ("logs",),
+        include_docker: bool = True,
+        state_dir: str = settings.DISK_SCAN_STATE_DIR,
+    ):
+        self.targets = targets if targets is not None else {
+            "logs": _split_paths(settings.DISK_SCAN_LOG_PATHS),
+            "package_cache": _split_paths(settings.DISK_SCAN_PACKAGE_CACHE_PATHS),
+            "docker_data": _split_paths(settings.DISK_SCAN_DOCKER_PATHS),
+        }
+        self.interval_seconds = interval_seconds
+        self.workers = workers
+        self.restat_categories = restat_categories
+        self.include_docker = include_docker
+        self._cache: Dict[str, _DirEntry] = {}
+        self._cache_lock = threading.Lock()
+        self._result: Dict[str, Any] = {}
+        self.state_dir = state_dir
+        self._lock_file = None
+        self._shared_mtime_ns: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- walking ---
+
+    @staticmethod
+    def _usage(st: os.stat_result) -> int:
+        # Allocated blocks, like du: sparse files and small files are counted as stored
+        return getattr(st, "st_blocks", 0) * 512 or st.st_size
+
+    def _read_dir(self, path: str, mtime_ns: int, counters: Dict[str, int]) -> _DirEntry:
+        entry = _DirEntry(mtime_ns)
+        with os.scandir(path) as it:
+            for item in it:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        entry.subdirs.append(item.name)
+                    elif item.is_file(follow_symlinks=False):
+                        entry.file_sizes[item.name] = self._usage(item.stat(follow_symlinks=False))
+                except OSError:
+                    counters["errors"] += 1
+        counters["dirs_read"] += 1
+        return entry
+
+    def _restat(self, path: str, entry: _DirEntry, counters: Dict[str, int]) -> _DirEntry:
+        sizes = {}
+        for name in entry.file_sizes:
+            try:
+                sizes[name] = self._usage(os.stat(os.path.join(path, name), follow_symlinks=False))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                counters["errors"] += 1
+        return _DirEntry(entry.mtime_ns, sizes, entry.subdirs)
+
+    def _forget(self, path: str) -> None:
+        """Drop a directory and everything cached beneath it"""
+        with self._cache_lock:
+            stack = [path]
+            while stack:
+                current = stack.pop()
+                entry = self._cache.pop(current, None)
+                if entry is not None:
+                    stack.extend(os.path.join(current, name) for name in entry.subdirs)
+
+    def _forget_removed(self, path: str, previous: Optional[_DirEntry], entry: _DirEntry) -> None:
+        """A re-read listing lost some subdirectories: their subtrees would never be visited again"""
+        if previous is not None:
+            for name in set(previous.subdirs) - set(entry.subdirs):
+                self._forget(os.path.join(path, name))
+
+    def _scan_tree(self, root: str, restat: bool) -> Dict[str, int]:
+        """Iterative walk of one subtree; returns its size and work counters"""
+        counters = {"bytes": 0, "dirs": 0, "dirs_read": 0, "dirs_reused": 0, "errors": 0}
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                st = os.stat(path, follow_symlinks=False)
+            except FileNotFoundError:
+                self._forget(path)
+                continue
+            except OSError:
+                counters["errors"] += 1
+                continue
+            counters["dirs"] += 1
+
+            with self._cache_lock:
+                cached = self._cache.get(path)
+            try:
+                if cached is not None and cached.mtime_ns == st.st_mtime_ns:
+                    entry = self._restat(path, cached, counters) if restat else cached
+                    counters["dirs_reused"] += 1
+                else:
+                    entry = self._read_dir(path, st.st_mtime_ns, counters)
+                    self._forget_removed(path, cached, entry)
+            except OSError:
+                counters["errors"] += 1
+                continue
+            with self._cache_lock:
+                self._cache[path] = entry
+
+            counters["bytes"] += sum(entry.file_sizes.values())
+            stack.extend(os.path.join(path, name) for name in entry.subdirs)
+        return counters
+
+    def _scan_target(self, pool: ThreadPoolExecutor, target: str, restat: bool) -> List:
+        """Fan a target out into per-subtree jobs; plain files are stat'ed directly"""
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            self._forget(target)
+            return []
+        except OSError:
+            return []
+        if not stat.S_ISDIR(st.st_mode):
+            return [{"bytes": self._usage(st), "dirs": 0, "dirs_read": 0, "dirs_reused": 0, "errors": 0}]
+        try:
+            with os.scandir(target) as it:
+                children = [item.path for item in it if item.is_dir(follow_symlinks=False)]
+        except OSError:
+            children = []
+        # The root's own files, without descending (its children are separate jobs)
+        top = {"bytes": 0, "dirs": 1, "dirs_read": 1, "dirs_reused": 0, "errors": 0}
+        try:
+            entry = self._read_dir(target, st.st_mtime_ns, {"dirs_read": 0, "errors": 0})
+            top["bytes"] = sum(entry.file_sizes.values())
+            with self._cache_lock:
+                previous = self._cache.get(target)
+                self._cache[target] = entry
+            self._forget_removed(target, previous, entry)
+        except OSError:
+            top["errors"] += 1
+        return [top] + [pool.submit(self._scan_tree, child, restat) for child in children]
+
+    def scan(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        categories: Dict[str, Dict[str, Any]] = {}
+        totals = {"dirs": 0, "dirs_read": 0, "dirs_reused": 0, "errors": 0}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="disk-scan") as pool:
+            jobs = {
+                (category, target): self._scan_target(pool, target, category in self.restat_categories)
+                for category, targets in self.targets.items()
+                for target in targets
+            }
+            for (category, target), parts in jobs.items():
+                results = [p.result() if hasattr(p, "result") else p for p in parts]
+                size = sum(r["bytes"] for r in results)
+                for key in totals:
+                    totals[key] += sum(r[key] for r in results)
+                bucket = categories.setdefault(category, {"bytes": 0, "paths": {}})
+                bucket["bytes"] += size
+                if results:
+                    bucket["paths"][target] = size
+
+        docker = self._docker_usage() if self.include_docker else None
+        self._result = {
+            "categories": categories,
+            "docker": docker,
+            "scanned_at": time.time(),
+            "scan_seconds": round(time.monotonic() - started, 3),
+            **totals,
+        }
+        if self._lock_file is not None:
+            self._publish(self._result)
+        return self._result
+
+    # --- sharing between workers ---
+
+    def _result_path(self) -> str:
+        return os.path.join(self.state_dir, "latest.json")
+
+    def _is_scanner(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        os.makedirs(self.state_dir, exist_ok=True)
+        lock_file = open(os.path.join(self.state_dir, ".scanner.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _publish(self, result: Dict[str, Any]) -> None:
+        path = self._result_path()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Could not publish disk scan result: {e}")
+
+    def _load_shared(self) -> None:
+        """Pick up the scanning worker's latest result when the file changed"""
+        try:
+            mtime_ns = os.stat(self._result_path()).st_mtime_ns
+            if mtime_ns == self._shared_mtime_ns:
+                return
+            with open(self._result_path()) as f:
+                self._result = json.load(f)
+            self._shared_mtime_ns = mtime_ns
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _docker_usage() -> Optional[Dict[str, int]]:
+        try:
+            df = docker_client.system_df()
+        except DockerError as e:
+            logger.debug(f"Docker disk usage unavailable: {e}")
+            return None
+        return {
+            "layers_bytes": df.get("LayersSize") or 0,
+            "containers_bytes": sum(c.get("SizeRw") or 0 for c in df.get("Containers") or []),
+            "volumes_bytes": sum((v.get("UsageData") or {}).get("Size", 0) or 0 for v in df.get("Volumes") or []),
+            "build_cache_bytes": sum(b.get("Size") or 0 for b in df.get("BuildCache") or []),
+            "unused_image_bytes": sum(i.get("Size") or 0 for i in df.get("Images") or [] if not i.get("Containers")),
+        }
+
+    # --- lifecycle ---
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Workers that lose the lock keep retrying, so one takes over if the scanner exits
+                if self._is_scanner():
+                    result = self.scan()
+                    logger.debug(f"Disk scan finished in {result['scan_seconds']}s")
+            except Exception as e:
+                logger.error(f"Disk scan failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="disk-scanner", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def latest(self) -> Dict[str, Any]:
+        """Most recent scan result, from whichever worker scans (empty until the first scan completes)"""
+        if self._lock_file is None:
+            self._load_shared()
+        return self._result
+
+    def category_bytes(self, category: str) -> int:
+        return self.latest().get("categories", {}).get(category, {}).get("bytes", 0)
+
+
+disk_scanner = DiskScanner()
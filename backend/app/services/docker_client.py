@@ -0,0 +1,238 @@
+# app/services/docker_client.py
+import http.client
+import json
+import logging
+import socket
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = "v1.41"
+# Container events that can change what `docker ps` would show
+STATE_EVENTS = {
+    "create", "start", "restart", "stop", "die", "kill", "pause", "unpause",
+    "rename", "update", "health_status", "oom", "destroy",
+}
+
+
+class DockerError(Exception):
+    pass
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 over a unix domain socket; kept alive between requests"""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def format_ports(ports: List[Dict[str, Any]]) -> str:
+    """Render the Engine API port list the way `docker ps` does"""
+    rendered = []
+    for p in ports or []:
+        private = f"{p.get('PrivatePort')}/{p.get('Type', 'tcp')}"
+        if p.get("PublicPort"):
+            rendered.append(f"{p.get('IP', '0.0.0.0')}:{p['PublicPort']}->{private}")
+        else:
+            rendered.append(private)
+    return ", ".join(dict.fromkeys(rendered))
+
+
+class DockerEngineClient:
+    """
+    Minimal Docker Engine API client over the unix socket.
+
+    Requests share one persistent connection (guarded by a lock); the
+    events stream needs its own, since it never finishes.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = settings.DOCKER_SOCKET_PATH,
+        timeout: float = 5.0,
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._conn: Optional[UnixHTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def _request(self, path: str) -> Any:
+        with self._lock:
+            # One retry covers a keep-alive connection the daemon closed while idle
+            for attempt in (1, 2):
+                if self._conn is None:
+                    self._conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+                try:
+                    self._conn.request("GET", f"/{API_VERSION}{path}")
+                    response = self._conn.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    self._conn.close()
+                    self._conn = None
+                    if attempt == 2 or isinstance(e, (FileNotFoundError, ConnectionRefusedError)):
+                        raise DockerError(f"Docker socket unavailable: {e}") from e
+
+        if response.status >= 400:
+            raise DockerError(f"GET {path} failed with {response.status}: {body[:200]!r}")
+        return json.loads(body) if body else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def list_containers(self, all: bool = False, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        path = f"/containers/json?all={int(all)}"
+        if filters:
+            path += f"&filters={quote(json.dumps(filters))}"
+        return self._request(path)
+
+    def system_df(self) -> Dict:
+        return self._request("/system/df")
+
+    def events(self, filters: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict]:
+        """Follow the events stream; yields decoded events until the connection drops"""
+        path = f"/{API_VERSION}/events"
+        if filters:
+            path += f"?filters={quote(json.dumps(filters))}"
+        conn = UnixHTTPConnection(self.socket_path, timeout=None)  # Idle gaps between events are normal
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise DockerError(f"Events stream failed with {response.status}")
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        except OSError as e:
+            raise DockerError(f"Docker events stream interrupted: {e}") from e
+        finally:
+            conn.close()
+
+
+class DockerStateCache:
+    """
+    In-memory view of running containers kept current by the events stream.
+
+    A watcher thread loads the container list once, then re-fetches only
+    the container named in each state event. A full resync every
+    `resync_seconds` refreshes the human-readable status ("Up 3 hours")
+    and repairs anything missed while the stream was reconnecting.
+    """
+
+    def __init__(
+        self,
+        client: Optional[DockerEngineClient] = None,
+        resync_seconds: float = settings.DOCKER_RESYNC_INTERVAL_SECONDS,
+        retry_seconds: float = 5.0,
+    ):
+        self.client = client or DockerEngineClient()
+        self.resync_seconds = resync_seconds
+        self.retry_seconds = retry_seconds
+        self._containers: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.ready = threading.Event()
+        self.last_error: Optional[str] = None
+        self.stats = {"events": 0, "resyncs": 0, "reconnects": 0}
+
+    @staticmethod
+    def _summarize(container: Dict[str, Any]) -> Dict[str, str]:
+        names = container.get("Names") or [container.get("Id", "")[:12]]
+        return {
+            "name": names[0].lstrip("/"),
+            "status": container.get("Status", ""),
+            "state": container.get("State", ""),
+            "ports": format_ports(container.get("Ports")),
+        }
+
+    def resync(self) -> None:
+        containers = {c["Id"]: self._summarize(c) for c in self.client.list_containers()}
+        with self._lock:
+            self._containers = containers
+        self.stats["resyncs"] += 1
+        self.last_error = None
+        self.ready.set()
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        if event.get("Type") != "container" or event.get("Action", "").split(":")[0] not in STATE_EVENTS:
+            return
+        self.stats["events"] += 1
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        if not container_id:
+            return
+        current = self.client.list_containers(filters={"id": [container_id]})
+        with self._lock:
+            if current:
+                self._containers[container_id] = self._summarize(current[0])
+            else:
+                # Stopped or removed: `docker ps` would no longer list it
+                self._containers.pop(container_id, None)
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.resync()
+                for event in self.client.events(filters={"type": ["container"]}):
+                    if self._stop.is_set():
+                        return
+                    self.apply_event(event)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.debug(f"Docker events watcher reconnecting: {e}")
+            self.stats["reconnects"] += 1
+            self._stop.wait(self.retry_seconds)
+
+    def _resync_loop(self) -> None:
+        while not self._stop.wait(self.resync_seconds):
+            try:
+                self.resync()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for target, name in ((self._watch, "docker-events"), (self._resync_loop, "docker-resync")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        # The events thread may be parked in a blocking read; being a daemon, it dies with the process
+        self._stop.set()
+        self._threads = []
+        self.client.close()
+
+    def status(self) -> Dict[str, Any]:
+        """Same shape as the old `docker ps` based status; a memory read"""
+        if not self.ready.is_set():
+            return {"error": self.last_error or "Docker state not loaded yet"}
+        with self._lock:
+            containers = sorted(self._containers.values(), key=lambda c: c["name"])
+        return {
+            "containers": [{k: c[k] for k in ("name", "status", "ports")} for c in containers],
+            "total_running": len(containers),
+        }
+
+
+docker_client = DockerEngineClient()
+docker_state = DockerStateCache(docker_client)
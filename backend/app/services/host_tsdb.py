@@ -0,0 +1,417 @@
+# app/services/host_tsdb.py
+import asyncio
+import fcntl
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.metrics_ring import HISTORY_FIELDS, SystemMetricsHistory, bucket_plan, bucketize
+from app.utils.gorilla import decode_floats, decode_timestamps, encode_floats, encode_timestamps
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b"HTSD\x01"
+BLOCK_MAGIC = b"BLK1"
+# magic, payload length, crc32 of payload, first ts, last ts, sample count
+BLOCK_HEADER = struct.Struct("<4sIIqqI")
+SEGMENT_SUFFIX = ".tsdb"
+# Later levels supersede earlier ones for the same day: raw < compacted < downsampled
+LEVELS = ("raw", "c", "d60")
+DOWNSAMPLE_SECONDS = 60
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _file_header(fields: Sequence[str]) -> bytes:
+    names = b"".join(bytes([len(f)]) + f.encode() for f in fields)
+    return FILE_MAGIC + bytes([len(fields)]) + names
+
+
+def _encode_block(timestamps: Sequence[int], columns: Sequence[Sequence[float]]) -> bytes:
+    parts = [encode_timestamps(timestamps)] + [encode_floats(col) for col in columns]
+    payload = b"".join(struct.pack("<I", len(p)) + p for p in parts)
+    return BLOCK_HEADER.pack(
+        BLOCK_MAGIC, len(payload), zlib.crc32(payload), timestamps[0], timestamps[-1], len(timestamps)
+    ) + payload
+
+
+class Segment:
+    """
+    One UTC day of samples: a small header naming the fields, followed by
+    self-describing blocks. Each block header carries its time range, so a
+    range query skips blocks without decoding them. A torn block at the
+    tail (crash mid-append) fails its CRC and ends the scan.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        name = path.name[:-len(SEGMENT_SUFFIX)]
+        self.day, _, level = name.partition(".")
+        self.level = level or "raw"
+
+    def blocks(self, start: int, end: int) -> Iterator[Tuple[List[int], Dict[str, List[float]]]]:
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+                    raise ValueError(f"{self.path} is not a host metrics segment")
+                pos = len(FILE_MAGIC) + 1
+                fields = []
+                for _ in range(data[pos - 1]):
+                    length = data[pos]
+                    fields.append(data[pos + 1:pos + 1 + length].decode())
+                    pos += 1 + length
+
+                while pos + BLOCK_HEADER.size <= len(data):
+                    magic, length, crc, first, last, count = BLOCK_HEADER.unpack_from(data, pos)
+                    body_at = pos + BLOCK_HEADER.size
+                    pos = body_at + length
+                    if magic != BLOCK_MAGIC or pos > len(data):
+                        return
+                    if last < start or first > end:
+                        continue  # Outside the query: never decoded
+                    payload = data[body_at:pos]
+                    if zlib.crc32(payload) != crc:
+                        return
+                    yield self._decode(payload, fields, count)
+
+    @staticmethod
+    def _decode(payload: bytes, fields: List[str], count: int) -> Tuple[List[int], Dict[str, List[float]]]:
+        parts = []
+        pos = 0
+        while pos < len(payload):
+            (length,) = struct.unpack_from("<I", payload, pos)
+            parts.append(payload[pos + 4:pos + 4 + length])
+            pos += 4 + length
+        timestamps = decode_timestamps(parts[0], count)
+        columns = {name: decode_floats(part, count) for name, part in zip(fields, parts[1:])}
+        return timestamps, columns
+
+
+class HostMetricsStore:
+    """
+    Embedded, append-only store for host metrics history.
+
+    Samples are buffered in memory and written as one Gorilla-compressed
+    block every `flush_seconds`, into a segment file per UTC day. Closed
+    days are compacted into a single block, downsampled to one-minute
+    averages after `downsample_after_days`, and deleted after
+    `retention_days` by `maintain`, which `host_tsdb_maintenance_loop`
+    runs off the collector thread. Only one process writes (an flock on
+    the directory); every worker can read.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.HOST_METRICS_TSDB_DIR,
+        flush_seconds: float = settings.HOST_METRICS_FLUSH_SECONDS,
+        retention_days: int = settings.HOST_METRICS_RETENTION_DAYS,
+        downsample_after_days: int = settings.HOST_METRICS_DOWNSAMPLE_AFTER_DAYS,
+        fields: Sequence[str] = HISTORY_FIELDS,
+        cached_days: int = settings.HOST_METRICS_CACHED_DAYS,
+    ):
+        self.directory = Path(directory)
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days
+        self.downsample_after_days = downsample_after_days
+        self.fields = tuple(fields)
+        self._timestamps = array("q")
+        self._columns = {name: array("d") for name in self.fields}
+        self._pending_since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._maintaining = threading.Lock()
+        self.cached_days = cached_days
+        self._day_cache: "OrderedDict[str, Tuple[Tuple, array, Dict[str, array]]]" = OrderedDict()
+        self.stats = {"samples": 0, "blocks": 0, "bytes_written": 0, "compactions": 0, "deleted_segments": 0}
+
+    # --- writing ---
+
+    def _is_writer(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.directory / ".writer.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def record(self, snapshot: Dict, timestamp: Optional[float] = None) -> None:
+        """System collector listener"""
+        timestamp = timestamp or time.time()
+        values = SystemMetricsHistory.extract(snapshot)
+        with self._lock:
+            if not self._is_writer():
+                return
+            if self._timestamps and _day(self._timestamps[-1]) != _day(timestamp):
+                self._flush_locked()  # Blocks never straddle a segment (day) boundary
+            self._timestamps.append(int(timestamp))
+            for name in self.fields:
+                self._columns[name].append(values.get(name, math.nan))
+            self.stats["samples"] += 1
+            if self._pending_since is None:
+                self._pending_since = timestamp
+            if timestamp - self._pending_since >= self.flush_seconds:
+                self._flush_locked()
+
+    def _segment_path(self, day: str, level: str = "raw") -> Path:
+        suffix = "" if level == "raw" else f".{level}"
+        return self.directory / f"{day}{suffix}{SEGMENT_SUFFIX}"
+
+    def _flush_locked(self) -> None:
+        if not self._timestamps:
+            return
+        block = _encode_block(self._timestamps, [self._columns[name] for name in self.fields])
+        path = self._segment_path(_day(self._timestamps[0]))
+        with open(path, "ab") as f:
+            if f.tell() == 0:
+                f.write(_file_header(self.fields))
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        self.stats["blocks"] += 1
+        self.stats["bytes_written"] += len(block)
+        self._timestamps = array("q")
+        self._columns = {name: array("d") for name in self.fields}
+        self._pending_since = None
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._lock_file is not None:
+                self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # --- compaction and retention ---
+
+    def segments(self) -> Dict[str, Segment]:
+        """The authoritative segment per day (highest level wins)"""
+        if not self.directory.exists():
+            return {}
+        chosen: Dict[str, Segment] = {}
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            segment = Segment(path)
+            current = chosen.get(segment.day)
+            if current is None or LEVELS.index(segment.level) > LEVELS.index(current.level):
+                chosen[segment.day] = segment
+        return chosen
+
+    def _rewrite(self, segment: Segment, level: str) -> None:
+        """
+        Decode, re-encode and fsync the day into a temporary file without
+        holding `_lock`, so the collector keeps recording meanwhile. Only the
+        rename and the removal of the superseded files happen under the lock.
+        """
+        source_size = segment.path.stat().st_size
+        timestamps: List[int] = []
+        columns: Dict[str, List[float]] = {name: [] for name in self.fields}
+        for ts, cols in segment.blocks(-2**63, 2**63 - 1):
+            timestamps.extend(ts)
+            for name in self.fields:
+                columns[name].extend(cols.get(name, [math.nan] * len(ts)))
+
+        if level == "d60" and timestamps:
+            buckets: Dict[int, List[int]] = {}
+            for i, ts in enumerate(timestamps):
+                buckets.setdefault(ts - ts % DOWNSAMPLE_SECONDS, []).append(i)
+            timestamps = sorted(buckets)
+            averaged = {name: [] for name in self.fields}
+            for bucket in timestamps:
+                for name in self.fields:
+                    values = [columns[name][i] for i in buckets[bucket] if columns[name][i] == columns[name][i]]
+                    averaged[name].append(round(math.fsum(values) / len(values), 2) if values else math.nan)
+            columns = averaged
+
+        target = self._segment_path(segment.day, level)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_file_header(self.fields))
+            if timestamps:
+                f.write(_encode_block(timestamps, [columns[name] for name in self.fields]))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            if not segment.path.exists() or segment.path.stat().st_size != source_size:
+                # A late block landed while rewriting; retry at the next maintenance run
+                tmp.unlink()
+                return
+            tmp.rename(target)
+            for path in self.directory.glob(f"{segment.day}*{SEGMENT_SUFFIX}"):
+                if path != target:
+                    path.unlink()
+            self.stats["compactions"] += 1
+
+    def maintain(self, now: Optional[float] = None) -> None:
+        """Compact closed days, downsample old ones and drop expired ones (writer only)"""
+        now = now or time.time()
+        if not self._maintaining.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                if self._lock_file is None:
+                    return
+                segments = sorted(self.segments().items())
+            today = _day(now)
+            for day, segment in segments:
+                age_days = (datetime.fromtimestamp(now, tz=timezone.utc).date()
+                            - datetime.strptime(day, "%Y%m%d").date()).days
+                try:
+                    if self.retention_days > 0 and age_days > self.retention_days:
+                        with self._lock:
+                            for path in self.directory.glob(f"{day}*{SEGMENT_SUFFIX}"):
+                                path.unlink()
+                            self.stats["deleted_segments"] += 1
+                    elif self.downsample_after_days > 0 and age_days > self.downsample_after_days:
+                        if segment.level != "d60":
+                            self._rewrite(segment, "d60")
+                    elif day != today and segment.level == "raw":
+                        self._rewrite(segment, "c")
+                except Exception as e:
+                    logger.error(f"Host metrics maintenance failed for {day}: {e}")
+        finally:
+            self._maintaining.release()
+
+    # --- reading ---
+
+    def query(self, start: float, end: float) -> Tuple[array, Dict[str, array]]:
+        """All samples in [start, end], oldest first, as columnar arrays"""
+        start_i, end_i = int(start), int(end)
+        timestamps = array("d")
+        columns = {name: array("d") for name in self.fields}
+
+        day = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        last_day = datetime.fromtimestamp(end, tz=timezone.utc).date()
+        segments = self.segments()
+        while day <= last_day:  # Only the segments for days in range are opened
+            segment = segments.get(day.strftime("%Y%m%d"))
+            day += timedelta(days=1)
+            if segment is None:
+                continue
+            try:
+                self._read_day(segment, start_i, end_i, timestamps, columns)
+            except FileNotFoundError:
+                # Replaced by the writer's maintenance between listing and opening
+                segment = self.segments().get(segment.day)
+                if segment is not None:
+                    self._read_day(segment, start_i, end_i, timestamps, columns)
+
+        with self._lock:  # Samples not flushed yet (writer process only)
+            for i, t in enumerate(self._timestamps):
+                if start_i <= t <= end_i:
+                    timestamps.append(t)
+                    for name in self.fields:
+                        columns[name].append(self._columns[name][i])
+        return timestamps, columns
+
+    def _read_day(self, segment: Segment, start: int, end: int, timestamps: array, columns: Dict[str, array]) -> None:
+        if segment.level != "raw":
+            day_timestamps, day_columns = self._closed_day(segment)
+            lo, hi = bisect_left(day_timestamps, start), bisect_right(day_timestamps, end)
+            timestamps.extend(day_timestamps[lo:hi])
+            for name in self.fields:
+                columns[name].extend(day_columns[name][lo:hi])
+            return
+        for ts, cols in segment.blocks(start, end):
+            for i, t in enumerate(ts):
+                if start <= t <= end:
+                    timestamps.append(t)
+                    for name in self.fields:
+                        col = cols.get(name)
+                        columns[name].append(col[i] if col is not None else math.nan)
+
+    def _closed_day(self, segment: Segment) -> Tuple[array, Dict[str, array]]:
+        """
+        Decoded columns of a compacted or downsampled day. Those files are
+        never appended to, so each is decoded once per process and served
+        from memory until maintenance replaces it.
+        """
+        stat = segment.path.stat()
+        key = (segment.path.name, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._day_cache.get(segment.day)
+            if cached is not None and cached[0] == key:
+                self._day_cache.move_to_end(segment.day)
+                return cached[1], cached[2]
+
+        timestamps = array("d")
+        columns = {name: array("d") for name in self.fields}
+        for ts, cols in segment.blocks(-2**63, 2**63 - 1):
+            timestamps.extend(ts)
+            for name in self.fields:
+                columns[name].extend(cols.get(name, [math.nan] * len(ts)))
+
+        with self._lock:
+            self._day_cache[segment.day] = (key, timestamps, columns)
+            self._day_cache.move_to_end(segment.day)
+            while len(self._day_cache) > self.cached_days:
+                self._day_cache.popitem(last=False)
+        return timestamps, columns
+
+    def history(self, window_seconds: int, points: int = 60, now: Optional[float] = None) -> Dict:
+        """Same response shape as SystemMetricsHistory.query, for windows beyond the in-memory tiers"""
+        now = now or time.time()
+        bucket_seconds, first_bucket = bucket_plan(
+            window_seconds, points, settings.SYSTEM_METRICS_INTERVAL_SECONDS, now
+        )
+        timestamps, columns = self.query(first_bucket, now)
+        bucket_times, series = bucketize(timestamps, columns, first_bucket, now, bucket_seconds)
+        return {
+            "window_seconds": window_seconds,
+            "bucket_seconds": bucket_seconds,
+            "resolution": "disk",
+            "timestamps": bucket_times,
+            "series": series,
+        }
+
+    def status(self) -> Dict:
+        segments = self.segments()
+        return {
+            "writer": self._lock_file is not None,
+            "segments": len(segments),
+            "bytes_on_disk": sum(s.path.stat().st_size for s in segments.values()),
+            "oldest_day": min(segments, default=None),
+            "pending_samples": len(self._timestamps),
+            "cached_days": len(self._day_cache),
+            **self.stats,
+        }
+
+
+host_tsdb = HostMetricsStore()
+
+
+async def host_tsdb_maintenance_loop(
+    store: HostMetricsStore = host_tsdb,
+    interval_seconds: float = settings.HOST_METRICS_MAINTENANCE_INTERVAL_SECONDS,
+) -> None:
+    """Background task started from the app lifespan, off the collector thread"""
+    while True:
+        try:
+            await asyncio.to_thread(store.maintain)
+        except Exception as e:
+            logger.error(f"Host metrics maintenance failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,153 @@
+# app/services/metadata_dictionary.py
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.metadata_value import AnalyticsMetadataValue
+
+# Longer values are rarely repeated, so they stay inline
+MAX_INTERNED_LENGTH = 1024
+# session.info key: {dictionary: [(id, field, value), ...]} resolved inside the open transaction
+_PENDING = "metadata_dictionary_pending"
+
+
+class MetadataDictionary:
+    """
+    Interns repeated metadata values (user agent, referrer, viewport, ...)
+    into `analytics_metadata_values` so interaction rows only carry a small
+    integer array. Both directions are cached in-process; the cache is
+    reset when it reaches `cache_size`, which is cheap because ids are
+    immutable and re-fetched on demand. Ids resolved inside a transaction
+    are only cached once it commits, since a rollback takes new entries
+    with it.
+    """
+
+    def __init__(
+        self,
+        fields: Iterable[str] = settings.ANALYTICS_INTERNED_METADATA_FIELDS.split(","),
+        cache_size: int = settings.ANALYTICS_METADATA_CACHE_SIZE,
+    ):
+        self.fields = frozenset(f.strip() for f in fields if f.strip())
+        self.cache_size = cache_size
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._values: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _remember(self, pairs: Iterable[Tuple[int, str, str]]) -> None:
+        with self._lock:
+            if len(self._ids) >= self.cache_size:
+                self._ids.clear()
+                self._values.clear()
+            for value_id, field, value in pairs:
+                self._ids[(field, value)] = value_id
+                self._values[value_id] = (field, value)
+
+    def split(self, metadata: Optional[Dict[str, Any]]) -> Tuple[List[Tuple[str, str]], Optional[Dict[str, Any]]]:
+        """Separate internable (field, value) pairs from the residual metadata"""
+        if not metadata:
+            return [], metadata
+        pairs = []
+        residual = {}
+        for key, value in metadata.items():
+            if key in self.fields and isinstance(value, str) and len(value) <= MAX_INTERNED_LENGTH:
+                pairs.append((key, value))
+            else:
+                residual[key] = value
+        return pairs, residual or None
+
+    def lookup_ids(self, db: Session, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Resolve (field, value) pairs to ids, creating missing entries"""
+        wanted = set(pairs)
+        found = {}
+        missing = []
+        for pair in wanted:
+            value_id = self._ids.get(pair)
+            if value_id is None:
+                missing.append(pair)
+            else:
+                found[pair] = value_id
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(missing)
+        if not missing:
+            return found
+
+        missing.sort()  # Consistent lock order across concurrent writers
+        db.execute(
+            pg_insert(AnalyticsMetadataValue)
+            .values([{"field": f, "value": v} for f, v in missing])
+            .on_conflict_do_nothing(index_elements=["field", "value"])
+        )
+        rows = db.execute(
+            select(AnalyticsMetadataValue.id, AnalyticsMetadataValue.field, AnalyticsMetadataValue.value)
+            .where(tuple_(AnalyticsMetadataValue.field, AnalyticsMetadataValue.value).in_(missing))
+        ).all()
+        self._remember_after_commit(db, [(r.id, r.field, r.value) for r in rows])
+        found.update({(r.field, r.value): r.id for r in rows})
+        return found
+
+    def _remember_after_commit(self, db: Session, pairs: List[Tuple[int, str, str]]) -> None:
+        db.info.setdefault(_PENDING, {}).setdefault(self, []).extend(pairs)
+
+    def encode_rows(self, db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return copies of `rows` with interned metadata moved to `metadata_refs`.
+        All new dictionary entries for the batch are resolved in one round trip.
+        """
+        splits = [self.split(row.get("metadata_json")) for row in rows]
+        ids = self.lookup_ids(db, (pair for pairs, _ in splits for pair in pairs))
+        encoded = []
+        for row, (pairs, residual) in zip(rows, splits):
+            encoded.append({
+                **row,
+                "metadata_json": residual,
+                "metadata_refs": sorted(ids[pair] for pair in pairs) or None,
+            })
+        return encoded
+
+    def decode(
+        self,
+        db: Session,
+        refs: Optional[List[int]],
+        residual: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Rebuild the original metadata dict from references plus residual JSON"""
+        if not refs:
+            return residual
+        missing = [r for r in refs if r not in self._values]
+        fetched = {}
+        if missing:
+            rows = db.execute(
+                select(AnalyticsMetadataValue.id, AnalyticsMetadataValue.field, AnalyticsMetadataValue.value)
+                .where(AnalyticsMetadataValue.id.in_(missing))
+            ).all()
+            fetched = {r.id: (r.field, r.value) for r in rows}
+            self._remember((r.id, r.field, r.value) for r in rows)
+        self.stats["hits"] += len(refs) - len(missing)
+        self.stats["misses"] += len(missing)
+
+        metadata = dict(residual or {})
+        for ref in refs:
+            pair = self._values.get(ref) or fetched.get(ref)
+            if pair is not None:
+                metadata[pair[0]] = pair[1]
+        return metadata
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(session: Session) -> None:
+    for dictionary, pairs in session.info.pop(_PENDING, {}).items():
+        dictionary._remember(pairs)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session: Session, previous_transaction) -> None:
+    # Also fires for savepoints; dropping everything pending only costs a re-fetch
+    session.info.pop(_PENDING, None)
+
+
+metadata_dictionary = MetadataDictionary()
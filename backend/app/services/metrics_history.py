@@ -0,0 +1,141 @@
+# app/services/metrics_history.py
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_metrics
+from app.db.session import SessionLocal
+from app.models.metrics_snapshot import MetricsSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = {
+    "visitors_month": "visitorsMonth",
+    "active_sessions": "activeSessions",
+    "sessions_today": "sessionsToday",
+    "users_total": "usersTotal",
+    "projects_total": "projectsTotal",
+    "interactions_total": "interactionsTotal",
+}
+
+
+def _align(dt: datetime, seconds: int) -> datetime:
+    epoch = int(dt.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def take_snapshot(
+    db: Session,
+    now: Optional[datetime] = None,
+    interval_seconds: int = settings.METRICS_SNAPSHOT_INTERVAL_SECONDS,
+    retention_days: int = settings.METRICS_SNAPSHOT_RETENTION_DAYS,
+) -> bool:
+    """
+    Store the current dashboard metrics under the interval-aligned timestamp.
+    Returns False when another worker already captured this interval.
+    """
+    now = now or datetime.now(timezone.utc)
+    captured_at = _align(now, interval_seconds)
+    if db.get(MetricsSnapshot, captured_at) is not None:
+        return False
+
+    metrics = crud_metrics.get_dashboard_metrics(db)
+    inserted = db.execute(
+        pg_insert(MetricsSnapshot).values(
+            captured_at=captured_at,
+            visitors_month=metrics["visitors"]["total"],
+            active_sessions=metrics["sessions"]["active"],
+            sessions_today=metrics["sessions"]["totalToday"],
+            users_total=metrics["users"]["total"],
+            projects_total=metrics["projects"]["total"],
+            interactions_total=metrics["visitors"]["totalInteractions"],
+        ).on_conflict_do_nothing(index_elements=["captured_at"])
+    ).rowcount
+
+    if retention_days > 0:
+        db.query(MetricsSnapshot).filter(
+            MetricsSnapshot.captured_at < now - timedelta(days=retention_days)
+        ).delete(synchronize_session=False)
+    db.commit()
+    return bool(inserted)
+
+
+def get_history(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    max_points: int = settings.METRICS_HISTORY_MAX_POINTS,
+    interval_seconds: int = settings.METRICS_SNAPSHOT_INTERVAL_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Snapshots in [start, end), downsampled to at most `max_points` buckets.
+
+    Within a downsampled bucket active sessions are averaged; the other
+    columns are running totals, so the bucket reports their maximum.
+    """
+    span = max((end - start).total_seconds(), 0)
+    buckets_needed = math.ceil(span / interval_seconds / max(max_points, 1))
+    bucket_seconds = interval_seconds * max(buckets_needed, 1)
+    in_range = (MetricsSnapshot.captured_at >= start, MetricsSnapshot.captured_at < end)
+
+    if bucket_seconds == interval_seconds:
+        stmt = select(
+            MetricsSnapshot.captured_at.label("bucket"),
+            *(getattr(MetricsSnapshot, name).label(name) for name in SNAPSHOT_FIELDS)
+        ).where(*in_range).order_by(MetricsSnapshot.captured_at)
+    else:
+        bucket = func.to_timestamp(
+            func.floor(func.extract("epoch", MetricsSnapshot.captured_at) / bucket_seconds) * bucket_seconds
+        )
+        stmt = select(
+            bucket.label("bucket"),
+            *(
+                (func.round(func.avg(column)) if name == "active_sessions" else func.max(column)).label(name)
+                for name, column in ((n, getattr(MetricsSnapshot, n)) for n in SNAPSHOT_FIELDS)
+            )
+        ).where(*in_range).group_by(bucket).order_by(bucket)
+
+    points = []
+    for row in db.execute(stmt):
+        point = {"timestamp": row.bucket}
+        for name, key in SNAPSHOT_FIELDS.items():
+            point[key] = int(getattr(row, name))
+        points.append(point)
+
+    return {
+        "start": start,
+        "end": end,
+        "bucketSeconds": bucket_seconds,
+        "points": points,
+    }
+
+
+def run_snapshot() -> bool:
+    db = SessionLocal()
+    try:
+        return take_snapshot(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def metrics_snapshot_loop(
+    interval_seconds: int = settings.METRICS_SNAPSHOT_INTERVAL_SECONDS,
+) -> None:
+    """Background task started from the app lifespan; wakes on interval boundaries"""
+    while True:
+        await asyncio.sleep(interval_seconds - time.time() % interval_seconds)
+        try:
+            await asyncio.to_thread(run_snapshot)
+        except Exception as e:
+            logger.error(f"Metrics snapshot failed: {e}")
@@ -0,0 +1,235 @@
+# app/services/metrics_ring.py
+import math
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+HISTORY_FIELDS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "load_1m",
+    "net_recv_bps",
+    "net_sent_bps",
+    "process_memory_mb",
+)
+MINUTE = 60
+MAX_WINDOW_SECONDS = 24 * 3600
+_WINDOW = re.compile(r"^(\d+)([smhd])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _finite(values: Sequence[float]) -> List[float]:
+    return [v for v in values if v == v]  # Drops NaN gaps from failed samples
+
+
+def parse_window(window: str, max_seconds: int = MAX_WINDOW_SECONDS) -> int:
+    """'15m', '6h', '1d' -> seconds"""
+    match = _WINDOW.match(window.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid window: {window!r}")
+    seconds = int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    if not 0 < seconds <= max_seconds:
+        raise ValueError(f"Window must be between 1s and {max_seconds // 86400}d")
+    return seconds
+
+
+def bucket_plan(window_seconds: int, points: int, resolution: float, now: float) -> Tuple[int, float]:
+    """Bucket width and the aligned start of the first bucket for a look-back window"""
+    bucket_seconds = max(math.ceil(window_seconds / max(points, 1)), math.ceil(resolution))
+    start = now - window_seconds
+    return bucket_seconds, start - start % bucket_seconds
+
+
+def bucketize(
+    timestamps: Sequence[float],
+    columns: Dict[str, Sequence[float]],
+    first_bucket: float,
+    end: float,
+    bucket_seconds: int,
+) -> Tuple[List[float], Dict[str, Dict[str, List[Optional[float]]]]]:
+    """
+    Min/max/avg per bucket over full-resolution samples. Bucket edges are
+    found by binary search over the sorted timestamps, and each bucket is
+    reduced as one slice per column.
+    """
+    series = {name: {"min": [], "max": [], "avg": []} for name in columns}
+    bucket_times = []
+    bucket = first_bucket
+    while bucket <= end:
+        lo = bisect_left(timestamps, bucket)
+        hi = bisect_left(timestamps, bucket + bucket_seconds)
+        if lo < hi:
+            bucket_times.append(bucket)
+            for name, column in columns.items():
+                values = _finite(column[lo:hi])
+                series[name]["min"].append(min(values) if values else None)
+                series[name]["max"].append(max(values) if values else None)
+                series[name]["avg"].append(round(math.fsum(values) / len(values), 2) if values else None)
+        bucket += bucket_seconds
+    return bucket_times, series
+
+
+class RingBuffer:
+    """
+    Fixed-capacity columnar ring: one preallocated `array('d')` per column,
+    overwritten in place once full. No per-sample objects are kept.
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str]):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.timestamps = array("d", [0.0]) * capacity
+        self.data = {name: array("d", [math.nan]) * capacity for name in self.columns}
+        self.head = 0  # Next slot to write
+        self.size = 0
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> None:
+        i = self.head
+        self.timestamps[i] = timestamp
+        for name in self.columns:
+            self.data[name][i] = values.get(name, math.nan)
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _ordered(self, column: array) -> array:
+        """Oldest-to-newest copy of a column (two slice copies, no Python loop)"""
+        if self.size < self.capacity:
+            return column[:self.size]
+        return column[self.head:] + column[:self.head]
+
+    def since(self, cutoff: float) -> Tuple[array, Dict[str, array]]:
+        timestamps = self._ordered(self.timestamps)
+        start = bisect_left(timestamps, cutoff)
+        return timestamps[start:], {name: self._ordered(col)[start:] for name, col in self.data.items()}
+
+
+class SystemMetricsHistory:
+    """
+    Recent system metrics in two tiers:
+
+    - raw: every collector sample for the last `raw_seconds`
+    - minute: per-minute min/max/sum/count for the last 24 hours
+
+    Queries of up to `raw_seconds` bucket the raw samples; longer windows
+    re-aggregate the minute tier. Memory is fixed at construction.
+    """
+
+    def __init__(
+        self,
+        sample_interval: float = settings.SYSTEM_METRICS_INTERVAL_SECONDS,
+        raw_seconds: int = 3600,
+    ):
+        self.raw_seconds = raw_seconds
+        self.sample_interval = sample_interval
+        self.raw = RingBuffer(math.ceil(raw_seconds / sample_interval) + 1, HISTORY_FIELDS)
+        minute_columns = [f"{name}_{agg}" for name in HISTORY_FIELDS for agg in ("min", "max", "sum", "count")]
+        self.minutes = RingBuffer(MAX_WINDOW_SECONDS // MINUTE, minute_columns)
+        self._minute_start: Optional[float] = None
+        self._minute_acc: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def extract(snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+        """Pull the tracked fields out of a system collector round"""
+        system = snapshot.get("system", {}).get("data", {})
+        network = snapshot.get("network", {}).get("data", {})
+        health = snapshot.get("health", {}).get("data", {})
+        load = (system.get("cpu") or {}).get("load_average") or [math.nan]
+        return {
+            "cpu_percent": (system.get("cpu") or {}).get("usage_percent", math.nan),
+            "memory_percent": (system.get("memory") or {}).get("usage_percent", math.nan),
+            "disk_percent": (system.get("disk") or {}).get("usage_percent", math.nan),
+            "load_1m": load[0],
+            "net_recv_bps": network.get("bytes_recv_per_sec", math.nan),
+            "net_sent_bps": network.get("bytes_sent_per_sec", math.nan),
+            "process_memory_mb": health.get("memory_usage_mb", math.nan),
+        }
+
+    def record(self, snapshot: Dict[str, Dict[str, Any]], timestamp: Optional[float] = None) -> None:
+        """Collector listener: append one round to the raw tier and the current minute"""
+        timestamp = timestamp or time.time()
+        values = self.extract(snapshot)
+        minute = timestamp - timestamp % MINUTE
+        with self._lock:
+            self.raw.append(timestamp, values)
+            if self._minute_start is not None and minute != self._minute_start:
+                self._close_minute()
+            if self._minute_start is None:
+                self._minute_start = minute
+                self._minute_acc = {name: [] for name in HISTORY_FIELDS}
+            for name, value in values.items():
+                if value == value:
+                    self._minute_acc[name].append(value)
+
+    def _minute_row(self) -> Dict[str, float]:
+        row = {}
+        for name, samples in self._minute_acc.items():
+            row[f"{name}_min"] = min(samples) if samples else math.nan
+            row[f"{name}_max"] = max(samples) if samples else math.nan
+            row[f"{name}_sum"] = math.fsum(samples)
+            row[f"{name}_count"] = float(len(samples))
+        return row
+
+    def _close_minute(self) -> None:
+        self.minutes.append(self._minute_start, self._minute_row())
+        self._minute_start = None
+
+    def query(self, window_seconds: int, points: int = 60, now: Optional[float] = None) -> Dict[str, Any]:
+        """Per-bucket min/max/avg over the last `window_seconds`, at most `points` buckets"""
+        now = now or time.time()
+        use_raw = window_seconds <= self.raw_seconds
+        resolution = self.sample_interval if use_raw else MINUTE
+        bucket_seconds, first_bucket = bucket_plan(window_seconds, points, resolution, now)
+
+        with self._lock:
+            tier = self.raw if use_raw else self.minutes
+            timestamps, columns = tier.since(first_bucket)
+            if not use_raw and self._minute_start is not None and self._minute_start >= first_bucket:
+                # The open minute's running aggregate, so the newest point is as recent as the raw tier's
+                timestamps.append(self._minute_start)
+                for name, value in self._minute_row().items():
+                    columns[name].append(value)
+
+        if use_raw:
+            bucket_times, series = bucketize(timestamps, columns, first_bucket, now, bucket_seconds)
+        else:
+            bucket_times, series = self._bucketize_minutes(timestamps, columns, first_bucket, now, bucket_seconds)
+
+        return {
+            "window_seconds": window_seconds,
+            "bucket_seconds": bucket_seconds,
+            "resolution": "raw" if use_raw else "1m",
+            "timestamps": bucket_times,
+            "series": series,
+        }
+
+    @staticmethod
+    def _bucketize_minutes(timestamps, columns, first_bucket, end, bucket_seconds):
+        """Like `bucketize`, but merging pre-aggregated minute rows"""
+        series = {name: {"min": [], "max": [], "avg": []} for name in HISTORY_FIELDS}
+        bucket_times = []
+        bucket = first_bucket
+        while bucket <= end:
+            lo = bisect_left(timestamps, bucket)
+            hi = bisect_left(timestamps, bucket + bucket_seconds)
+            if lo < hi:
+                bucket_times.append(bucket)
+                for name in HISTORY_FIELDS:
+                    mins = _finite(columns[f"{name}_min"][lo:hi])
+                    maxes = _finite(columns[f"{name}_max"][lo:hi])
+                    total = math.fsum(columns[f"{name}_sum"][lo:hi])
+                    count = sum(columns[f"{name}_count"][lo:hi])
+                    series[name]["min"].append(min(mins) if mins else None)
+                    series[name]["max"].append(max(maxes) if maxes else None)
+                    series[name]["avg"].append(round(total / count, 2) if count else None)
+            bucket += bucket_seconds
+        return bucket_times, series
+
+
+system_history = SystemMetricsHistory()
@@ -0,0 +1,146 @@
+# app/services/metrics_stream.py
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.crud import crud_metrics
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Nested dict of the leaves that changed; removed keys map to None"""
+    changed = {}
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff(previous, value)
+            if nested:
+                changed[key] = nested
+        elif previous != value:
+            changed[key] = value
+    for key in old.keys() - new.keys():
+        changed[key] = None
+    return changed
+
+
+def _frame(event: str, version: int, data: Dict[str, Any]) -> str:
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+class MetricsBroadcaster:
+    """
+    Fans collector snapshots out to live dashboards over server-sent events.
+
+    Each published snapshot gets a version. The delta against the previous
+    version is encoded once and shared by every subscriber that is caught
+    up. A subscriber that fell behind skips the versions it missed and
+    receives one full snapshot instead (also encoded once per version).
+    Slow clients therefore conflate to the latest state instead of
+    queueing frames, and memory per subscriber stays constant.
+    """
+
+    def __init__(
+        self,
+        heartbeat_seconds: float = settings.METRICS_STREAM_HEARTBEAT_SECONDS,
+        max_subscribers: int = settings.METRICS_STREAM_MAX_SUBSCRIBERS,
+    ):
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self.version = 0
+        self.snapshot: Dict[str, Any] = {}
+        self.subscribers = 0
+        self._delta_frame: Optional[str] = None
+        self._full_frame: Optional[str] = None
+        self._changed = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"published": 0, "delta_frames": 0, "full_frames": 0, "skipped_versions": 0}
+
+    # --- publishing ---
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        """Install a new snapshot; must run on the event loop"""
+        delta = diff(self.snapshot, snapshot)
+        if not delta and self.version:
+            return
+        self.version += 1
+        self.snapshot = snapshot
+        self._delta_frame = _frame("delta", self.version, delta)
+        self._full_frame = None
+        self.stats["published"] += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def attach(self, collector) -> None:
+        """Publish every system collector round (collector thread -> event loop)"""
+        self._loop = asyncio.get_running_loop()
+        collector.listeners.append(self._on_collect)
+
+    def _on_collect(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        if not self.subscribers or self._loop is None:
+            return  # Nobody listening: skip the database query too
+        payload = {name: entry["data"] for name, entry in snapshot.items()}
+        payload["sessions"] = self._session_metrics()
+        self._loop.call_soon_threadsafe(self.publish, payload)
+
+    @staticmethod
+    def _session_metrics() -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            return crud_metrics.get_session_metrics(db)
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            db.close()
+
+    # --- subscribing ---
+
+    def _full(self) -> str:
+        if self._full_frame is None:
+            self._full_frame = _frame("full", self.version, self.snapshot)
+        return self._full_frame
+
+    @property
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    async def stream(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        try:
+            yield "retry: 5000\n\n"  # Browser reconnect delay after a dropped stream
+            sent_version = 0
+            while True:
+                if sent_version and sent_version == self.version - 1:
+                    frame = self._delta_frame
+                    self.stats["delta_frames"] += 1
+                elif self.version and sent_version != self.version:
+                    frame = self._full()
+                    self.stats["full_frames"] += 1
+                    if sent_version:
+                        self.stats["skipped_versions"] += self.version - sent_version - 1
+                else:
+                    frame = None
+
+                if frame is not None:
+                    sent_version = self.version
+                    yield frame  # Suspends until the client has taken it, so slow clients lag behind
+                    continue
+
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"  # Keeps proxies from closing an idle stream
+        finally:
+            self.subscribers -= 1
+
+    def status(self) -> Dict[str, Any]:
+        return {"subscribers": self.subscribers, "version": self.version, **self.stats}
+
+
+metrics_broadcaster = MetricsBroadcaster()
@@ -0,0 +1,130 @@
+# app/services/network_stats.py
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import psutil
+
+PROC_NET = "/proc/net"
+
+
+def read_interface_counters(proc_net: str = PROC_NET) -> Dict[str, int]:
+    """Byte and packet totals summed over every interface (as psutil.net_io_counters does)"""
+    totals = {"bytes_recv": 0, "packets_recv": 0, "bytes_sent": 0, "packets_sent": 0}
+    with open(os.path.join(proc_net, "dev")) as f:
+        for line in f.readlines()[2:]:  # Two header lines
+            _, _, fields = line.partition(":")
+            values = fields.split()
+            if len(values) < 10:
+                continue
+            totals["bytes_recv"] += int(values[0])
+            totals["packets_recv"] += int(values[1])
+            totals["bytes_sent"] += int(values[8])
+            totals["packets_sent"] += int(values[9])
+    return totals
+
+
+def _read_snmp(path: str) -> Dict[str, Dict[str, int]]:
+    """/proc/net/snmp: per protocol, a line of field names followed by a line of values"""
+    with open(path) as f:
+        lines = [line.split() for line in f if line.strip()]
+    parsed = {}
+    for names, values in zip(lines[::2], lines[1::2]):
+        parsed[names[0].rstrip(":")] = {k: int(v) for k, v in zip(names[1:], values[1:])}
+    return parsed
+
+
+def _read_sockstat(path: str) -> Dict[str, Dict[str, int]]:
+    """/proc/net/sockstat: 'TCP: inuse 6 orphan 0 tw 0 ...' name/value pairs per line"""
+    parsed = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                parsed[parts[0].rstrip(":")] = {k: int(v) for k, v in zip(parts[1::2], parts[2::2])}
+    return parsed
+
+
+def read_socket_summary(proc_net: str = PROC_NET) -> Dict[str, int]:
+    """
+    Connection counts from the kernel's own aggregates. Reads a fixed number
+    of lines no matter how many sockets exist, unlike walking /proc/net/tcp
+    or every process's fd table.
+    """
+    snmp = _read_snmp(os.path.join(proc_net, "snmp"))
+    sockstat = _read_sockstat(os.path.join(proc_net, "sockstat"))
+    sockstat6_path = os.path.join(proc_net, "sockstat6")
+    sockstat6 = _read_sockstat(sockstat6_path) if os.path.exists(sockstat6_path) else {}
+
+    tcp = sockstat.get("TCP", {})
+    return {
+        # The TCP MIB covers IPv4 and IPv6 alike
+        "established": snmp.get("Tcp", {}).get("CurrEstab", 0),
+        "time_wait": tcp.get("tw", 0),
+        "orphaned": tcp.get("orphan", 0),
+        "tcp_sockets": tcp.get("inuse", 0) + sockstat6.get("TCP6", {}).get("inuse", 0),
+        "udp_sockets": sockstat.get("UDP", {}).get("inuse", 0) + sockstat6.get("UDP6", {}).get("inuse", 0),
+        "retransmitted_segments": snmp.get("Tcp", {}).get("RetransSegs", 0),
+    }
+
+
+class NetworkSampler:
+    """
+    Turns cumulative interface counters into per-second rates by diffing
+    consecutive samples. Meant to be called on a fixed interval by the
+    system metrics collector; the first sample reports zero rates.
+    """
+
+    def __init__(self, proc_net: str = PROC_NET):
+        self.proc_net = proc_net
+        self.use_proc = os.path.exists(os.path.join(proc_net, "snmp"))
+        self._previous: Optional[Dict[str, int]] = None
+        self._previous_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict:
+        if self.use_proc:
+            return {**read_interface_counters(self.proc_net), **read_socket_summary(self.proc_net)}
+        # Non-Linux development hosts: psutil's counters; connection states are not available cheaply
+        io = psutil.net_io_counters()
+        return {
+            "bytes_recv": io.bytes_recv, "packets_recv": io.packets_recv,
+            "bytes_sent": io.bytes_sent, "packets_sent": io.packets_sent,
+            "established": 0, "time_wait": 0, "orphaned": 0,
+            "tcp_sockets": 0, "udp_sockets": 0, "retransmitted_segments": 0,
+        }
+
+    def sample(self) -> Dict:
+        now = time.monotonic()
+        current = self._read()
+        with self._lock:
+            previous, previous_at = self._previous, self._previous_at
+            self._previous, self._previous_at = current, now
+
+        elapsed = now - previous_at if previous_at is not None else 0.0
+        rates = {}
+        for key in ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv"):
+            delta = current[key] - previous[key] if previous else 0
+            # A negative delta means an interface went away or a counter wrapped
+            rates[f"{key}_per_sec"] = round(max(delta, 0) / elapsed, 1) if elapsed > 0 else 0.0
+
+        return {
+            "bytes_sent": current["bytes_sent"],
+            "bytes_recv": current["bytes_recv"],
+            "packets_sent": current["packets_sent"],
+            "packets_recv": current["packets_recv"],
+            **rates,
+            "sample_interval_seconds": round(elapsed, 3),
+            "active_connections": current["established"],
+            "total_connections": current["tcp_sockets"] + current["udp_sockets"],
+            "tcp": {
+                "established": current["established"],
+                "time_wait": current["time_wait"],
+                "orphaned": current["orphaned"],
+                "retransmitted_segments": current["retransmitted_segments"],
+            },
+        }
+
+
+network_sampler = NetworkSampler()
@@ -0,0 +1,117 @@
+# app/services/prometheus_metrics.py
+import os
+
+import psutil
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services.analytics_dedup import deduplicator
+from app.services.analytics_ingest import ingest_queue
+from app.services.analytics_spool import spool
+from app.services.metadata_dictionary import metadata_dictionary
+from app.utils.prometheus import Counter, Gauge, Histogram, Registry, WorkerSnapshots
+
+registry = Registry()
+# Scrapes land on any one worker; this merges all of them (started in the app lifespan)
+snapshots = WorkerSnapshots(registry, settings.PROMETHEUS_MULTIPROC_DIR, settings.PROMETHEUS_SNAPSHOT_SECONDS)
+
+# --- HTTP (fed by RequestMetricsMiddleware) ---
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"], registry
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"], registry
+)
+http_requests_in_progress = Gauge("http_requests_in_progress", "HTTP requests currently being served", (), registry)
+
+# --- Caches ---
+
+cache_requests = Counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"], registry)
+cache_hit_ratio = Gauge(
+    "cache_hit_ratio", "Cache hits over lookups since process start, per worker", ["cache"], registry, "all"
+)
+
+# The response cache counts its own lookups (see app.core.cache.InstrumentedBackend)
+response_cache_hits = cache_requests.labels("response", "hit")
+response_cache_misses = cache_requests.labels("response", "miss")
+cache_requests.labels("analytics_metadata", "hit").set_function(lambda: metadata_dictionary.stats["hits"])
+cache_requests.labels("analytics_metadata", "miss").set_function(lambda: metadata_dictionary.stats["misses"])
+
+
+def _hit_ratio(cache: str):
+    hits, misses = cache_requests.labels(cache, "hit"), cache_requests.labels(cache, "miss")
+
+    def ratio() -> float:
+        hit = hits.value()
+        total = hit + misses.value()
+        return hit / total if total else 0.0
+    return ratio
+
+
+for _cache in ("response", "analytics_metadata"):
+    cache_hit_ratio.labels(_cache).set_function(_hit_ratio(_cache))
+
+# --- Database pool ---
+
+db_pool_size = Gauge("db_pool_size", "Configured SQLAlchemy pool size", (), registry)
+db_pool_connections = Gauge("db_pool_connections", "SQLAlchemy pool connections by state", ["state"], registry)
+
+db_pool_size.labels().set_function(lambda: engine.pool.size())
+db_pool_connections.labels("checked_out").set_function(lambda: engine.pool.checkedout())
+db_pool_connections.labels("checked_in").set_function(lambda: engine.pool.checkedin())
+db_pool_connections.labels("overflow").set_function(lambda: max(engine.pool.overflow(), 0))
+
+# --- Analytics ingest ---
+
+analytics_ingest_events = Counter(
+    "analytics_ingest_events_total", "Analytics events through the buffered ingest queue by outcome", ["outcome"], registry
+)
+analytics_ingest_batches = Counter("analytics_ingest_batches_total", "Batches flushed to the database", (), registry)
+analytics_ingest_queue_depth = Gauge("analytics_ingest_queue_depth", "Events waiting in the ingest queue", (), registry)
+analytics_spool_events = Counter(
+    "analytics_spool_events_total", "Analytics events through the on-disk spool by outcome", ["outcome"], registry
+)
+analytics_dedup_suppressed = Counter(
+    "analytics_dedup_suppressed_total", "Duplicate interactions dropped before ingest", (), registry
+)
+
+for _outcome in ("enqueued", "flushed", "rejected", "failed", "spooled"):
+    analytics_ingest_events.labels(_outcome).set_function(lambda key=_outcome: ingest_queue.stats[key])
+for _outcome in ("spooled", "replayed", "duplicates", "corrupt_lines", "quarantined"):
+    analytics_spool_events.labels(_outcome).set_function(lambda key=_outcome: spool.stats[key])
+analytics_ingest_batches.labels().set_function(lambda: ingest_queue.stats["batches"])
+analytics_ingest_queue_depth.labels().set_function(lambda: ingest_queue.depth)
+analytics_dedup_suppressed.labels().set_function(lambda: deduplicator.stats["suppressed"])
+
+# --- Process (one psutil read per scrape) ---
+
+# Summed over the workers, except the start time, which is the oldest running worker's
+process_cpu_seconds = Counter("process_cpu_seconds_total", "User and system CPU time spent", (), registry)
+process_resident_memory = Gauge("process_resident_memory_bytes", "Resident memory size", (), registry)
+process_virtual_memory = Gauge("process_virtual_memory_bytes", "Virtual memory size", (), registry)
+process_open_fds = Gauge("process_open_fds", "Open file descriptors", (), registry)
+process_threads = Gauge("process_threads", "OS threads in the processes", (), registry)
+process_start_time = Gauge(
+    "process_start_time_seconds", "Start time of the process since the epoch", (), registry, "min"
+)
+
+_process = psutil.Process(os.getpid())
+_process_state = {"cpu_seconds": 0.0}
+process_cpu_seconds.labels().set_function(lambda: _process_state["cpu_seconds"])
+process_start_time.set(_process.create_time())
+
+
+def _read_process() -> None:
+    with _process.oneshot():
+        cpu = _process.cpu_times()
+        memory = _process.memory_info()
+        _process_state["cpu_seconds"] = cpu.user + cpu.system
+        process_resident_memory.set(memory.rss)
+        process_virtual_memory.set(memory.vms)
+        process_threads.set(_process.num_threads())
+        if hasattr(_process, "num_fds"):
+            process_open_fds.set(_process.num_fds())
+
+
+registry.add_hook(_read_process)
@@ -1,21 +1,30 @@
 # app/services/system.py
 import psutil
 import platform
-import subprocess
 import os
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
+from app.services.docker_client import docker_state
+from app.services.disk_scanner import disk_scanner
+from app.services.network_stats import network_sampler
 
 logger = logging.getLogger(__name__)
 
 class SystemService:
+    # Reused so cpu_percent() measures against the previous call
+    process = psutil.Process()
+
     @staticmethod
     def get_system_metrics() -> Dict:
-        """Get host system metrics (CPU, Memory, Disk)"""
+        """
+        Get host system metrics (CPU, Memory, Disk).
+        CPU usage is measured since the previous call, so this never sleeps;
+        the background collector calls it on a fixed interval.
+        """
         try:
             # CPU Usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             cpu_count = psutil.cpu_count()
             
             # Memory Usage
@@ -69,49 +78,14 @@ class SystemService:
 
     @staticmethod
     def get_docker_status() -> Dict:
-        """Get Docker container status via subprocess"""
-        try:
-            result = subprocess.run(
-                ['docker', 'ps', '--format', 'table {{.Names}}\t{{.Status}}\t{{.Ports}}'],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')[1:]  # Skip header
-                containers = []
-                for line in lines:
-                    if line.strip():
-                        parts = line.split('\t')
-                        if len(parts) >= 2:
-                            containers.append({
-                                "name": parts[0],
-                                "status": parts[1],
-                                "ports": parts[2] if len(parts) > 2 else ""
-                            })
-                return {
-                    "containers": containers,
-                    "total_running": len(containers)
-                }
-            return {"error": "Docker command failed"}
-        except Exception as e:
-            return {"error": str(e)}
+        """Get Docker container status from the events-driven in-memory cache"""
+        return docker_state.status()
 
     @staticmethod
     def get_network_metrics() -> Dict:
-        """Get network I/O stats"""
+        """Get network I/O totals, per-second rates and TCP state counts from /proc aggregates"""
         try:
-            net_io = psutil.net_io_counters()
-            connections = psutil.net_connections(kind='inet')
-            active_connections = len([c for c in connections if c.status == 'ESTABLISHED'])
-            
-            return {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv,
-                "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv,
-                "active_connections": active_connections,
-                "total_connections": len(connections)
-            }
+            return network_sampler.sample()
         except Exception as e:
             return {"error": str(e)}
 
@@ -119,10 +93,10 @@ class SystemService:
     def get_application_health() -> Dict:
         """Get health of the current API process"""
         try:
-            process = psutil.Process()
+            process = SystemService.process
             memory_info = process.memory_info()
             memory_mb = round(memory_info.rss / (1024**2), 2)
-            cpu_percent = process.cpu_percent()
+            cpu_percent = process.cpu_percent(interval=None)
             uptime = datetime.now() - datetime.fromtimestamp(process.create_time())
             
             return {
@@ -152,7 +126,10 @@ class SystemService:
 
     @staticmethod
     def get_disk_details() -> Dict:
-        """Get detailed disk usage with cleanup potential (matching frontend interface)"""
+        """
+        Get detailed disk usage with cleanup potential (matching frontend interface).
+        Only statvfs runs here; directory sizes and Docker usage come from the disk scanner.
+        """
         try:
             disk = psutil.disk_usage('/')
             disk_used_gb = round(disk.used / (1024**3), 2)
@@ -160,32 +137,34 @@ class SystemService:
             disk_free_gb = round(disk.free / (1024**3), 2)
             disk_percent = round((disk.used / disk.total) * 100, 1)
             
-            # Docker usage (simplified for local dev if command fails)
-            docker_usage = {"total_size_gb": 0, "percentage_of_disk": 0}
-            try:
-                # Try to get real docker size if possible
-                result = subprocess.run(
-                    ['docker', 'system', 'df', '--format', '{{.Size}}'],
-                    capture_output=True, text=True, timeout=2
+            # Everything below comes from the background scanner's last pass
+            scan = disk_scanner.latest()
+            docker = scan.get("docker")
+            if docker:
+                docker_bytes = (
+                    docker["layers_bytes"] + docker["containers_bytes"]
+                    + docker["volumes_bytes"] + docker["build_cache_bytes"]
                 )
-                if result.returncode == 0:
-                    # Very simple parsing for now
-                    sizes = result.stdout.strip().split('\n')
-                    total_gb = 0
-                    for s in sizes:
-                        if 'GB' in s: total_gb += float(s.replace('GB', ''))
-                        elif 'MB' in s: total_gb += float(s.replace('MB', '')) / 1024
-                    docker_usage["total_size_gb"] = round(total_gb, 2)
-                    docker_usage["percentage_of_disk"] = round((total_gb / disk_total_gb) * 100, 1)
-            except:
-                pass
+                build_cache_bytes = docker["build_cache_bytes"]
+                unused_image_bytes = docker["unused_image_bytes"]
+            else:
+                docker_bytes = disk_scanner.category_bytes("docker_data")
+                build_cache_bytes = unused_image_bytes = 0
+            docker_total_gb = docker_bytes / (1024**3)
+            docker_usage = {
+                "total_size_gb": round(docker_total_gb, 2),
+                "percentage_of_disk": round((docker_total_gb / disk_total_gb) * 100, 1) if disk_total_gb else 0
+            }
 
-            # Mock some cleanup potential for the dashboard visuals
+            logs_bytes = disk_scanner.category_bytes("logs")
+            package_cache_bytes = disk_scanner.category_bytes("package_cache")
             cleanup_potential = {
-                "total_potential_gb": round(docker_usage["total_size_gb"] * 0.2, 2),
-                "docker_cache_gb": round(docker_usage["total_size_gb"] * 0.15, 2),
-                "logs_cleanup_mb": 50,
-                "package_cache_mb": 100
+                "total_potential_gb": round(
+                    (build_cache_bytes + unused_image_bytes + logs_bytes + package_cache_bytes) / (1024**3), 2
+                ),
+                "docker_cache_gb": round(build_cache_bytes / (1024**3), 2),
+                "logs_cleanup_mb": round(logs_bytes / (1024**2)),
+                "package_cache_mb": round(package_cache_bytes / (1024**2))
             }
             
             return {
@@ -195,7 +174,8 @@ class SystemService:
                 "disk_percent": disk_percent,
                 "docker_usage": docker_usage,
                 "cleanup_potential": cleanup_potential,
-                "health_status": "warning" if disk_percent > 85 else "caution" if disk_percent > 70 else "good"
+                "health_status": "warning" if disk_percent > 85 else "caution" if disk_percent > 70 else "good",
+                "scanned_at": scan.get("scanned_at")
             }
         except Exception as e:
             logger.error(f"Error in get_disk_details: {e}")
@@ -0,0 +1,121 @@
+# app/services/system_collector.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from app.core.config import settings
+from app.services.system import SystemService
+
+logger = logging.getLogger(__name__)
+
+
+class SystemMetricsCollector:
+    """
+    Samples host and process metrics on a daemon thread and publishes the
+    latest results as one immutable dict.
+
+    Readers never block: they grab the current snapshot reference, which
+    the thread swaps wholesale after each round. CPU percentages come from
+    psutil's non-blocking mode, i.e. usage since the previous round, so
+    the sampling interval doubles as the CPU measurement window.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = settings.SYSTEM_METRICS_INTERVAL_SECONDS,
+        collectors: Optional[Dict[str, Callable[[], Dict]]] = None,
+    ):
+        self.interval_seconds = interval_seconds
+        self.collectors = collectors or {
+            "system": SystemService.get_system_metrics,
+            "network": SystemService.get_network_metrics,
+            "health": SystemService.get_application_health,
+        }
+        self._snapshot: Dict[str, Dict[str, Any]] = {}
+        # Called with each published round, on the collector thread
+        self.listeners: List[Callable[[Dict[str, Dict[str, Any]]], None]] = []
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"samples": 0, "errors": 0, "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0}
+            for name in self.collectors
+        }
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Prime the non-blocking CPU counters so the first round has a baseline
+        psutil.cpu_percent(interval=None)
+        SystemService.process.cpu_percent(interval=None)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="system-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _sample(self, name: str, collector: Callable[[], Dict]) -> Dict:
+        stats = self._stats[name]
+        started = time.perf_counter()
+        try:
+            data = collector()
+        except Exception as e:
+            stats["errors"] += 1
+            logger.error(f"System metrics collector '{name}' failed: {e}")
+            data = {"error": str(e)}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats["samples"] += 1
+        stats["last_ms"] = round(elapsed_ms, 3)
+        stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 3)
+        # Exponential moving average keeps the figure recent without a window buffer
+        stats["avg_ms"] = round(elapsed_ms if stats["samples"] == 1 else stats["avg_ms"] * 0.9 + elapsed_ms * 0.1, 3)
+        return data
+
+    def collect_once(self) -> Dict[str, Dict[str, Any]]:
+        snapshot = {}
+        for name, collector in self.collectors.items():
+            snapshot[name] = {"data": self._sample(name, collector), "sampled_at": time.time()}
+        self._snapshot = snapshot  # Single reference swap: readers see a whole round or the previous one
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"System metrics listener failed: {e}")
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.collect_once()
+            self._stop.wait(max(self.interval_seconds - (time.monotonic() - started), 0.1))
+
+    def latest(self, name: str) -> Dict:
+        """Most recent sample for `name`; sampled inline if the thread has not produced one yet"""
+        entry = self._snapshot.get(name)
+        if entry is None:
+            return self._sample(name, self.collectors[name])
+        return entry["data"]
+
+    def age_seconds(self, name: str) -> Optional[float]:
+        entry = self._snapshot.get(name)
+        return round(time.time() - entry["sampled_at"], 3) if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "collectors": {
+                name: {**stats, "age_seconds": self.age_seconds(name)}
+                for name, stats in self._stats.items()
+            },
+        }
+
+
+system_collector = SystemMetricsCollector()
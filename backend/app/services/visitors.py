@@ -0,0 +1,117 @@
+# app/services/visitors.py
+import random
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.visitor_sketch import VisitorSketch
+from app.utils.hyperloglog import HyperLogLog
+
+# Metadata keys the frontend may use to identify an anonymous visitor
+FINGERPRINT_KEYS = ("visitor_id", "fingerprint")
+
+# Merged range results keyed by (start, end, per-day versions); tiny and self-invalidating
+_range_cache: Dict[Tuple, Dict[str, Any]] = {}
+_RANGE_CACHE_MAX = 128
+
+
+class VisitorService:
+    @staticmethod
+    def fingerprint(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not isinstance(metadata, dict):
+            return None
+        for key in FINGERPRINT_KEYS:
+            value = metadata.get(key)
+            if value:
+                return str(value)
+        return None
+
+    @staticmethod
+    def record_visitors(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Fold the visitor fingerprints of a batch into the per-day sketches.
+        Runs inside the caller's transaction; the caller commits.
+
+        A day's sketch may be split over several shard rows. A writer merges
+        into any shard row no other transaction holds (SKIP LOCKED), or
+        starts a new one, so concurrent batches never wait on each other.
+        HLL merges are commutative, so readers simply merge every shard.
+        """
+        by_day: Dict[date, HyperLogLog] = defaultdict(HyperLogLog)
+        for row in rows:
+            visitor = VisitorService.fingerprint(row.get("metadata_json"))
+            if visitor is None:
+                continue
+            ts = row.get("timestamp") or datetime.now(timezone.utc)
+            by_day[ts.astimezone(timezone.utc).date()].add(visitor)
+
+        for day in sorted(by_day):
+            stored = db.execute(
+                select(VisitorSketch.shard, VisitorSketch.registers, VisitorSketch.precision)
+                .where(VisitorSketch.day == day)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if stored is None:
+                VisitorService._insert_shard(db, day, by_day[day])
+                continue
+            sketch = HyperLogLog.from_bytes(stored.registers, stored.precision).merge(by_day[day])
+            db.execute(
+                update(VisitorSketch)
+                .where(VisitorSketch.day == day, VisitorSketch.shard == stored.shard)
+                .values(registers=sketch.to_bytes(), updated_at=func.clock_timestamp())
+            )
+
+    @staticmethod
+    def _insert_shard(db: Session, day: date, sketch: HyperLogLog) -> None:
+        # Every existing shard is busy (or the day has none yet); random ids keep concurrent inserts apart
+        while True:
+            inserted = db.execute(
+                pg_insert(VisitorSketch).values(
+                    day=day,
+                    shard=random.randrange(1 << 15),
+                    precision=sketch.precision,
+                    registers=sketch.to_bytes()
+                ).on_conflict_do_nothing(index_elements=[VisitorSketch.day, VisitorSketch.shard])
+                .returning(VisitorSketch.shard)
+            ).first()
+            if inserted is not None:
+                return
+
+    @staticmethod
+    def get_unique_visitors(db: Session, start: date, end: date) -> Dict[str, Any]:
+        """Approximate distinct visitors for the inclusive UTC day range [start, end]"""
+        versions = db.execute(
+            select(VisitorSketch.day, VisitorSketch.shard, VisitorSketch.updated_at)
+            .where(VisitorSketch.day >= start, VisitorSketch.day <= end)
+            .order_by(VisitorSketch.day, VisitorSketch.shard)
+        ).all()
+        cache_key = (start, end, tuple((v.day, v.shard, v.updated_at) for v in versions))
+        cached = _range_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        merged = HyperLogLog()
+        if versions:
+            sketches = db.execute(
+                select(VisitorSketch.registers, VisitorSketch.precision)
+                .where(VisitorSketch.day >= start, VisitorSketch.day <= end)
+            ).all()
+            for s in sketches:
+                merged.merge(HyperLogLog.from_bytes(s.registers, s.precision))
+
+        result = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "estimate": merged.count() if versions else 0,
+            "relativeError": round(merged.relative_error, 4),
+            "daysWithData": len({v.day for v in versions}),
+        }
+        if len(_range_cache) >= _RANGE_CACHE_MAX:
+            _range_cache.clear()
+        _range_cache[cache_key] = result
+        return result
@@ -0,0 +1,155 @@
+# backend/app/tests/fake_redis.py
+"""
+In-process stand-in for the subset of `redis.asyncio.Redis` the cache
+uses. Several `FakeRedis` clients can share one `FakeRedisServer` to play
+separate workers; `server.down = True` makes every call fail like a lost
+connection and ends open subscriptions.
+"""
+import asyncio
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from redis.exceptions import ConnectionError, ResponseError
+
+from app.core.cache import RELEASE_LOCK_SCRIPT
+
+_DISCONNECT = object()
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self.channels: Dict[str, Set[asyncio.Queue]] = {}
+        self._down = False
+
+    @property
+    def down(self) -> bool:
+        return self._down
+
+    @down.setter
+    def down(self, value: bool) -> None:
+        self._down = value
+        if value:
+            for queues in self.channels.values():
+                for queue in queues:
+                    queue.put_nowait(_DISCONNECT)
+
+    def check(self) -> None:
+        if self._down:
+            raise ConnectionError("Connection refused (fake)")
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis"):
+        self._client = client
+        self._calls: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        return [await getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self._server = server
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: List[str] = []
+
+    async def subscribe(self, *channels: str) -> None:
+        self._server.check()
+        for channel in channels:
+            self._server.channels.setdefault(channel, set()).add(self._queue)
+            self._channels.append(channel)
+            self._queue.put_nowait({"type": "subscribe", "channel": channel, "data": 1})
+
+    async def listen(self):
+        while True:
+            message = await self._queue.get()
+            if message is _DISCONNECT:
+                raise ConnectionError("Connection closed by server (fake)")
+            yield message
+
+    async def aclose(self) -> None:
+        for channel in self._channels:
+            self._server.channels.get(channel, set()).discard(self._queue)
+        self._channels = []
+
+
+class FakeRedis:
+    def __init__(self, server: Optional[FakeRedisServer] = None):
+        self.server = server or FakeRedisServer()
+        self.calls = 0
+
+    def _check(self) -> None:
+        self.calls += 1
+        self.server.check()
+
+    async def get(self, key: str) -> Any:
+        self._check()
+        entry = self.server.lookup(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: Any, ex: Optional[float] = None, px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        self._check()
+        if nx and self.server.lookup(key) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self.server.data[key] = (value, None if ttl is None else time.monotonic() + ttl)
+        return True
+
+    async def pttl(self, key: str) -> int:
+        self._check()
+        entry = self.server.lookup(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+
+    async def delete(self, *keys: str) -> int:
+        self._check()
+        return sum(1 for key in keys if self.server.data.pop(key, None) is not None)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        """Only the scripts the app ships, reimplemented in Python"""
+        self._check()
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if script == RELEASE_LOCK_SCRIPT:
+            entry = self.server.lookup(keys[0])
+            if entry is not None and entry[0] == args[0]:
+                return await self.delete(keys[0])
+            return 0
+        raise ResponseError("Unknown script (fake)")
+
+    async def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        self._check()
+        for key in list(self.server.data):
+            if fnmatch.fnmatchcase(key, match) and self.server.lookup(key) is not None:
+                yield key
+
+    async def publish(self, channel: str, message: Any) -> int:
+        self._check()
+        queues = self.server.channels.get(channel, set())
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(queues)
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self.server)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,48 @@
+# backend/app/tests/test_analytics_batch.py
+import gzip
+import json
+
+import pytest
+
+from app.services.analytics_batch import BatchPayloadError, interaction_error, parse_interaction_batch
+
+
+def _event(**overrides):
+    event = {"interaction_type": "project_click", "target_id": "portfolio", "metadata": {"referrer": "x"}}
+    event.update(overrides)
+    return event
+
+
+def test_array_ndjson_and_gzip_decode_to_the_same_rows():
+    events = [_event(), _event(target_id="resume", metadata=None)]
+    array = json.dumps(events).encode()
+    ndjson = "\n".join(json.dumps(e) for e in events).encode()
+    expected = [
+        {"interaction_type": "project_click", "target_id": "portfolio", "metadata_json": {"referrer": "x"}},
+        {"interaction_type": "project_click", "target_id": "resume", "metadata_json": None},
+    ]
+    assert parse_interaction_batch(array) == expected
+    assert parse_interaction_batch(ndjson) == expected
+    assert parse_interaction_batch(gzip.compress(ndjson)) == expected
+
+
+@pytest.mark.parametrize("event, message", [
+    (_event(target_id="a\x00b"), "target_id must not contain NUL characters"),
+    (_event(interaction_type="x" * 257), "interaction_type exceeds 256 characters"),
+    (_event(metadata={"title": "bad\x00"}), "metadata must not contain NUL characters"),
+    (_event(metadata={"nested": [{"k\x00": 1}]}), "metadata must not contain NUL characters"),
+    (_event(metadata={"blob": "y" * 5000}), "metadata exceeds 4096 bytes"),
+    (_event(metadata=["not", "an", "object"]), "metadata must be an object"),
+    (_event(target_id=""), "target_id must be a non-empty string"),
+])
+def test_unstorable_events_reject_the_batch(event, message):
+    with pytest.raises(BatchPayloadError) as exc:
+        parse_interaction_batch(json.dumps([_event(), event]).encode())
+    assert exc.value.errors == [{"index": 1, "msg": message}]
+
+
+def test_interaction_error_limits_are_configurable():
+    assert interaction_error("view", "abcd", None, max_length=4) is None
+    assert interaction_error("view", "abcde", None, max_length=4) == "target_id exceeds 4 characters"
+    assert interaction_error("view", "a", {"k": 1}, max_metadata_bytes=8) is None
+    assert interaction_error("view", "a", {"k": "v"}, max_metadata_bytes=8) == "metadata exceeds 8 bytes"
@@ -0,0 +1,125 @@
+# backend/app/tests/test_analytics_dedup.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.v1.endpoints import analytics as endpoints
+from app.schemas.analytics import InteractionCreate
+from app.services.analytics_dedup import InteractionDeduplicator, client_key
+from app.services.analytics_ingest import IngestQueueFull
+from app.utils.client_address import client_address, parse_networks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_suppresses_repeats_and_slides():
+    clock = Clock()
+    dedup = InteractionDeduplicator(window_seconds=2, max_keys=100, clock=clock)
+    assert not dedup.is_duplicate("click", "cv", "c1")
+    clock.now += 1.5
+    assert dedup.is_duplicate("click", "cv", "c1")
+    # Different target or client is a different event
+    assert not dedup.is_duplicate("click", "github", "c1")
+    assert not dedup.is_duplicate("click", "cv", "c2")
+    # The suppressed repeat extended the window
+    clock.now += 1.5
+    assert dedup.is_duplicate("click", "cv", "c1")
+    clock.now += 2.5
+    assert not dedup.is_duplicate("click", "cv", "c1")
+    assert dedup.stats["suppressed"] == 2
+
+
+def test_keys_survive_one_rotation_and_memory_is_bounded():
+    clock = Clock()
+    dedup = InteractionDeduplicator(window_seconds=2, max_keys=3, clock=clock)
+    dedup.is_duplicate("view", "a", "c")
+    for n in range(3):
+        dedup.is_duplicate("view", f"filler{n}", "c")  # Fills the generation, forcing an early rotation
+    assert dedup.is_duplicate("view", "a", "c")  # Still found in the previous generation
+    assert len(dedup._current) + len(dedup._previous) <= 2 * 3
+
+
+def test_forget_lets_a_retry_through():
+    dedup = InteractionDeduplicator(window_seconds=60, clock=Clock())
+    rows = [{"interaction_type": "view", "target_id": "a", "metadata_json": {"visitor_id": "v1"}},
+            {"interaction_type": "view", "target_id": "b", "metadata_json": None}]
+    assert dedup.filter_rows([dict(r) for r in rows], "1.2.3.4|ua") == rows
+    dedup.forget_rows(rows, "1.2.3.4|ua")
+    assert dedup.filter_rows([dict(r) for r in rows], "1.2.3.4|ua") == rows
+    assert dedup.filter_rows([dict(r) for r in rows], "1.2.3.4|ua") == []
+
+
+def test_client_key_prefers_fingerprint():
+    assert client_key({"visitor_id": "v1"}, "1.2.3.4|ua") == "v1"
+    assert client_key({"fingerprint": "f"}, "1.2.3.4|ua") == "f"
+    assert client_key({"page": "/"}, "1.2.3.4|ua") == "1.2.3.4|ua"
+
+
+@pytest.mark.parametrize("peer, forwarded, expected", [
+    ("172.18.0.5", "203.0.113.7", "203.0.113.7"),            # nginx on the Docker network
+    ("172.18.0.5", "10.9.9.9, 203.0.113.7", "203.0.113.7"),  # client-supplied entry to the left is ignored
+    ("172.18.0.5", "203.0.113.7, 127.0.0.1", "203.0.113.7"),  # chained trusted proxies are skipped
+    ("198.51.100.1", "203.0.113.7", "198.51.100.1"),          # untrusted peer cannot spoof the header
+    ("172.18.0.5", None, "172.18.0.5"),
+    ("172.18.0.5", "not-an-ip", "not-an-ip"),
+    (None, "203.0.113.7", ""),
+])
+def test_client_address_trusts_only_configured_proxies(peer, forwarded, expected):
+    proxies = parse_networks("127.0.0.1/32, ::1/128, 172.16.0.0/12")
+    assert client_address(peer, forwarded, proxies) == expected
+
+
+class FlakyQueue:
+    running = True
+
+    def __init__(self):
+        self.full = True
+        self.events = []
+
+    async def enqueue(self, interaction_type, target_id, metadata=None):
+        if self.full:
+            raise IngestQueueFull("full")
+        self.events.append(target_id)
+
+
+def _request(forwarded_for):
+    return Request({
+        "type": "http", "method": "POST", "path": "/track", "query_string": b"",
+        "headers": [(b"x-forwarded-for", forwarded_for.encode()), (b"user-agent", b"test")],
+        "client": ("172.18.0.5", 40000),
+    })
+
+
+def test_retry_after_503_is_not_dropped_as_duplicate(monkeypatch):
+    queue = FlakyQueue()
+    monkeypatch.setattr(endpoints, "ingest_queue", queue)
+    monkeypatch.setattr(endpoints, "deduplicator", InteractionDeduplicator(window_seconds=60))
+    monkeypatch.setattr(endpoints.settings, "ANALYTICS_BUFFERED_INGEST", True)
+    event = InteractionCreate(interaction_type="click", target_id="cv")
+
+    async def track(forwarded_for="203.0.113.7"):
+        try:
+            response = await endpoints.track_interaction(event, _request(forwarded_for), db=None)
+        except HTTPException as e:
+            return e.status_code
+        return response.body
+
+    async def run():
+        assert await track() == 503
+        assert await track() == 503
+        queue.full = False
+        assert await track() == b'{"status":"queued"}'
+        assert await track() == b'{"status":"duplicate"}'
+        # Another visitor behind the same proxy is not merged into the first one's key
+        assert await track("198.51.100.20") == b'{"status":"queued"}'
+
+    asyncio.run(run())
+    assert queue.events == ["cv", "cv"]
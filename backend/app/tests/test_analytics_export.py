@@ -0,0 +1,51 @@
+# backend/app/tests/test_analytics_export.py
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.analytics_export import to_csv, to_ndjson
+from app.utils.cursor import format_cursor, parse_cursor
+
+CET = timezone(timedelta(hours=2))
+
+
+def _row(n, ts):
+    return {
+        "id": n, "event_id": None, "timestamp": ts, "interaction_type": "view",
+        "target_id": f"t{n}", "metadata_json": {"a": n} if n % 2 else None,
+    }
+
+
+def test_cursor_round_trips_in_utc_with_z_suffix():
+    ts = datetime(2026, 10, 18, 12, 30, 1, 123456, tzinfo=CET)
+    cursor = format_cursor({"timestamp": ts, "id": 42})
+    # No '+' to be mangled into a space by an unescaped query string
+    assert cursor == "2026-10-18T10:30:01.123456Z,42"
+    assert parse_cursor(cursor) == (ts, 42)
+    assert parse_cursor(cursor)[0].utcoffset() == timedelta(0)
+
+
+@pytest.mark.parametrize("cursor", ["", "2026-10-18T10:30:01Z", "2026-10-18T10:30:01Z,abc", "yesterday,1", "2026-10-18T10:30:01 00:00,1"])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        parse_cursor(cursor)
+
+
+def test_ndjson_rows_carry_their_resume_cursor():
+    ts = datetime(2026, 10, 18, 10, tzinfo=timezone.utc)
+    lines = [json.loads(line) for line in to_ndjson(iter([_row(1, ts), _row(2, ts)]))]
+    assert [l["cursor"] for l in lines] == ["2026-10-18T10:00:00Z,1", "2026-10-18T10:00:00Z,2"]
+    assert lines[0]["metadata"] == {"a": 1} and lines[1]["metadata"] is None
+
+
+def test_csv_is_chunked_and_complete():
+    ts = datetime(2026, 10, 18, 10, tzinfo=timezone.utc)
+    chunks = list(to_csv(iter([_row(n, ts) for n in range(5)]), chunk_rows=2))
+    assert len(chunks) == 3
+    records = list(csv.reader(io.StringIO("".join(chunks))))
+    assert records[0] == ["id", "event_id", "timestamp", "interaction_type", "target_id", "metadata"]
+    assert [r[0] for r in records[1:]] == ["0", "1", "2", "3", "4"]
+    assert records[2][5] == '{"a": 1}' and records[1][5] == ""
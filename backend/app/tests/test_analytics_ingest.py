@@ -0,0 +1,146 @@
+# backend/app/tests/test_analytics_ingest.py
+import asyncio
+import threading
+
+import pytest
+
+from app.services.analytics_ingest import AnalyticsIngestQueue, IngestQueueFull
+from app.services.analytics_spool import AnalyticsSpool
+
+
+class RecordingWriter:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.calls = 0
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, rows):
+        self.release.wait(5)
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.batches.append([row["target_id"] for row in rows])
+        return len(rows)
+
+
+def _row(n):
+    return {"interaction_type": "page_view", "target_id": f"t{n}", "metadata_json": None}
+
+
+def test_size_trigger_and_drain_on_stop():
+    writer = RecordingWriter()
+    queue = AnalyticsIngestQueue(maxsize=100, batch_size=3, flush_interval=0.5, writer=writer, spool=None)
+
+    async def run():
+        await queue.start()
+        await queue.enqueue_many([_row(n) for n in range(7)])
+        await asyncio.sleep(0.1)
+        flushed_before_stop = list(writer.batches)
+        await queue.stop()
+        return flushed_before_stop
+
+    flushed_before_stop = asyncio.run(run())
+    # Two full batches go out without waiting for the interval; the tail is drained on stop
+    assert flushed_before_stop == [["t0", "t1", "t2"], ["t3", "t4", "t5"]]
+    assert writer.batches[-1] == ["t6"]
+    assert queue.stats["enqueued"] == queue.stats["flushed"] == 7
+    assert queue.stats["batches"] == 3
+    assert not queue.running
+
+
+def test_time_trigger_flushes_partial_batch():
+    writer = RecordingWriter()
+    queue = AnalyticsIngestQueue(maxsize=100, batch_size=100, flush_interval=0.05, writer=writer, spool=None)
+
+    async def run():
+        await queue.start()
+        await queue.enqueue("page_view", "a")
+        await queue.enqueue("page_view", "b")
+        await asyncio.sleep(0.3)
+        batches = list(writer.batches)
+        await queue.stop()
+        return batches
+
+    assert asyncio.run(run()) == [["a", "b"]]
+
+
+def test_backpressure_rejects_after_timeout():
+    writer = RecordingWriter()
+    writer.release.clear()
+    queue = AnalyticsIngestQueue(
+        maxsize=2, batch_size=1, flush_interval=0.01, enqueue_timeout=0.05, writer=writer, spool=None
+    )
+
+    async def run():
+        await queue.start()
+        await queue.enqueue_many([_row(0)])
+        await asyncio.sleep(0.05)  # The flusher takes t0 and blocks in the writer
+        await queue.enqueue_many([_row(1), _row(2)])
+        assert queue.depth == 2
+        with pytest.raises(IngestQueueFull):
+            await queue.enqueue_many([_row(3)])
+        writer.release.set()
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats["rejected"] == 1
+    assert queue.stats["enqueued"] == queue.stats["flushed"] == 3
+    assert [b[0] for b in writer.batches] == ["t0", "t1", "t2"]
+
+
+def test_batches_are_queued_whole_or_not_at_all():
+    writer = RecordingWriter()
+    writer.release.clear()
+    queue = AnalyticsIngestQueue(
+        maxsize=3, batch_size=1, flush_interval=0.01, enqueue_timeout=0.05, writer=writer, spool=None
+    )
+
+    async def run():
+        await queue.start()
+        await queue.enqueue_many([_row(0)])
+        await asyncio.sleep(0.05)  # The flusher takes t0 and blocks in the writer
+        await queue.enqueue_many([_row(1), _row(2)])
+        # Room for one more, not two: nothing of the batch may be left behind by the 503
+        with pytest.raises(IngestQueueFull):
+            await queue.enqueue_many([_row(3), _row(4)])
+        assert queue.depth == 2
+
+        # A batch that fits once the flusher frees space waits for it instead of failing
+        queue.enqueue_timeout = 1
+        pending = asyncio.ensure_future(queue.enqueue_many([_row(5), _row(6)]))
+        await asyncio.sleep(0.01)
+        writer.release.set()
+        await asyncio.wait_for(pending, 1)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats["rejected"] == 2
+    assert [b[0] for b in writer.batches] == ["t0", "t1", "t2", "t5", "t6"]
+
+
+def test_failed_flush_spools_and_trips_breaker(tmp_path):
+    writer = RecordingWriter(fail=True)
+    spool = AnalyticsSpool(directory=str(tmp_path), segment_max_bytes=1 << 20)
+    queue = AnalyticsIngestQueue(maxsize=100, batch_size=2, flush_interval=0.01, writer=writer, spool=spool)
+
+    async def run():
+        await queue.start()
+        await queue.enqueue_many([_row(0), _row(1)])
+        await asyncio.sleep(0.1)
+        # The breaker is open now, so the next batch skips the database
+        await queue.enqueue_many([_row(2), _row(3)])
+        await queue.stop()
+
+    asyncio.run(run())
+    assert writer.calls == 1
+    assert not spool.db_available
+    assert queue.stats["spooled"] == spool.stats["spooled"] == 4
+    assert queue.stats["flushed"] == 0
+
+    # Replaying the spool once the database is back delivers every event with its event_id
+    replayed = []
+    spool.replay(lambda rows: replayed.extend(rows) or len(rows))
+    assert sorted(r["target_id"] for r in replayed) == ["t0", "t1", "t2", "t3"]
+    assert all(r["event_id"] for r in replayed)
@@ -0,0 +1,88 @@
+# backend/app/tests/test_analytics_partitions.py
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.interaction import AnalyticsInteraction
+from app.services import analytics_partitions
+
+Row = namedtuple("Row", "name bound")
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeCatalog:
+    """Answers the pg_inherits query and applies partition DDL to an in-memory catalog"""
+
+    def __init__(self, bounds):
+        self.bounds = dict(bounds)
+        self.dropped = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            rows = [Row(name, bound) for name, bound in self.bounds.items()]
+            return type("Result", (), {"all": lambda self: rows})()
+        created = re.match(r"CREATE TABLE IF NOT EXISTS (\w+) PARTITION OF \w+ (FOR VALUES .*)", sql)
+        if created:
+            self.bounds.setdefault(created.group(1), created.group(2))
+        elif "DETACH PARTITION" in sql:
+            del self.bounds[sql.rsplit(" ", 1)[1]]
+        elif sql.startswith("DROP TABLE"):
+            self.dropped.append(sql.rsplit(" ", 1)[1])
+
+
+def _bound(lower, upper):
+    return f"FOR VALUES FROM ({lower}) TO ('{upper} 00:00:00+00')"
+
+
+@pytest.fixture
+def catalog():
+    return FakeCatalog({
+        "analytics_interactions_legacy": _bound("MINVALUE", "2025-11-01"),
+        "analytics_interactions_p202511": _bound("'2025-11-01 00:00:00+00'", "2025-12-01"),
+        "analytics_interactions_p202610": _bound("'2026-10-01 00:00:00+00'", "2026-11-01"),
+    })
+
+
+def test_list_partitions_parses_bounds_oldest_first(catalog):
+    partitions = analytics_partitions.list_partitions(catalog)
+    assert [p["name"] for p in partitions] == [
+        "analytics_interactions_legacy", "analytics_interactions_p202511", "analytics_interactions_p202610"
+    ]
+    assert partitions[0]["upper_bound"] == datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+
+def test_ensure_partitions_fills_only_the_uncovered_months(catalog):
+    created = analytics_partitions.ensure_partitions(catalog, months_ahead=3, now=NOW)
+    assert created == [
+        "analytics_interactions_p202611", "analytics_interactions_p202612", "analytics_interactions_p202701"
+    ]
+    assert catalog.bounds["analytics_interactions_p202612"] == (
+        "FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')"
+    )
+    # Running again is a no-op
+    assert analytics_partitions.ensure_partitions(catalog, months_ahead=3, now=NOW) == []
+
+
+def test_retention_detaches_or_drops_whole_expired_months(catalog):
+    assert analytics_partitions.apply_retention(catalog, retention_months=0, now=NOW) == []
+
+    removed = analytics_partitions.apply_retention(catalog, retention_months=11, mode="detach", now=NOW)
+    # The cutoff is 2025-11-01: only partitions whose rows all predate it go
+    assert removed == ["analytics_interactions_legacy"]
+    assert catalog.dropped == []
+
+    removed = analytics_partitions.apply_retention(catalog, retention_months=10, mode="drop", now=NOW)
+    assert removed == catalog.dropped == ["analytics_interactions_p202511"]
+    assert list(catalog.bounds) == ["analytics_interactions_p202610"]
+
+    with pytest.raises(ValueError):
+        analytics_partitions.apply_retention(catalog, retention_months=1, mode="truncate", now=NOW)
+
+
+def test_model_indexes_match_the_partitioned_parent():
+    # The migration indexes the parent on these columns only; id is covered by the (id, timestamp) key
+    indexed = {column.name for index in AnalyticsInteraction.__table__.indexes for column in index.columns}
+    assert indexed == {"interaction_type", "target_id", "timestamp"}
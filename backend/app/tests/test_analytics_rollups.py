@@ -0,0 +1,97 @@
+# backend/app/tests/test_analytics_rollups.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.analytics_rollup import AnalyticsRollupDaily, AnalyticsRollupHourly
+from app.services.analytics import AnalyticsService
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _rows_of(compiled):
+    params = compiled.params
+    count = sum(1 for key in params if key.startswith("count_m"))
+    return [
+        (params[f"interaction_type_m{i}"], params[f"target_id_m{i}"], params[f"bucket_m{i}"], params[f"shard_m{i}"], params[f"count_m{i}"])
+        for i in range(count)
+    ]
+
+
+def test_upsert_preaggregates_sorts_and_targets_one_shard():
+    base = datetime(2026, 10, 18, 9, 15, tzinfo=timezone.utc)
+    rows = [
+        {"interaction_type": "view", "target_id": "b", "timestamp": base},
+        {"interaction_type": "click", "target_id": "z", "timestamp": base + timedelta(hours=1)},
+        {"interaction_type": "view", "target_id": "b", "timestamp": base + timedelta(minutes=5)},
+        {"interaction_type": "click", "target_id": "a", "timestamp": base},
+    ]
+    db = RecordingSession()
+    AnalyticsService.upsert_rollups(db, rows)
+
+    hourly, daily = db.statements
+    hour = base.replace(minute=0)
+    day = base.replace(hour=0, minute=0)
+    hourly_rows, daily_rows = _rows_of(hourly), _rows_of(daily)
+
+    # One value row per bucket, in key order, so concurrent writers lock rows in the same order
+    assert [r[:3] + r[4:] for r in hourly_rows] == [
+        ("click", "a", hour, 1),
+        ("click", "z", hour + timedelta(hours=1), 1),
+        ("view", "b", hour, 2),
+    ]
+    assert [r[:3] + r[4:] for r in daily_rows] == [("click", "a", day, 1), ("click", "z", day, 1), ("view", "b", day, 2)]
+
+    # The whole batch adds to a single shard row per bucket
+    assert len({r[3] for r in hourly_rows + daily_rows}) == 1
+    assert "ON CONFLICT (interaction_type, target_id, bucket, shard) DO UPDATE" in str(hourly)
+    assert "count = (analytics_rollup_hourly.count + excluded.count)" in str(hourly)
+
+
+def test_batches_spread_over_shards(monkeypatch):
+    monkeypatch.setattr("app.services.analytics.settings.ANALYTICS_ROLLUP_SHARDS", 4)
+    shards = set()
+    for _ in range(200):
+        db = RecordingSession()
+        AnalyticsService.upsert_rollups(db, [{"interaction_type": "view", "target_id": "x"}])
+        shards.add(_rows_of(db.statements[0])[0][3])
+    assert shards == {0, 1, 2, 3}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[AnalyticsRollupHourly.__table__, AnalyticsRollupDaily.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_readers_sum_shards(db):
+    now = datetime.now(timezone.utc)
+    day = (now - timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+    # Hourly rows only count for the partial first day of the window
+    hour = (now - timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
+    db.add_all(
+        [AnalyticsRollupDaily(interaction_type="view", target_id="home", bucket=day, shard=s, count=10 * (s + 1)) for s in range(3)]
+        + [AnalyticsRollupHourly(interaction_type="view", target_id="home", bucket=hour, shard=s, count=1) for s in (0, 5)]
+        + [AnalyticsRollupDaily(interaction_type="click", target_id="cv", bucket=day, shard=2, count=4)]
+    )
+    db.commit()
+
+    assert AnalyticsService.get_total_counts(db) == {"view": 60, "click": 4}
+    stats = {(s["type"], s["target"]): s["count"] for s in AnalyticsService.get_interaction_stats(db, days=7)}
+    assert stats == {("view", "home"): 62, ("click", "cv"): 4}
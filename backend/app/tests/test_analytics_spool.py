@@ -0,0 +1,141 @@
+# backend/app/tests/test_analytics_spool.py
+import asyncio
+import os
+
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.services.analytics_spool import AnalyticsSpool, is_connection_error, spool_replay_loop
+
+
+def _rows(*targets):
+    return [{"interaction_type": "view", "target_id": t, "metadata_json": None, "event_id": f"e-{t}"} for t in targets]
+
+
+class StrictWriter:
+    """Accepts rows like Postgres would: a NUL byte fails the whole statement"""
+
+    def __init__(self):
+        self.stored = []
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if any("\x00" in r["target_id"] for r in rows):
+            raise ValueError("A string literal cannot contain NUL (0x00) characters.")
+        self.stored.extend(r["target_id"] for r in rows)
+        return len(rows)
+
+
+def _segment(spool, rows):
+    spool.append(rows)
+    spool.seal()
+
+
+def _files(directory):
+    return sorted(p.name.rsplit(".", 1)[1] for p in directory.iterdir() if p.is_file())
+
+
+def test_poison_row_is_quarantined_and_later_segments_replay(tmp_path):
+    spool = AnalyticsSpool(directory=str(tmp_path), replay_batch_size=4)
+    _segment(spool, _rows("a", "b", "bad\x00", "c", "d", "e"))
+    _segment(spool, _rows("f", "g"))
+
+    writer = StrictWriter()
+    assert spool.replay(writer) == 7
+    assert sorted(writer.stored) == ["a", "b", "c", "d", "e", "f", "g"]
+    assert spool.stats["quarantined"] == 1
+    assert _files(tmp_path) == []
+
+    quarantined = list((tmp_path / "quarantine").iterdir())
+    assert len(quarantined) == 1 and quarantined[0].name.endswith("-rows.sealed")
+    assert "bad\\u0000" in quarantined[0].read_text()
+    assert spool.status()["quarantine_files"] == 1
+
+
+def test_segment_failing_for_other_reasons_is_quarantined_after_max_attempts(tmp_path):
+    spool = AnalyticsSpool(directory=str(tmp_path), max_attempts=3)
+    _segment(spool, _rows("stuck"))
+    stored = []
+
+    def writer(rows):
+        if rows[0]["target_id"] == "stuck":
+            raise ProgrammingError("INSERT", {}, Exception("column does not exist"))
+        stored.extend(r["target_id"] for r in rows)
+        return len(rows)
+
+    for n in range(3):
+        _segment(spool, _rows(f"new{n}"))
+        spool.replay(writer)
+        # Newer segments are never held up by the failing one
+        assert stored == [f"new{i}" for i in range(n + 1)]
+        assert _files(tmp_path) == (["sealed"] if n < 2 else [])
+
+    assert [p.suffix for p in (tmp_path / "quarantine").iterdir()] == [".sealed"]
+    assert spool.stats["quarantined"] == 1
+
+
+def test_connection_error_gives_the_segment_back(tmp_path):
+    spool = AnalyticsSpool(directory=str(tmp_path))
+    _segment(spool, _rows("a"))
+    down = OperationalError("INSERT", {}, Exception("could not connect to server"))
+
+    def writer(rows):
+        raise down
+
+    try:
+        spool.replay(writer)
+    except OperationalError:
+        pass
+    else:
+        raise AssertionError("connection errors must propagate")
+    assert _files(tmp_path) == ["sealed"]
+    assert not (tmp_path / "quarantine").exists()
+
+
+def test_breaker_only_opens_for_connection_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.analytics_spool._db_ping", lambda: None)
+    assert is_connection_error(OperationalError("SELECT 1", {}, Exception("timeout")))
+    assert not is_connection_error(ValueError("NUL"))
+
+    async def run(error):
+        spool = AnalyticsSpool(directory=str(tmp_path))
+
+        def replay(writer):
+            raise error
+
+        spool.replay = replay
+        task = asyncio.create_task(spool_replay_loop(spool, lambda rows: 0, interval_seconds=0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return spool
+
+    assert asyncio.run(run(RuntimeError("bug in replay"))).db_available
+    spool = asyncio.run(run(OperationalError("INSERT", {}, Exception("server closed the connection"))))
+    assert not spool.db_available
+    assert "server closed" in spool.last_error
+
+
+def test_orphans_are_detected_by_lock_not_pid(tmp_path):
+    live = AnalyticsSpool(directory=str(tmp_path))
+    live.append(_rows("a"))
+    other = AnalyticsSpool(directory=str(tmp_path))
+
+    # A live writer's segment is left alone, whatever PID it carries
+    other.recover_orphans()
+    assert _files(tmp_path) == ["active"]
+
+    # Simulate the writer dying: its lock goes away with the file descriptor
+    live._file.close()
+    live._file = None
+    other.recover_orphans()
+    assert _files(tmp_path) == ["sealed"]
+
+    # A claim left by a dead replayer with our own (recycled) PID is still recovered
+    sealed = next(tmp_path.iterdir())
+    sealed.rename(tmp_path / f"{sealed.name}.claimed.{os.getpid()}")
+    other.recover_orphans()
+    assert _files(tmp_path) == ["sealed"]
+
+    writer = StrictWriter()
+    assert other.replay(writer) == 1
+    assert writer.stored == ["a"]
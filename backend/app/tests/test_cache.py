@@ -0,0 +1,365 @@
+# backend/app/tests/test_cache.py
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import TieredBackend
+from app.tests.fake_redis import FakeRedis, FakeRedisServer
+
+
+async def _workers(count=2):
+    server = FakeRedisServer()
+    backends = [TieredBackend(FakeRedis(server), reconnect_seconds=0.01) for _ in range(count)]
+    for backend in backends:
+        await backend.start()
+        await asyncio.wait_for(backend._subscribed.wait(), 1)
+    return server, backends
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_l2_is_shared_and_l1_serves_repeat_reads():
+    async def run():
+        server, (a, b) = await _workers()
+        await a.set("k", "v1", 60)
+        assert await b.get_with_ttl("k") == (59, "v1")  # L2 hit, copied into b's L1
+        calls = b.redis.calls
+        assert await b.get("k") == "v1"
+        assert b.redis.calls == calls  # L1 hit: no round trip
+        assert (b.stats["l2_hits"], b.stats["l1_hits"]) == (1, 1)
+        assert await a.get("missing") is None
+        for backend in (a, b):
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_set_on_one_worker_invalidates_the_others():
+    async def run():
+        server, (a, b) = await _workers()
+        await a.set("k", "v1", 60)
+        assert await b.get("k") == "v1"
+        await a.set("k", "v2", 60)
+        await _settle()
+        assert b.stats["invalidations"] == 2  # One per set from a
+        assert await b.get("k") == "v2"
+
+        await a.set("ns:x", "1", 60)
+        assert await b.get("ns:x") == "1"
+        assert await a.clear(namespace="ns:") == 1
+        await _settle()
+        assert await b.get("ns:x") is None
+        for backend in (a, b):
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_redis_outage_degrades_to_l1_and_resubscribe_flushes_it():
+    async def run():
+        server, (a, b) = await _workers()
+        await a.set("k", "v1", 60)
+        server.down = True
+        await _settle()
+        assert not a._subscribed.is_set()
+        assert await a.get("k") == "v1"  # Stale-tolerant fallback while Redis is gone
+        assert await a.get("other") is None
+        assert a.stats["errors"] >= 1
+
+        server.data["k"] = ("v2", None)  # Changed while a could not hear about it
+        server.down = False
+        await asyncio.wait_for(a._subscribed.wait(), 1)
+        assert await a.get("k") == "v2"
+        for backend in (a, b):
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_l2_errors_back_off_until_the_deadline_or_a_resubscribe():
+    async def run():
+        server = FakeRedisServer()
+        backend = TieredBackend(FakeRedis(server), reconnect_seconds=0.01, backoff_seconds=0.05)
+        server.down = True
+        assert await backend.get("k") is None
+        calls = backend.redis.calls
+        # Inside the back-off nothing waits on Redis: reads miss, writes stay in L1, locks are local
+        assert await backend.get("k") is None
+        await backend.set("k", "v", 60)
+        assert await backend.get("k") == "v"
+        assert await backend.acquire_lock("k", 1) is not None
+        assert await backend.wait_for("other", 1) == (0, None)
+        assert backend.redis.calls == calls
+        assert backend.stats["errors"] == 1 and backend.stats["l2_skipped"] >= 5
+        assert backend.status()["l2_backoff_seconds"] > 0
+
+        await asyncio.sleep(0.06)
+        await backend.get("k")
+        assert backend.redis.calls == calls + 1  # Deadline passed: Redis is tried again
+
+        # A successful resubscribe ends the back-off early
+        backend.backoff_seconds = 60
+        await backend.get("k")
+        server.down = False
+        await backend.start()
+        await asyncio.wait_for(backend._subscribed.wait(), 1)
+        server.data["k"] = ("v2", None)
+        assert await backend.get("k") == "v2"
+        await backend.stop()
+    asyncio.run(run())
+
+
+def test_l1_is_bounded_and_respects_ttl():
+    async def run():
+        backend = TieredBackend(FakeRedis(), l1_max_entries=2)
+        backend._subscribed.set()
+        for key in ("a", "b", "c"):
+            await backend.set(key, key, 60)
+        assert list(backend._l1) == ["b", "c"]
+        await backend.set("short", "x", 60)
+        backend._l1["short"] = (0.0, "x")  # Expired in L1
+        backend.redis.server.data.pop("short")
+        assert await backend.get("short") is None
+    asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_computation():
+    from fastapi_cache import FastAPICache
+    from app.core.cache import InstrumentedBackend, cache
+
+    calls = []
+
+    @cache(expire=60)
+    async def slow(n: int):
+        calls.append(n)
+        await asyncio.sleep(0.05)
+        return {"n": n}
+
+    async def run():
+        server, (backend,) = await _workers(1)
+        FastAPICache.init(InstrumentedBackend(backend), prefix="test")
+        try:
+            results = await asyncio.gather(*(slow(n=1) for _ in range(10)), slow(n=2))
+            assert results == [{"n": 1}] * 10 + [{"n": 2}]
+            assert sorted(calls) == [1, 2]
+            assert await slow(n=1) == {"n": 1}  # Now a plain hit
+            assert len(calls) == 2
+            assert not any(key.endswith(":lock") for key in server.data)  # Locks released
+        finally:
+            FastAPICache.reset()
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_etag_is_a_quoted_content_hash_and_revalidates_with_304():
+    import hashlib
+
+    from fastapi_cache import FastAPICache
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    from app.core.cache import InstrumentedBackend, cache
+
+    @cache(expire=60)
+    async def item(n: int):
+        return {"n": n}
+
+    def request(if_none_match=None):
+        headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+        return Request({"type": "http", "method": "GET", "path": "/item", "query_string": b"", "headers": headers})
+
+    async def run():
+        server, (backend,) = await _workers(1)
+        FastAPICache.init(InstrumentedBackend(backend), prefix="test")
+        try:
+            response = Response()
+            assert await item(n=1, request=request(), response=response) == {"n": 1}
+            etag = response.headers["ETag"]
+            [cached] = [value for key, (value, _) in server.data.items() if key.startswith("test:")]
+            assert etag == f'"{hashlib.md5(cached.encode()).hexdigest()}"'
+
+            # Weak comparison and lists of candidates, as If-None-Match allows
+            for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+                response = Response()
+                result = await item(n=1, request=request(header), response=response)
+                assert result is response and response.status_code == 304
+                assert response.headers["ETag"] == etag
+
+            response = Response()
+            assert await item(n=1, request=request('"other"'), response=response) == {"n": 1}
+            assert response.status_code == 200
+        finally:
+            FastAPICache.reset()
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_shared_computation_uses_its_own_session(monkeypatch):
+    from fastapi_cache import FastAPICache
+    from sqlalchemy.orm import Session
+
+    from app.core import cache as cache_module
+    from app.core.cache import InstrumentedBackend, cache, route_key_builder
+
+    opened = []
+
+    def session_factory():
+        session = Session()
+        opened.append(session)
+        return session
+
+    monkeypatch.setattr(cache_module, "SessionLocal", session_factory)
+    used = []
+
+    @cache(expire=60)
+    async def report(db: Session):
+        used.append(db)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    async def run():
+        server, (backend,) = await _workers(1)
+        FastAPICache.init(InstrumentedBackend(backend), prefix="test", key_builder=route_key_builder)
+        try:
+            request_session = Session()
+            leader = asyncio.ensure_future(report(db=request_session))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(report(db=Session()))
+            await asyncio.sleep(0.01)
+            # The leader's client goes away; get_db closes its session
+            leader.cancel()
+            request_session.close()
+            assert await follower == {"ok": True}
+        finally:
+            FastAPICache.reset()
+            await backend.stop()
+    asyncio.run(run())
+    # One computation, on a session of its own rather than either request's
+    assert used == opened and len(opened) == 1
+
+
+def test_lock_makes_other_workers_wait_for_the_result():
+    async def run():
+        server, (a, b) = await _workers()
+        token = await a.acquire_lock("k", 5)
+        assert token and await b.acquire_lock("k", 5) is None
+
+        async def finish():
+            await asyncio.sleep(0.05)
+            await a.set("k", "computed", 60)
+            await a.release_lock("k", token)
+
+        waited = asyncio.create_task(b.wait_for("k", 5))
+        await finish()
+        assert (await waited)[1] == "computed"
+
+        # A failed computation releases the lock without a value: waiters give up early
+        token = await a.acquire_lock("gone", 5)
+        waited = asyncio.create_task(b.wait_for("gone", 5))
+        await asyncio.sleep(0.01)
+        await a.release_lock("gone", token)
+        assert await asyncio.wait_for(waited, 1) == (0, None)
+        # No waiter events are left behind, whichever way the wait ended
+        assert b._waiters == {}
+        for backend in (a, b):
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes_once():
+    from fastapi_cache import FastAPICache
+    from starlette.responses import Response
+    from app.core.cache import InstrumentedBackend, cache
+
+    version = {"n": 0}
+
+    @cache(expire=10, stale_while_revalidate=50)
+    async def metrics():
+        version["n"] += 1
+        await asyncio.sleep(0.01)
+        return {"version": version["n"]}
+
+    async def get():
+        response = Response()
+        return await metrics(response=response), response.headers
+
+    async def run():
+        server, (backend,) = await _workers(1)
+        FastAPICache.init(InstrumentedBackend(backend), prefix="test")
+        try:
+            body, headers = await get()
+            assert (body, headers["x-cache"], headers["age"]) == ({"version": 1}, "MISS", "0")
+            assert headers["cache-control"] == "max-age=10, stale-while-revalidate=50"
+            (key,) = [k for k in server.data if not k.endswith(":lock")]
+            assert 59 <= (await backend.redis.pttl(key)) / 1000 <= 60  # Hard TTL
+
+            # Age the entry past its soft TTL in both tiers
+            value, _ = server.data[key]
+            server.data[key] = (value, time.monotonic() + 30)
+            backend._l1.clear()
+
+            results = await asyncio.gather(get(), get(), get())
+            assert [r[0] for r in results] == [{"version": 1}] * 3
+            assert {r[1]["x-cache"] for r in results} == {"STALE"}
+            assert int(results[0][1]["age"]) >= 29
+            assert results[0][1]["cache-control"].startswith("max-age=0")
+
+            await asyncio.sleep(0.05)  # Let the single background refresh finish
+            assert version["n"] == 2
+            body, headers = await get()
+            assert (body, headers["x-cache"]) == ({"version": 2}, "HIT")
+        finally:
+            FastAPICache.reset()
+            await backend.stop()
+    asyncio.run(run())
+
+
+def test_route_key_builder_ignores_injected_dependencies():
+    from fastapi import Depends, Query
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from sqlalchemy.orm import Session
+    from app.core.cache import route_key_builder
+
+    def current_admin():
+        return object()
+
+    async def recent(db: Session = None, limit: int = Query(5), _=Depends(current_admin)):
+        return []
+
+    FastAPICache.init(InMemoryBackend(), prefix="test")
+    try:
+        key = lambda **kwargs: route_key_builder(recent, "", kwargs=kwargs)
+        first = key(db=Session(), limit=5, _=object())
+        assert first == key(db=Session(), limit=5, _=object())  # New session and user each request
+        assert first != key(db=Session(), limit=10, _=object())
+        assert first.startswith(f"test::{recent.__module__}.")
+    finally:
+        FastAPICache.reset()
+
+
+def test_cache_stats_count_lookups_and_computations():
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from app.core.cache import cache, cache_stats, route_key_builder
+
+    @cache(expire=60)
+    async def users(limit: int = 5):
+        await asyncio.sleep(0.01)
+        return {"limit": limit}
+
+    async def run():
+        FastAPICache.init(InMemoryBackend(), prefix="stats", key_builder=route_key_builder)
+        try:
+            await asyncio.gather(users(limit=1), users(limit=1))
+            await users(limit=1)
+            await users(limit=2)
+        finally:
+            FastAPICache.reset()
+
+    asyncio.run(run())
+    (stats,) = [v for k, v in cache_stats.snapshot().items() if k.endswith(".users")]
+    assert (stats["hits"], stats["misses"], stats["computations"]) == (1, 3, 2)
+    assert stats["hit_ratio"] == 0.25
+    assert stats["compute_avg_seconds"] >= 0.01
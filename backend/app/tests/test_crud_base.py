@@ -0,0 +1,35 @@
+# backend/app/tests/test_crud_base.py
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.base import CRUDBase
+from app.db.base import Base
+from app.models.user import User
+
+
+class NewUser(BaseModel):
+    email: str
+    username: str
+    hashed_password: str
+
+
+def test_create_without_commit_joins_the_callers_transaction():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine)()
+    crud = CRUDBase(User)
+    try:
+        user = crud.create(db, obj_in=NewUser(email="a@x.io", username="a", hashed_password="x"), commit=False)
+        assert user.id is not None  # Flushed, so a feed entry can reference it
+        db.rollback()
+        assert db.query(User).count() == 0
+
+        crud.create(db, obj_in=NewUser(email="b@x.io", username="b", hashed_password="x"), commit=False)
+        db.commit()
+        crud.create(db, obj_in=NewUser(email="c@x.io", username="c", hashed_password="x"))
+        db.rollback()
+        assert sorted(u.username for u in db.query(User)) == ["b", "c"]
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,94 @@
+# backend/app/tests/test_dashboard_metrics.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.models.project import Project
+from app.models.analytics_rollup import AnalyticsRollupDaily
+from app.models.visitor_sketch import VisitorSketch
+from app.crud import crud_metrics
+
+TABLES = [
+    User.__table__,
+    UserSession.__table__,
+    Project.__table__,
+    AnalyticsRollupDaily.__table__,
+    VisitorSketch.__table__,
+]
+
+
+@pytest.fixture
+def db():
+    # SQLite understands COUNT(...) FILTER (WHERE ...), which is all this query needs
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _seed(db):
+    now = datetime.now(timezone.utc)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month = month_start - timedelta(days=10)
+
+    users = [
+        User(email="a@x.io", username="a", hashed_password="x", is_active=True, created_at=now - timedelta(minutes=5)),
+        User(email="b@x.io", username="b", hashed_password="x", is_active=True, created_at=last_month),
+        User(email="c@x.io", username="c", hashed_password="x", is_active=False, created_at=now - timedelta(minutes=5)),
+        User(email="d@x.io", username="d", hashed_password="x", is_active=True, created_at=last_month - timedelta(days=40)),
+    ]
+    db.add_all(users)
+    db.flush()
+
+    db.add_all([
+        UserSession(user_id=users[0].id, created_at=now - timedelta(minutes=1), last_activity=now - timedelta(minutes=2)),
+        UserSession(user_id=users[0].id, created_at=now - timedelta(minutes=3), last_activity=now - timedelta(minutes=4)),
+        UserSession(user_id=users[1].id, created_at=now - timedelta(hours=2), last_activity=now - timedelta(minutes=40)),
+        UserSession(user_id=users[3].id, created_at=now - timedelta(days=3), last_activity=now - timedelta(days=3)),
+    ])
+
+    for i, created in enumerate([now - timedelta(minutes=5), last_month, last_month, last_month - timedelta(days=40)]):
+        db.add(Project(
+            slug=f"p{i}", title=f"P{i}", short_description="s", long_description="l",
+            tech_stack={}, features=[], image_url="/x.png", created_at=created
+        ))
+    db.commit()
+
+
+def test_dashboard_matches_individual_endpoints(db):
+    _seed(db)
+
+    dashboard = crud_metrics.get_dashboard_metrics(db)
+
+    assert dashboard["visitors"] == crud_metrics.get_visitor_metrics(db)
+    assert dashboard["sessions"] == crud_metrics.get_session_metrics(db)
+    assert dashboard["users"] == crud_metrics.get_user_metrics(db)
+    assert dashboard["projects"] == crud_metrics.get_project_metrics(db)
+
+
+def test_dashboard_counts(db):
+    _seed(db)
+
+    dashboard = crud_metrics.get_dashboard_metrics(db)
+
+    assert dashboard["sessions"]["active"] == 1
+    assert dashboard["sessions"]["previousHourActive"] == 1
+    assert dashboard["users"]["total"] == 3
+    assert dashboard["projects"]["total"] == 4
+
+
+def test_dashboard_on_empty_database(db):
+    dashboard = crud_metrics.get_dashboard_metrics(db)
+
+    assert dashboard["sessions"] == crud_metrics.get_session_metrics(db)
+    assert dashboard["users"]["percentageChange"] == 0
+    assert dashboard["projects"]["total"] == 0
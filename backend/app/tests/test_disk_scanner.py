@@ -0,0 +1,90 @@
+# backend/app/tests/test_disk_scanner.py
+import os
+import shutil
+
+import pytest
+
+from app.services.disk_scanner import DiskScanner
+
+
+def _write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "cache"
+    _write(root / "top.bin", 4096)
+    _write(root / "a" / "one.bin", 8192)
+    _write(root / "a" / "deep" / "two.bin", 8192)
+    _write(root / "b" / "three.bin", 4096)
+    return root
+
+
+def _scanner(tmp_path, targets, **kwargs):
+    return DiskScanner(targets=targets, workers=2, include_docker=False,
+                       state_dir=str(tmp_path / "state"), **kwargs)
+
+
+def test_rescan_reuses_unchanged_directories(tmp_path, tree):
+    scanner = _scanner(tmp_path, {"package_cache": [str(tree)]})
+    first = scanner.scan()
+    assert first["categories"]["package_cache"]["bytes"] >= 24576
+    second = scanner.scan()
+    assert second["categories"]["package_cache"]["bytes"] == first["categories"]["package_cache"]["bytes"]
+    assert second["dirs_read"] == 1  # Only the target root, whose listing is always read
+    assert second["dirs_reused"] == 3
+
+
+def test_logs_are_restated_even_when_the_directory_did_not_change(tmp_path):
+    logs = tmp_path / "logs"
+    _write(logs / "app" / "app.log", 4096)
+    scanner = _scanner(tmp_path, {"logs": [str(logs)]})
+    before = scanner.scan()["categories"]["logs"]["bytes"]
+    mtime = os.stat(logs / "app").st_mtime_ns
+    with open(logs / "app" / "app.log", "ab") as f:
+        f.write(b"y" * 65536)
+    assert os.stat(logs / "app").st_mtime_ns == mtime
+    assert scanner.scan()["categories"]["logs"]["bytes"] >= before + 65536
+
+
+def test_removed_subtrees_are_pruned_from_the_cache(tmp_path, tree):
+    scanner = _scanner(tmp_path, {"package_cache": [str(tree)]})
+    scanner.scan()
+    assert str(tree / "a" / "deep") in scanner._cache
+
+    shutil.rmtree(tree / "a")
+    shutil.rmtree(tree / "b")
+    (tree / "b").mkdir()
+    scanner.scan()
+    assert not any(path.startswith(str(tree / "a")) for path in scanner._cache)
+
+    # A removed nested directory is noticed through its parent's changed listing
+    _write(tree / "b" / "x" / "y" / "z.bin", 10)
+    scanner.scan()
+    shutil.rmtree(tree / "b" / "x")
+    scanner.scan()
+    assert set(scanner._cache) == {str(tree), str(tree / "b")}
+
+    # A whole target going away drops everything under it
+    shutil.rmtree(tree)
+    assert scanner.scan()["categories"] == {"package_cache": {"bytes": 0, "paths": {}}}
+    assert scanner._cache == {}
+
+
+def test_only_one_worker_scans_and_the_others_read_its_result(tmp_path, tree):
+    targets = {"package_cache": [str(tree)]}
+    first, second = _scanner(tmp_path, targets), _scanner(tmp_path, targets)
+    assert first._is_scanner()
+    assert not second._is_scanner()
+    assert second.latest() == {}
+
+    result = first.scan()
+    assert second.latest() == result
+    assert second.category_bytes("package_cache") == result["categories"]["package_cache"]["bytes"]
+
+    # When the scanning worker exits, another one takes over
+    first.stop()
+    assert second._is_scanner()
+    second.stop()
@@ -0,0 +1,156 @@
+# backend/app/tests/test_docker_client.py
+import json
+import queue
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.docker_client import DockerEngineClient, DockerError, DockerStateCache, format_ports
+
+WEB = {
+    "Id": "aaa111", "Names": ["/web"], "State": "running", "Status": "Up 2 hours",
+    "Ports": [{"IP": "0.0.0.0", "PrivatePort": 8000, "PublicPort": 8000, "Type": "tcp"}],
+}
+DB = {"Id": "bbb222", "Names": ["/db"], "State": "running", "Status": "Up 5 minutes", "Ports": [{"PrivatePort": 5432, "Type": "tcp"}]}
+
+
+class FakeDockerDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Speaks just enough of the Engine API for the client, over a real unix socket"""
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.containers = {"aaa111": WEB}
+        self.events = queue.Queue()
+        self.connections = 0
+        self.requests = []
+        super().__init__(path, Handler)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like dockerd
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.requests.append(url.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/containers/json"):
+            containers = list(self.server.containers.values())
+            if "filters" in query:
+                wanted = json.loads(query["filters"][0]).get("id", [])
+                containers = [c for c in containers if c["Id"] in wanted]
+            self._json(containers)
+        elif url.path.endswith("/system/df"):
+            self._json({
+                "LayersSize": 2 * 1024**3,
+                "Images": [{"Size": 1024**3, "Containers": 0}, {"Size": 512 * 1024**2, "Containers": 1}],
+                "Containers": [{"SizeRw": 1024**2}],
+                "Volumes": [{"UsageData": {"Size": 3 * 1024**2}}],
+                "BuildCache": [{"Size": 256 * 1024**2}],
+            })
+        elif url.path.endswith("/events"):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            while True:
+                event = self.server.events.get()
+                if event is None:
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                line = json.dumps(event).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+        else:
+            self._json({"message": "not found"}, status=404)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = FakeDockerDaemon(str(tmp_path / "docker.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.events.put(None)
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection(daemon):
+    client = DockerEngineClient(daemon.server_address)
+
+    assert [c["Id"] for c in client.list_containers()] == ["aaa111"]
+    assert client.system_df()["LayersSize"] == 2 * 1024**3
+    assert client.list_containers(filters={"id": ["missing"]}) == []
+    assert daemon.connections == 1
+    client.close()
+
+
+def test_missing_socket_raises_docker_error(tmp_path):
+    client = DockerEngineClient(str(tmp_path / "nope.sock"))
+    with pytest.raises(DockerError):
+        client.list_containers()
+
+
+def test_state_cache_follows_events(daemon):
+    cache = DockerStateCache(DockerEngineClient(daemon.server_address), resync_seconds=3600)
+    assert "error" in cache.status()
+
+    cache.resync()
+    assert cache.status() == {
+        "containers": [{"name": "web", "status": "Up 2 hours", "ports": "0.0.0.0:8000->8000/tcp"}],
+        "total_running": 1,
+    }
+
+    daemon.containers["bbb222"] = DB
+    cache.apply_event({"Type": "container", "Action": "start", "id": "bbb222"})
+    del daemon.containers["aaa111"]
+    cache.apply_event({"Type": "container", "Action": "die", "id": "aaa111"})
+    cache.apply_event({"Type": "network", "Action": "connect", "id": "ccc"})
+
+    status = cache.status()
+    assert [c["name"] for c in status["containers"]] == ["db"]
+    assert status["containers"][0]["ports"] == "5432/tcp"
+    assert cache.stats["events"] == 2
+
+
+def test_watcher_thread_applies_streamed_events(daemon):
+    cache = DockerStateCache(DockerEngineClient(daemon.server_address), resync_seconds=3600)
+    cache.start()
+    try:
+        assert cache.ready.wait(5)
+        daemon.containers["bbb222"] = DB
+        daemon.events.put({"Type": "container", "Action": "start", "id": "bbb222"})
+        for _ in range(100):
+            if cache.status()["total_running"] == 2:
+                break
+            threading.Event().wait(0.05)
+        assert cache.status()["total_running"] == 2
+    finally:
+        daemon.events.put(None)
+        cache.stop()
+
+
+def test_format_ports_matches_docker_ps():
+    ports = [
+        {"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"},
+        {"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"},
+        {"PrivatePort": 53, "Type": "udp"},
+    ]
+    assert format_ports(ports) == "0.0.0.0:8080->80/tcp, 53/udp"
@@ -0,0 +1,130 @@
+# backend/app/tests/test_host_tsdb.py
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+from app.services import host_tsdb as host_tsdb_module
+from app.services.host_tsdb import HostMetricsStore, host_tsdb_maintenance_loop
+
+DAY0 = datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()
+DAY = 86400
+
+
+def _round(cpu):
+    return {"system": {"data": {"cpu": {"usage_percent": cpu, "load_average": [0.1]}}}}
+
+
+def _store(tmp_path, **kwargs):
+    return HostMetricsStore(directory=str(tmp_path), flush_seconds=3600, retention_days=30,
+                            downsample_after_days=7, **kwargs)
+
+
+def _fill_day(store, day_start, samples=20, step=30):
+    for n in range(samples):
+        store.record(_round(float(n)), timestamp=day_start + n * step)
+    store.flush()
+
+
+def test_maintenance_compacts_downsamples_and_expires(tmp_path):
+    store = _store(tmp_path)
+    for day in (0, 25, 36, 40):
+        _fill_day(store, DAY0 + day * DAY)
+
+    store.maintain(now=DAY0 + 40 * DAY + 60)
+    # Past retention, past downsampling, closed, today
+    assert {day: segment.level for day, segment in store.segments().items()} == {
+        "20261026": "d60", "20261106": "c", "20261110": "raw",
+    }
+    assert store.stats["deleted_segments"] == 1 and store.stats["compactions"] == 2
+    timestamps, columns = store.query(DAY0 + 25 * DAY, DAY0 + 26 * DAY - 1)
+    # 30s samples averaged per minute
+    assert list(columns["cpu_percent"][:2]) == [0.5, 2.5] and len(timestamps) == 10
+    store.close()
+
+
+def test_rewrite_runs_outside_the_lock(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    _fill_day(store, DAY0)
+
+    encoding = threading.Event()
+    proceed = threading.Event()
+    real_encode = host_tsdb_module._encode_block
+
+    def slow_encode(timestamps, columns):
+        if len(timestamps) == 20:  # The compaction's block, not the collector's
+            encoding.set()
+            assert proceed.wait(5)
+        return real_encode(timestamps, columns)
+
+    monkeypatch.setattr(host_tsdb_module, "_encode_block", slow_encode)
+    maintainer = threading.Thread(target=store.maintain, kwargs={"now": DAY0 + DAY + 60})
+    maintainer.start()
+    try:
+        assert encoding.wait(5)
+        # The collector is not stalled while the day is being re-encoded
+        recorded = threading.Thread(target=store.record, args=(_round(1.0),), kwargs={"timestamp": DAY0 + DAY + 5})
+        recorded.start()
+        recorded.join(1)
+        assert not recorded.is_alive()
+        assert store.query(DAY0, DAY0 + DAY)[0]  # Readers still see the raw day
+    finally:
+        proceed.set()
+        maintainer.join(5)
+    assert store.segments()["20261001"].level == "c"
+    assert list(tmp_path.glob("*.tmp")) == []
+    store.close()
+
+
+def test_rewrite_is_abandoned_if_the_source_grew(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    _fill_day(store, DAY0)
+    segment = store.segments()["20261001"]
+    real_encode = host_tsdb_module._encode_block
+
+    def encode_then_append(timestamps, columns):
+        block = real_encode(timestamps, columns)
+        with open(segment.path, "ab") as f:
+            f.write(real_encode([int(DAY0 + 3000)], [[1.0]] * len(store.fields)))
+        return block
+
+    monkeypatch.setattr(host_tsdb_module, "_encode_block", encode_then_append)
+    store._rewrite(segment, "c")
+    assert store.segments()["20261001"].level == "raw"
+    assert list(tmp_path.glob("*.tmp")) == []
+    store.close()
+
+
+def test_closed_days_are_decoded_once(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    for day in range(3):
+        _fill_day(store, DAY0 + day * DAY)
+    store.maintain(now=DAY0 + 3 * DAY + 60)
+    assert {s.level for s in store.segments().values()} == {"c"}
+
+    first = store.history(3 * DAY, points=3, now=DAY0 + 3 * DAY)
+    decoded = []
+    real_blocks = host_tsdb_module.Segment.blocks
+    monkeypatch.setattr(host_tsdb_module.Segment, "blocks",
+                        lambda self, start, end: decoded.append(self.day) or real_blocks(self, start, end))
+    assert store.history(3 * DAY, points=3, now=DAY0 + 3 * DAY) == first
+    assert decoded == []
+    assert first["series"]["cpu_percent"]["max"] == [19.0, 19.0, 19.0]
+    assert store.status()["cached_days"] == 3
+    store.close()
+
+
+def test_maintenance_runs_on_its_own_task_not_in_record(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    threads = []
+    monkeypatch.setattr(store, "maintain", lambda now=None: threads.append(threading.get_ident()))
+    _fill_day(store, DAY0)
+    assert threads == []  # The collector thread only appends and flushes
+
+    async def run():
+        task = asyncio.create_task(host_tsdb_maintenance_loop(store, interval_seconds=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(threads) >= 2 and threading.get_ident() not in threads
+    store.close()
@@ -0,0 +1,57 @@
+# backend/app/tests/test_metadata_dictionary.py
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.metadata_value import AnalyticsMetadataValue
+from app.services.metadata_dictionary import MetadataDictionary
+
+
+@pytest.fixture
+def db():
+    # SQLite speaks INSERT ... ON CONFLICT DO NOTHING too
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[AnalyticsMetadataValue.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_ids_are_cached_only_after_commit(db):
+    dictionary = MetadataDictionary(fields=["referrer"])
+    ids = dictionary.lookup_ids(db, [("referrer", "https://a.example")])
+    assert dictionary._ids == {}
+
+    db.rollback()
+    # The row is gone, so a cached id would now dangle
+    assert db.scalar(select(func.count()).select_from(AnalyticsMetadataValue)) == 0
+    assert dictionary._ids == {}
+
+    ids = dictionary.lookup_ids(db, [("referrer", "https://b.example")])
+    db.commit()
+    assert dictionary._ids == ids
+    assert dictionary.lookup_ids(db, [("referrer", "https://b.example")]) == ids
+    assert dictionary.stats == {"hits": 1, "misses": 2}
+
+
+def test_dictionaries_only_see_their_own_pending_ids(db):
+    first, second = MetadataDictionary(fields=["referrer"]), MetadataDictionary(fields=["title"])
+    first.lookup_ids(db, [("referrer", "r")])
+    second.lookup_ids(db, [("title", "t")])
+    db.commit()
+    assert list(first._ids) == [("referrer", "r")]
+    assert list(second._ids) == [("title", "t")]
+
+
+def test_encode_decode_round_trip(db):
+    dictionary = MetadataDictionary(fields=["referrer", "title"])
+    metadata = {"referrer": "https://a.example", "title": "Home", "scroll": 0.5, "long": "x" * 2000}
+    [encoded] = dictionary.encode_rows(db, [{"target_id": "home", "metadata_json": metadata}])
+    db.commit()
+    assert encoded["metadata_json"] == {"scroll": 0.5, "long": "x" * 2000}
+    assert len(encoded["metadata_refs"]) == 2
+    assert dictionary.decode(db, encoded["metadata_refs"], encoded["metadata_json"]) == metadata
@@ -0,0 +1,93 @@
+# backend/app/tests/test_metrics_history.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.analytics_rollup import AnalyticsRollupDaily
+from app.models.metrics_snapshot import MetricsSnapshot
+from app.models.project import Project
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.models.visitor_sketch import VisitorSketch
+from app.services import metrics_history
+
+TABLES = [
+    User.__table__, UserSession.__table__, Project.__table__,
+    AnalyticsRollupDaily.__table__, VisitorSketch.__table__, MetricsSnapshot.__table__,
+]
+T0 = datetime(2026, 10, 18, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _snapshot(at, active):
+    return MetricsSnapshot(
+        captured_at=at, visitors_month=10, active_sessions=active, sessions_today=3,
+        users_total=2, projects_total=1, interactions_total=100,
+    )
+
+
+def test_align_floors_to_the_interval():
+    assert metrics_history._align(T0 + timedelta(minutes=7, seconds=13), 300) == T0 + timedelta(minutes=5)
+    assert metrics_history._align(T0, 300) == T0
+
+
+def test_one_snapshot_per_interval_and_retention(db):
+    db.add(User(email="a@x.io", username="a", hashed_password="x", is_active=True, created_at=T0))
+    db.add(_snapshot(T0 - timedelta(days=30), 0))
+    db.commit()
+
+    assert metrics_history.take_snapshot(db, now=T0 + timedelta(seconds=10), interval_seconds=300, retention_days=7)
+    # A second worker in the same interval finds it taken
+    assert not metrics_history.take_snapshot(db, now=T0 + timedelta(seconds=200), interval_seconds=300, retention_days=7)
+    assert metrics_history.take_snapshot(db, now=T0 + timedelta(seconds=310), interval_seconds=300, retention_days=7)
+
+    rows = db.query(MetricsSnapshot).order_by(MetricsSnapshot.captured_at).all()
+    assert [r.captured_at.replace(tzinfo=timezone.utc) for r in rows] == [T0, T0 + timedelta(minutes=5)]
+    assert rows[0].users_total == 1
+
+
+def test_history_returns_raw_points_when_they_fit(db):
+    db.add_all([_snapshot(T0 + timedelta(minutes=5 * i), i) for i in range(6)])
+    db.commit()
+    history = metrics_history.get_history(
+        db, T0 + timedelta(minutes=5), T0 + timedelta(minutes=20), max_points=10, interval_seconds=300
+    )
+    assert history["bucketSeconds"] == 300
+    assert [p["activeSessions"] for p in history["points"]] == [1, 2, 3]
+    assert set(history["points"][0]) == {"timestamp", *metrics_history.SNAPSHOT_FIELDS.values()}
+
+
+class RecordingSession:
+    def __init__(self):
+        self.sql = []
+
+    def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return []
+
+
+def test_history_downsamples_to_max_points():
+    db = RecordingSession()
+    history = metrics_history.get_history(db, T0, T0 + timedelta(days=7), max_points=100, interval_seconds=300)
+    # 2016 snapshots into at most 100 buckets: 21 intervals per bucket
+    assert history["bucketSeconds"] == 300 * 21
+    assert 7 * 86400 / history["bucketSeconds"] <= 100
+    [sql] = db.sql
+    assert "round(avg(metrics_snapshots.active_sessions))" in sql
+    assert "max(metrics_snapshots.interactions_total)" in sql
+    assert "GROUP BY" in sql
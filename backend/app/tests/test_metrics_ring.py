@@ -0,0 +1,81 @@
+# backend/app/tests/test_metrics_ring.py
+import math
+
+import pytest
+
+from app.services.metrics_ring import HISTORY_FIELDS, RingBuffer, SystemMetricsHistory, bucket_plan, parse_window
+
+T0 = 1_800_000_000.0  # Minute and hour aligned
+
+
+def _round(cpu, memory=None):
+    system = {"cpu": {"usage_percent": cpu, "load_average": [0.5, 0.4, 0.3]}}
+    if memory is not None:
+        system["memory"] = {"usage_percent": memory}
+    return {"system": {"data": system}, "network": {"data": {"bytes_recv_per_sec": 10.0}}}
+
+
+@pytest.mark.parametrize("window, seconds", [("30s", 30), ("15m", 900), ("6H", 21600), (" 1d ", 86400)])
+def test_parse_window(window, seconds):
+    assert parse_window(window) == seconds
+
+
+@pytest.mark.parametrize("window", ["", "15", "m", "0s", "2d", "1w", "-5m"])
+def test_parse_window_rejects_bad_or_out_of_range(window):
+    with pytest.raises(ValueError):
+        parse_window(window)
+
+
+def test_bucket_plan_never_goes_below_the_sample_resolution():
+    assert bucket_plan(3600, 60, 5, T0 + 30) == (60, T0 - 3600)
+    assert bucket_plan(60, 60, 5, T0) == (5, T0 - 60)
+
+
+def test_ring_wraps_and_reads_back_in_order():
+    ring = RingBuffer(3, ["v"])
+    for n in range(5):
+        ring.append(T0 + n, {"v": float(n)})
+    timestamps, columns = ring.since(0)
+    assert list(timestamps) == [T0 + 2, T0 + 3, T0 + 4]
+    assert list(columns["v"]) == [2.0, 3.0, 4.0]
+    timestamps, columns = ring.since(T0 + 3)
+    assert list(columns["v"]) == [3.0, 4.0]
+
+
+def test_missing_values_are_nan_gaps():
+    ring = RingBuffer(2, ["a", "b"])
+    ring.append(T0, {"a": 1.0})
+    _, columns = ring.since(0)
+    assert columns["a"][0] == 1.0 and math.isnan(columns["b"][0])
+
+
+def test_raw_tier_buckets_min_max_avg_and_skips_gaps():
+    history = SystemMetricsHistory(sample_interval=5, raw_seconds=3600)
+    for n, cpu in enumerate([10.0, 30.0, 20.0, 50.0]):
+        history.record(_round(cpu, memory=40.0 if n < 2 else None), timestamp=T0 + 5 * n)
+
+    result = history.query(20, points=2, now=T0 + 19)
+    assert result["resolution"] == "raw" and result["bucket_seconds"] == 10
+    assert result["timestamps"] == [T0, T0 + 10]
+    assert result["series"]["cpu_percent"] == {"min": [10.0, 20.0], "max": [30.0, 50.0], "avg": [20.0, 35.0]}
+    # A field missing from a whole bucket is None rather than NaN
+    assert result["series"]["memory_percent"]["avg"] == [40.0, None]
+    assert set(result["series"]) == set(HISTORY_FIELDS)
+
+
+def test_long_windows_merge_closed_minutes():
+    history = SystemMetricsHistory(sample_interval=30, raw_seconds=60)
+    for minute, samples in enumerate([[10.0, 20.0], [60.0, 90.0], [30.0, 30.0]]):
+        for second, cpu in zip((0, 30), samples):
+            history.record(_round(cpu), timestamp=T0 + 60 * minute + second)
+    # The fourth minute is still open; its samples so far count too
+    history.record(_round(0.0), timestamp=T0 + 180)
+
+    result = history.query(3600, points=30, now=T0 + 180)
+    assert result["resolution"] == "1m" and result["bucket_seconds"] == 120
+    assert result["timestamps"] == [T0, T0 + 120]
+    cpu = result["series"]["cpu_percent"]
+    assert cpu == {"min": [10.0, 0.0], "max": [90.0, 30.0], "avg": [45.0, 20.0]}
+    # Reading the open minute does not close it
+    history.record(_round(60.0), timestamp=T0 + 210)
+    assert history.query(3600, points=30, now=T0 + 210)["series"]["cpu_percent"]["avg"] == [45.0, 30.0]
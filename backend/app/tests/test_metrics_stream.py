@@ -0,0 +1,108 @@
+# backend/app/tests/test_metrics_stream.py
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import metrics as endpoints
+from app.services.metrics_stream import MetricsBroadcaster, diff
+
+
+def _parse(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+async def _next(stream, timeout=1.0):
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+
+def test_diff_reports_changed_added_and_removed_leaves():
+    old = {"cpu": {"percent": 10, "cores": 4}, "disk": {"free": 1}, "gone": 1}
+    new = {"cpu": {"percent": 12, "cores": 4}, "disk": {"free": 1}, "added": {"x": 1}}
+    assert diff(old, new) == {"cpu": {"percent": 12}, "added": {"x": 1}, "gone": None}
+    # Nested removals and a dict replaced by a scalar
+    assert diff({"a": {"b": 1, "c": 2}}, {"a": {"b": 1}}) == {"a": {"c": None}}
+    assert diff({"a": {"b": 1}}, {"a": 3}) == {"a": 3}
+    assert diff(new, new) == {}
+
+
+def test_caught_up_subscribers_get_deltas_and_laggards_one_full_frame():
+    async def run():
+        broadcaster = MetricsBroadcaster(heartbeat_seconds=60)
+        broadcaster.publish({"cpu": 1, "mem": 1})
+        stream = broadcaster.stream()
+        assert await _next(stream) == "retry: 5000\n\n"
+        assert _parse(await _next(stream)) == ("full", 1, {"cpu": 1, "mem": 1})
+
+        broadcaster.publish({"cpu": 2, "mem": 1})
+        assert _parse(await _next(stream)) == ("delta", 2, {"cpu": 2})
+
+        # Three versions published while the client was not reading
+        for cpu in (3, 4, 5):
+            broadcaster.publish({"cpu": cpu, "mem": 2})
+        assert _parse(await _next(stream)) == ("full", 5, {"cpu": 5, "mem": 2})
+        # ... and nothing else is queued behind it
+        pending = asyncio.ensure_future(_next(stream, timeout=5))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+
+        broadcaster.publish({"cpu": 6, "mem": 2})
+        assert _parse(await pending) == ("delta", 6, {"cpu": 6})
+        assert broadcaster.stats["skipped_versions"] == 2
+        # An unchanged snapshot is not a new version
+        broadcaster.publish({"cpu": 6, "mem": 2})
+        assert broadcaster.version == 6
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_full_frame_is_encoded_once_per_version():
+    async def run():
+        broadcaster = MetricsBroadcaster(heartbeat_seconds=60)
+        broadcaster.publish({"cpu": 1})
+        streams = [broadcaster.stream() for _ in range(3)]
+        frames = []
+        for stream in streams:
+            await _next(stream)
+            frames.append(await _next(stream))
+        assert frames[0] is frames[1] is frames[2]
+        for stream in streams:
+            await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_idle_streams_send_keepalives():
+    async def run():
+        broadcaster = MetricsBroadcaster(heartbeat_seconds=0.01)
+        stream = broadcaster.stream()
+        await _next(stream)
+        assert await _next(stream) == ": keepalive\n\n"
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_subscriber_cap_rejects_with_503(monkeypatch):
+    broadcaster = MetricsBroadcaster(heartbeat_seconds=60, max_subscribers=1)
+    monkeypatch.setattr(endpoints, "metrics_broadcaster", broadcaster)
+
+    async def run():
+        response = await endpoints.stream_metrics(_=None)
+        stream = response.body_iterator
+        await _next(stream)
+        assert broadcaster.subscribers == 1
+
+        with pytest.raises(HTTPException) as e:
+            await endpoints.stream_metrics(_=None)
+        assert e.value.status_code == 503 and e.value.headers["Retry-After"] == "30"
+
+        # A disconnect frees the slot
+        await stream.aclose()
+        assert broadcaster.subscribers == 0
+        assert not broadcaster.full
+
+    asyncio.run(run())
@@ -0,0 +1,87 @@
+# backend/app/tests/test_network_stats.py
+import pytest
+
+from app.services import network_stats
+from app.services.network_stats import NetworkSampler, read_interface_counters, read_socket_summary
+
+DEV = """\
+Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:{lo_rx}     100    0    0    0     0          0         0 {lo_tx}     100    0    0    0     0       0          0
+  eth0:{eth_rx} 2000    0    0    0     0          0         0  {eth_tx}   1500    0    0    0     0       0          0
+"""
+
+SNMP = """\
+Ip: Forwarding DefaultTTL InReceives
+Ip: 1 64 12345
+Tcp: RtoAlgorithm RtoMin RtoMax MaxConn ActiveOpens PassiveOpens AttemptFails EstabResets CurrEstab InSegs OutSegs RetransSegs InErrs OutRsts
+Tcp: 1 200 120000 -1 50 60 1 2 7 9000 8000 42 0 3
+Udp: InDatagrams NoPorts InErrors OutDatagrams
+Udp: 10 0 0 10
+"""
+
+SOCKSTAT = """\
+sockets: used 120
+TCP: inuse 9 orphan 1 tw 4 alloc 12 mem 3
+UDP: inuse 2 mem 1
+"""
+
+SOCKSTAT6 = """\
+TCP6: inuse 3
+UDP6: inuse 1
+"""
+
+
+def _write_proc(path, lo=(1000, 1000), eth=(50000, 20000), sockstat6=True):
+    path.mkdir(exist_ok=True)
+    (path / "dev").write_text(DEV.format(lo_rx=lo[0], lo_tx=lo[1], eth_rx=eth[0], eth_tx=eth[1]))
+    (path / "snmp").write_text(SNMP)
+    (path / "sockstat").write_text(SOCKSTAT)
+    if sockstat6:
+        (path / "sockstat6").write_text(SOCKSTAT6)
+    return str(path)
+
+
+def test_interface_counters_sum_every_interface(tmp_path):
+    counters = read_interface_counters(_write_proc(tmp_path))
+    assert counters == {"bytes_recv": 51000, "packets_recv": 2100, "bytes_sent": 21000, "packets_sent": 1600}
+
+
+@pytest.mark.parametrize("with_ipv6, tcp_sockets, udp_sockets", [(True, 12, 3), (False, 9, 2)])
+def test_socket_summary_reads_kernel_aggregates(tmp_path, with_ipv6, tcp_sockets, udp_sockets):
+    summary = read_socket_summary(_write_proc(tmp_path, sockstat6=with_ipv6))
+    assert summary == {
+        "established": 7, "time_wait": 4, "orphaned": 1,
+        "tcp_sockets": tcp_sockets, "udp_sockets": udp_sockets, "retransmitted_segments": 42,
+    }
+
+
+def test_sampler_turns_counters_into_rates(tmp_path, monkeypatch):
+    clock = iter([100.0, 102.0, 104.0])
+    monkeypatch.setattr(network_stats.time, "monotonic", lambda: next(clock))
+    proc = _write_proc(tmp_path)
+    sampler = NetworkSampler(proc_net=proc)
+    assert sampler.use_proc
+
+    first = sampler.sample()
+    assert first["bytes_recv_per_sec"] == 0.0 and first["sample_interval_seconds"] == 0.0
+    assert first["active_connections"] == 7 and first["total_connections"] == 15
+    assert first["tcp"] == {"established": 7, "time_wait": 4, "orphaned": 1, "retransmitted_segments": 42}
+
+    _write_proc(tmp_path, eth=(54000, 21000))
+    second = sampler.sample()
+    assert second["bytes_recv_per_sec"] == 2000.0
+    assert second["bytes_sent_per_sec"] == 500.0
+    assert second["sample_interval_seconds"] == 2.0
+
+    # An interface disappearing shrinks the totals; that is not a negative rate
+    _write_proc(tmp_path, lo=(0, 0), eth=(54000, 21000))
+    assert sampler.sample()["bytes_recv_per_sec"] == 0.0
+
+
+def test_sampler_falls_back_to_psutil_without_proc(tmp_path):
+    sampler = NetworkSampler(proc_net=str(tmp_path / "missing"))
+    assert not sampler.use_proc
+    sample = sampler.sample()
+    assert sample["active_connections"] == 0
+    assert sample["bytes_recv"] >= 0
@@ -0,0 +1,98 @@
+# backend/app/tests/test_project_etags.py
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.db.base import Base
+from app.models.project import Project
+from app.api.v1.endpoints.projects import read_project_by_slug, read_projects
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    Base.metadata.create_all(engine, tables=[Project.__table__])
+    session = sessionmaker(bind=engine)()
+    for slug in ("alpha", "beta"):
+        session.add(Project(
+            slug=slug, title=slug.title(), short_description="s", long_description="x" * 5000,
+            tech_stack={"Backend": ["FastAPI"]}, features=[], image_url="/img.png",
+        ))
+    session.commit()
+    statements.clear()
+    session.statements = statements
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def _get_project(db, slug, if_none_match=None):
+    response = Response()
+    result = read_project_by_slug(request=_request(if_none_match), response=response, db=db, slug=slug)
+    return result, response
+
+
+def test_project_etag_round_trip_skips_loading_the_row(db):
+    project, response = _get_project(db, "alpha")
+    etag = response.headers["etag"]
+    assert project.slug == "alpha"
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    db.statements.clear()
+    result, _ = _get_project(db, "alpha", if_none_match=etag)
+    assert result.status_code == 304 and result.headers["etag"] == etag
+    assert len(db.statements) == 1 and "long_description" not in db.statements[0]
+
+    # Weak comparison and lists are accepted
+    assert _get_project(db, "alpha", if_none_match=f'"nope", W/{etag}')[0].status_code == 304
+
+
+def test_project_etag_changes_with_version(db):
+    _, response = _get_project(db, "alpha")
+    etag = response.headers["etag"]
+
+    project = db.query(Project).filter(Project.slug == "alpha").one()
+    project.title = "Alpha 2"
+    project.version = Project.version + 1
+    db.commit()
+
+    result, response = _get_project(db, "alpha", if_none_match=etag)
+    assert result.title == "Alpha 2"
+    assert response.headers["etag"] != etag
+    with pytest.raises(HTTPException):
+        _get_project(db, "missing")
+
+
+def test_catalog_etag_tracks_page_contents(db):
+    response = Response()
+    projects = read_projects(request=_request(), response=response, db=db, skip=0, limit=100)
+    etag = response.headers["etag"]
+    assert [p.slug for p in projects] == ["alpha", "beta"]
+
+    db.statements.clear()
+    result = read_projects(request=_request(etag), response=Response(), db=db, skip=0, limit=100)
+    assert result.status_code == 304
+    assert len(db.statements) == 1 and "long_description" not in db.statements[0]
+
+    other_page = Response()
+    read_projects(request=_request(), response=other_page, db=db, skip=1, limit=100)
+    assert other_page.headers["etag"] != etag
+
+    db.delete(db.query(Project).filter(Project.slug == "beta").one())
+    db.commit()
+    fresh = Response()
+    assert len(read_projects(request=_request(etag), response=fresh, db=db, skip=0, limit=100)) == 1
+    assert fresh.headers["etag"] != etag
@@ -0,0 +1,219 @@
+# backend/app/tests/test_prometheus.py
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+
+import pytest
+from fastapi import FastAPI
+
+from app.utils.prometheus import Counter, Gauge, Histogram, Registry, WorkerSnapshots
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+
+def _unescape(value):
+    return re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def parse(text):
+    """Plain parser for the 0.0.4 text format: {(name, labels): value} plus declared types"""
+    samples, types = {}, {}
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+            continue
+        if line.startswith("#") or not line:
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"Unparseable line: {line!r}"
+        name, labels, value = match.groups()
+        pairs = tuple((k, _unescape(v)) for k, v in LABEL.findall(labels or ""))
+        key = (name, tuple(sorted(pairs)))
+        assert key not in samples, f"Duplicate series: {line!r}"
+        samples[key] = float(value)
+    return samples, types
+
+
+def test_counters_gauges_and_escaping():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ["path"], registry)
+    depth = Gauge("queue_depth", "Queue depth", (), registry)
+    stats = {"hits": 7}
+    hits = Counter("hits_total", "Hits", (), registry)
+    hits.labels().set_function(lambda: stats["hits"])
+
+    requests.labels('/a "quoted"\npath\\').inc()
+    requests.labels('/a "quoted"\npath\\').inc(2)
+    depth.set(10)
+    depth.dec(3)
+    stats["hits"] = 9
+
+    samples, types = parse(registry.render())
+    assert types == {"requests_total": "counter", "queue_depth": "gauge", "hits_total": "counter"}
+    assert samples[("requests_total", (("path", '/a "quoted"\npath\\'),))] == 3
+    assert samples[("queue_depth", ())] == 7
+    assert samples[("hits_total", ())] == 9
+    with pytest.raises(ValueError):
+        requests.labels("a", "b")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram("latency_seconds", "Latency", ["route"], registry, buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("/x").observe(value)
+
+    samples, types = parse(registry.render())
+    assert types["latency_seconds"] == "histogram"
+    bucket = lambda le: samples[("latency_seconds_bucket", (("le", le), ("route", "/x")))]
+    assert (bucket("0.1"), bucket("1"), bucket("+Inf")) == (2, 3, 4)
+    assert samples[("latency_seconds_count", (("route", "/x"),))] == 4
+    assert samples[("latency_seconds_sum", (("route", "/x"),))] == pytest.approx(3.65)
+
+
+def test_concurrent_increments_are_not_lost():
+    registry = Registry()
+    counter = Counter("work_total", "Work", (), registry)
+    latency = Histogram("work_seconds", "Work latency", (), registry, buckets=(1.0,))
+
+    def worker():
+        for _ in range(20000):
+            counter.inc()
+            latency.observe(0.5)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    samples, _ = parse(registry.render())
+    assert samples[("work_total", ())] == 160000
+    assert samples[("work_seconds_count", ())] == 160000
+
+
+def test_middleware_labels_by_route_template():
+    from app.middleware.request_metrics import RequestMetricsMiddleware
+    from app.services.prometheus_metrics import registry
+
+    api = FastAPI()
+
+    @api.get("/test-items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    api.add_middleware(RequestMetricsMiddleware)
+
+    async def get(path):
+        scope = {
+            "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "headers": [], "http_version": "1.1", "scheme": "http", "server": ("test", 80), "root_path": "",
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await api(scope, receive, send)
+        return messages[0]["status"]
+
+    async def run():
+        return [await get(p) for p in ("/test-items/1", "/test-items/2", "/test-missing")]
+
+    before, _ = parse(registry.render())
+    assert asyncio.run(run()) == [200, 200, 404]
+    samples, types = parse(registry.render())
+
+    def delta(key):
+        return samples.get(key, 0) - before.get(key, 0)
+
+    route = ("route", "/test-items/{item_id}")
+    assert delta(("http_requests_total", (("method", "GET"), route, ("status", "200")))) == 2
+    assert delta(("http_requests_total", (("method", "GET"), ("route", "<unmatched>"), ("status", "404")))) == 1
+    assert delta(("http_request_duration_seconds_count", (("method", "GET"), route))) == 2
+    assert samples[("http_requests_in_progress", ())] == 0
+    for name in ("db_pool_size", "process_resident_memory_bytes", "cache_hit_ratio"):
+        assert name in types
+
+
+def _worker_registry():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ["path"], registry)
+    latency = Histogram("latency_seconds", "Latency", (), registry, buckets=(1.0,))
+    in_progress = Gauge("in_progress", "In progress", (), registry)
+    started = Gauge("started_seconds", "Start time", (), registry, "min")
+    ratio = Gauge("hit_ratio", "Hit ratio", (), registry, "all")
+    return registry, requests, latency, in_progress, started, ratio
+
+
+def _second_worker(directory, ready, exit_now):
+    registry, requests, latency, in_progress, started, ratio = _worker_registry()
+    snapshots = WorkerSnapshots(registry, directory, interval_seconds=60)
+    snapshots.start()
+    requests.labels("/a").inc(5)
+    requests.labels("/b").inc(1)
+    latency.observe(2.0)
+    in_progress.set(2)
+    started.set(50)
+    ratio.set(0.25)
+    snapshots.write()
+    ready.set()
+    exit_now.wait(10)
+    os._exit(0)  # Dies without a final snapshot or unlocking, like a killed worker
+
+
+def test_two_workers_are_merged_and_exited_workers_keep_their_counts(tmp_path):
+    directory = str(tmp_path / "prometheus")
+    context = multiprocessing.get_context("fork")
+    ready, exit_now = context.Event(), context.Event()
+    other = context.Process(target=_second_worker, args=(directory, ready, exit_now))
+    other.start()
+    try:
+        assert ready.wait(10)
+        registry, requests, latency, in_progress, started, ratio = _worker_registry()
+        snapshots = WorkerSnapshots(registry, directory, interval_seconds=60)
+        snapshots.start()
+        requests.labels("/a").inc(3)
+        latency.observe(0.5)
+        in_progress.set(1)
+        started.set(100)
+        ratio.set(0.75)
+
+        samples, _ = parse(snapshots.render())
+        assert samples[("requests_total", (("path", "/a"),))] == 8
+        assert samples[("requests_total", (("path", "/b"),))] == 1
+        assert samples[("latency_seconds_bucket", (("le", "1"),))] == 1
+        assert samples[("latency_seconds_count", ())] == 2
+        assert samples[("in_progress", ())] == 3
+        assert samples[("started_seconds", ())] == 50
+        assert samples[("hit_ratio", (("pid", str(other.pid)),))] == 0.25
+        assert samples[("hit_ratio", (("pid", str(os.getpid())),))] == 0.75
+    finally:
+        exit_now.set()
+        other.join(10)
+
+    samples, _ = parse(snapshots.render())
+    # Counters survive the exited worker; its gauges do not
+    assert samples[("requests_total", (("path", "/a"),))] == 8
+    assert samples[("latency_seconds_count", ())] == 2
+    assert samples[("in_progress", ())] == 1
+    assert samples[("started_seconds", ())] == 100
+    assert [key for key in samples if key[0] == "hit_ratio"] == [("hit_ratio", (("pid", str(os.getpid())),))]
+    assert sorted(os.listdir(directory)) == sorted([".retire.lock", f"{os.getpid()}.json", f"{os.getpid()}.lock", "retired.json"])
+
+    # A clean shutdown leaves its final snapshot; a worker restarted under the same pid folds it in
+    requests.labels("/a").inc()
+    snapshots.stop()
+    restarted = WorkerSnapshots(_worker_registry()[0], directory, interval_seconds=60)
+    restarted.start()
+    samples, _ = parse(restarted.render())
+    assert samples[("requests_total", (("path", "/a"),))] == 9
+    restarted.stop()
@@ -0,0 +1,83 @@
+# backend/app/tests/test_system_collector.py
+import threading
+import time
+
+from app.services.system_collector import SystemMetricsCollector
+
+
+def _collector(**collectors):
+    return SystemMetricsCollector(interval_seconds=0.05, collectors=collectors)
+
+
+def test_rounds_are_published_whole_and_failures_are_contained():
+    calls = {"ok": 0}
+
+    def ok():
+        calls["ok"] += 1
+        return {"round": calls["ok"]}
+
+    def broken():
+        raise RuntimeError("sensor gone")
+
+    collector = _collector(ok=ok, broken=broken)
+    seen = []
+    collector.listeners.append(seen.append)
+    collector.listeners.append(lambda snapshot: 1 / 0)  # A failing listener doesn't stop the round
+
+    snapshot = collector.collect_once()
+    assert snapshot["ok"]["data"] == {"round": 1}
+    assert snapshot["broken"]["data"] == {"error": "sensor gone"}
+    assert seen == [snapshot]
+    assert collector.latest("ok") == {"round": 1}
+
+    stats = collector.stats()["collectors"]
+    assert stats["ok"]["samples"] == 1 and stats["ok"]["errors"] == 0
+    assert stats["broken"]["errors"] == 1
+    assert stats["ok"]["age_seconds"] is not None
+
+
+def test_latest_samples_inline_before_the_first_round():
+    collector = _collector(cpu=lambda: {"percent": 5})
+    assert collector.latest("cpu") == {"percent": 5}
+    assert collector.age_seconds("cpu") is None
+    assert collector.stats()["collectors"]["cpu"]["samples"] == 1
+
+
+def test_timing_stats_track_last_max_and_moving_average():
+    durations = iter([0.02, 0.0, 0.0])
+
+    def slow():
+        time.sleep(next(durations))
+        return {}
+
+    collector = _collector(slow=slow)
+    for _ in range(3):
+        collector.collect_once()
+    stats = collector.stats()["collectors"]["slow"]
+    assert stats["max_ms"] >= 20
+    assert stats["last_ms"] < stats["max_ms"]
+    # EMA keeps 90% of history, so one slow first sample still dominates two fast ones
+    assert stats["last_ms"] < stats["avg_ms"] < stats["max_ms"]
+
+
+def test_thread_samples_on_interval_until_stopped():
+    rounds = threading.Event()
+    count = {"n": 0}
+
+    def tick():
+        count["n"] += 1
+        if count["n"] >= 3:
+            rounds.set()
+        return {"n": count["n"]}
+
+    collector = _collector(tick=tick)
+    collector.start()
+    try:
+        assert rounds.wait(2)
+        assert collector.stats()["running"]
+    finally:
+        collector.stop()
+    stopped_at = count["n"]
+    time.sleep(0.15)
+    assert count["n"] == stopped_at
+    assert not collector.stats()["running"]
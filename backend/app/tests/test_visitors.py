@@ -0,0 +1,107 @@
+# backend/app/tests/test_visitors.py
+from collections import namedtuple
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.visitor_sketch import VisitorSketch
+from app.services.visitors import VisitorService
+from app.utils.hyperloglog import HyperLogLog
+
+Stored = namedtuple("Stored", "shard registers precision")
+Inserted = namedtuple("Inserted", "shard")
+DAY = date(2026, 10, 18)
+
+
+def _sketch(values):
+    sketch = HyperLogLog()
+    sketch.update(values)
+    return sketch
+
+
+def test_hll_merge_is_a_lossless_commutative_union():
+    a = _sketch(f"a{i}" for i in range(3000))
+    b = _sketch(f"b{i}" for i in range(2000))
+    both = _sketch([f"a{i}" for i in range(3000)] + [f"b{i}" for i in range(2000)])
+
+    ab = HyperLogLog(registers=bytes(a.registers)).merge(b)
+    ba = HyperLogLog(registers=bytes(b.registers)).merge(a)
+    assert ab.registers == ba.registers == both.registers
+    # Merging again changes nothing, so replays and overlapping shards are harmless
+    assert ab.merge(b).merge(a).registers == both.registers
+    assert abs(both.count() - 5000) / 5000 < 3 * both.relative_error
+    assert HyperLogLog.from_bytes(both.to_bytes()).registers == both.registers
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=10))
+
+
+class ScriptedSession:
+    """Compiles each statement for Postgres and answers with the next scripted row"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.statements = []
+
+    def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append((str(compiled), compiled.params))
+        answer = self.answers.pop(0) if self.answers else None
+        return type("Result", (), {"first": lambda self: answer})()
+
+
+def _rows(*visitors):
+    ts = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    return [{"metadata_json": {"visitor_id": v}, "timestamp": ts} for v in visitors] + [{"metadata_json": None}]
+
+
+def test_merges_into_an_unlocked_shard_without_waiting():
+    existing = _sketch(["old"])
+    db = ScriptedSession(Stored(shard=3, registers=existing.to_bytes(), precision=existing.precision))
+    VisitorService.record_visitors(db, _rows("v1", "v2"))
+
+    (select_sql, _), (update_sql, params) = db.statements
+    assert "FOR UPDATE SKIP LOCKED" in select_sql
+    assert update_sql.startswith("UPDATE visitor_sketches")
+    assert params["shard_1"] == 3
+    merged = HyperLogLog.from_bytes(params["registers"])
+    assert merged.registers == _sketch(["old", "v1", "v2"]).registers
+
+
+def test_starts_a_new_shard_when_every_row_is_busy():
+    # No unlocked row, then one shard id collision before the insert lands
+    db = ScriptedSession(None, None, Inserted(shard=42))
+    VisitorService.record_visitors(db, _rows("v1"))
+
+    select_sql, first_insert, second_insert = db.statements
+    assert "ON CONFLICT (day, shard) DO NOTHING" in first_insert[0]
+    assert second_insert[1]["day"] == DAY
+    assert HyperLogLog.from_bytes(second_insert[1]["registers"]).registers == _sketch(["v1"]).registers
+
+
+def test_rows_without_fingerprints_touch_nothing():
+    db = ScriptedSession()
+    VisitorService.record_visitors(db, [{"metadata_json": {"page": "/"}}, {"metadata_json": None}])
+    assert db.statements == []
+
+
+def test_readers_merge_every_shard():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[VisitorSketch.__table__])
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add_all([
+            VisitorSketch(day=DAY, shard=0, precision=12, registers=_sketch(f"v{i}" for i in range(0, 600)).to_bytes()),
+            VisitorSketch(day=DAY, shard=7, precision=12, registers=_sketch(f"v{i}" for i in range(400, 1000)).to_bytes()),
+            VisitorSketch(day=date(2026, 10, 19), shard=0, precision=12, registers=_sketch(["v1", "new"]).to_bytes()),
+        ])
+        db.commit()
+        result = VisitorService.get_unique_visitors(db, DAY, date(2026, 10, 19))
+        assert result["daysWithData"] == 2
+        assert abs(result["estimate"] - 1001) / 1001 < 3 * result["relativeError"]
+    finally:
+        db.close()
+        engine.dispose()
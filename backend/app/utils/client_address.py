@@ -0,0 +1,37 @@
+# app/utils/client_address.py
+import ipaddress
+from typing import Optional, Sequence, Union
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(spec: str) -> Sequence[Network]:
+    """Comma-separated addresses or CIDRs, e.g. '127.0.0.1,172.16.0.0/12'"""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip())
+
+
+def _trusted(address: str, proxies: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_address(peer: Optional[str], forwarded_for: Optional[str], proxies: Sequence[Network]) -> str:
+    """
+    The address of the client behind any trusted proxies.
+
+    X-Forwarded-For is only believed when the peer is a trusted proxy, and
+    is walked right to left (each proxy appends the address it saw), so the
+    first untrusted hop is the client and spoofed entries to its left are
+    ignored.
+    """
+    peer = peer or ""
+    if not forwarded_for or not _trusted(peer, proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, proxies):
+            return hop
+    return hops[0] if hops else peer
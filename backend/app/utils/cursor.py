@@ -0,0 +1,16 @@
+# app/utils/cursor.py
+"""Keyset pagination cursors of the form `<iso timestamp>,<id>`"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+
+def parse_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a `<iso timestamp>,<id>` resume cursor"""
+    ts, _, row_id = cursor.rpartition(",")
+    return datetime.fromisoformat(ts), int(row_id)
+
+
+def format_cursor(row: Dict[str, Any]) -> str:
+    # 'Z' instead of '+00:00' so the cursor survives a query string unescaped
+    ts = row["timestamp"].astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+    return f"{ts},{row['id']}"
@@ -0,0 +1,159 @@
+# app/utils/gorilla.py
+"""
+Gorilla time-series compression (Pelkonen et al., VLDB 2015).
+
+Timestamps are stored as delta-of-deltas, which are almost always zero
+for a fixed sampling interval (one bit per sample). Floats are XORed with
+their predecessor and only the meaningful bits are kept, so slowly moving
+gauges cost a few bits per sample.
+"""
+import struct
+from typing import List, Sequence
+
+
+class BitWriter:
+    def __init__(self):
+        self._buf = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, nbits: int) -> None:
+        self._acc = (self._acc << nbits) | (value & ((1 << nbits) - 1))
+        self._bits += nbits
+        while self._bits >= 8:
+            self._bits -= 8
+            self._buf.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self._buf) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self._buf)
+
+
+class BitReader:
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def read(self, nbits: int) -> int:
+        start = self._pos >> 3
+        end = (self._pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self._data[start:end], "big")
+        if end > len(self._data):
+            raise EOFError("Read past end of bit stream")
+        shift = (end << 3) - self._pos - nbits
+        self._pos += nbits
+        return (chunk >> shift) & ((1 << nbits) - 1)
+
+
+# (prefix, prefix bits, value bits) for delta-of-delta ranges, as in the paper
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12))
+
+
+def encode_timestamps(timestamps: Sequence[int]) -> bytes:
+    """Integer timestamps, non-decreasing in practice (any int64 deltas are handled)"""
+    writer = BitWriter()
+    if not timestamps:
+        return b""
+    writer.write(timestamps[0], 64)
+    prev, prev_delta = timestamps[0], 0
+    for ts in timestamps[1:]:
+        delta = ts - prev
+        dod = delta - prev_delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for prefix, prefix_bits, value_bits in _DOD_BUCKETS:
+                low = -(1 << (value_bits - 1)) + 1
+                if low <= dod <= (1 << (value_bits - 1)):
+                    writer.write(prefix, prefix_bits)
+                    writer.write(dod - low, value_bits)
+                    break
+            else:
+                writer.write(0b1111, 4)
+                writer.write(dod, 64)
+        prev, prev_delta = ts, delta
+    return writer.getvalue()
+
+
+def decode_timestamps(data: bytes, count: int) -> List[int]:
+    if count == 0:
+        return []
+    reader = BitReader(data)
+    first = reader.read(64)
+    out = [first - (1 << 64) if first >= 1 << 63 else first]
+    prev_delta = 0
+    for _ in range(count - 1):
+        if reader.read(1) == 0:
+            dod = 0
+        elif reader.read(1) == 0:
+            dod = reader.read(7) - 63
+        elif reader.read(1) == 0:
+            dod = reader.read(9) - 255
+        elif reader.read(1) == 0:
+            dod = reader.read(12) - 2047
+        else:
+            dod = reader.read(64)
+            if dod >= 1 << 63:
+                dod -= 1 << 64
+        prev_delta += dod
+        out.append(out[-1] + prev_delta)
+    return out
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack(">Q", struct.pack(">d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack(">d", struct.pack(">Q", bits))[0]
+
+
+def encode_floats(values: Sequence[float]) -> bytes:
+    writer = BitWriter()
+    if not values:
+        return b""
+    prev = _float_bits(values[0])
+    writer.write(prev, 64)
+    prev_leading, prev_trailing = -1, 0
+    for value in values[1:]:
+        bits = _float_bits(value)
+        xor = bits ^ prev
+        prev = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        writer.write(1, 1)
+        leading = min(64 - xor.bit_length(), 31)  # 5-bit field
+        trailing = (xor & -xor).bit_length() - 1
+        if prev_leading >= 0 and leading >= prev_leading and trailing >= prev_trailing:
+            # Fits the previous window: reuse its position
+            writer.write(0, 1)
+            writer.write(xor >> prev_trailing, 64 - prev_leading - prev_trailing)
+        else:
+            meaningful = 64 - leading - trailing
+            writer.write(1, 1)
+            writer.write(leading, 5)
+            writer.write(meaningful & 0x3F, 6)  # 64 is stored as 0
+            writer.write(xor >> trailing, meaningful)
+            prev_leading, prev_trailing = leading, trailing
+    return writer.getvalue()
+
+
+def decode_floats(data: bytes, count: int) -> List[float]:
+    if count == 0:
+        return []
+    reader = BitReader(data)
+    prev = reader.read(64)
+    out = [_bits_float(prev)]
+    leading = trailing = 0
+    for _ in range(count - 1):
+        if reader.read(1) == 1:
+            if reader.read(1) == 1:
+                leading = reader.read(5)
+                meaningful = reader.read(6) or 64
+                trailing = 64 - leading - meaningful
+            prev ^= reader.read(64 - leading - trailing) << trailing
+        out.append(_bits_float(prev))
+    return out
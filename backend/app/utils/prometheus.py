@@ -0,0 +1,443 @@
+# app/utils/prometheus.py
+"""
+Prometheus text exposition (format 0.0.4) without the client library.
+
+Counters, gauges and histograms keep one shard of floats per writing
+thread. A thread only ever writes its own shard, so updates take no lock;
+a scrape sums the shards. Each label set is resolved to a child once and
+its rendered `{name="value"}` string is kept, so rendering is string
+joins over a few floats per series.
+
+Several worker processes each hold their own registry; `WorkerSnapshots`
+publishes every worker's values to a shared directory and merges them at
+scrape time, so any worker can answer for all of them.
+"""
+import fcntl
+import json
+import math
+import os
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Series = Dict[str, List[float]]  # Rendered label string -> values (one, or a histogram's buckets and sum)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (math.inf, -math.inf):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def label_string(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{escape_label(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Shards:
+    """Per-thread float vectors; each thread increments only its own"""
+
+    __slots__ = ("size", "_shards")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._shards: Dict[int, List[float]] = {}
+
+    def local(self) -> List[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # A recycled thread id inherits the dead thread's shard, which keeps totals intact
+            shard = self._shards.setdefault(ident, [0.0] * self.size)
+        return shard
+
+    def totals(self) -> List[float]:
+        totals = [0.0] * self.size
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _Child:
+    def __init__(self, labels: str, size: int = 1):
+        self.labels = labels
+        self._shards = _Shards(size)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at scrape time (e.g. an existing stats dict)"""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._shards.totals()[0]
+
+
+class _CounterChild(_Child):
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._shards.local()[0] += amount
+
+
+class _GaugeChild(_Child):
+    def __init__(self, labels: str):
+        super().__init__(labels)
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.local()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._shards.local()[0] -= amount
+
+    def set(self, value: float) -> None:
+        """Replace the base value (single writer); inc/dec still apply on top"""
+        self._value = float(value)
+
+    def value(self) -> float:
+        if self._function is not None:
+            return super().value()
+        return self._value + self._shards.totals()[0]
+
+
+class _HistogramChild(_Child):
+    def __init__(self, labels: str, bounds: Tuple[float, ...]):
+        # One slot per bucket (including +Inf), then the running sum
+        super().__init__(labels, len(bounds) + 2)
+        self._bounds = bounds
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.local()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        help_text = documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        self._header = f"# HELP {name} {help_text}\n# TYPE {name} {self.type}"
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self, labels: str) -> _Child:
+        raise NotImplementedError
+
+    def labels(self, *values) -> _Child:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children.setdefault(key, self._new_child(label_string(self.labelnames, key)))
+        return child
+
+    def collect(self) -> Series:
+        return {child.labels: [child.value()] for child in list(self._children.values())}
+
+    def format(self, out: List[str], series: Series) -> None:
+        out.append(self._header)
+        for labels, values in series.items():
+            out.append(f"{self.name}{labels} {format_value(values[0])}")
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self, labels: str) -> _Child:
+        return _CounterChild(labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    `multiprocess_mode` says how `WorkerSnapshots` combines the workers'
+    values: 'sum', 'min', 'max', or 'all' to keep one series per worker
+    under a `pid` label. Exited workers' gauges are dropped.
+    """
+
+    type = "gauge"
+    MODES = ("sum", "min", "max", "all")
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None, multiprocess_mode: str = "sum"):
+        if multiprocess_mode not in self.MODES:
+            raise ValueError(f"Unknown multiprocess_mode {multiprocess_mode!r}")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self, labels: str) -> _Child:
+        return _GaugeChild(labels)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        self._le = [format_value(b) for b in self.bounds] + ["+Inf"]
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self, labels: str) -> _Child:
+        return _HistogramChild(labels, self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def collect(self) -> Series:
+        return {child.labels: child._shards.totals() for child in list(self._children.values())}
+
+    def format(self, out: List[str], series: Series) -> None:
+        out.append(self._header)
+        for labels, totals in series.items():
+            inner = labels[1:-1] + "," if labels else ""
+            cumulative = 0.0
+            for le, count in zip(self._le, totals):
+                cumulative += count
+                out.append(f'{self.name}_bucket{{{inner}le="{le}"}} {format_value(cumulative)}')
+            out.append(f"{self.name}_sum{labels} {format_value(totals[-1])}")
+            out.append(f"{self.name}_count{labels} {format_value(cumulative)}")
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._hooks: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def add_hook(self, hook: Callable[[], None]) -> None:
+        """Run `hook` before each render, to refresh gauges that share one expensive read"""
+        self._hooks.append(hook)
+
+    def collect(self) -> Dict[str, Series]:
+        """This process's current values per metric"""
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception:
+                pass
+        return {name: metric.collect() for name, metric in list(self._metrics.items())}
+
+    def render(self, collected: Optional[Dict[str, Series]] = None) -> str:
+        """Text exposition of `collected` (e.g. merged across workers), or of this process"""
+        if collected is None:
+            collected = self.collect()
+        out: List[str] = []
+        for name, metric in list(self._metrics.items()):
+            metric.format(out, collected.get(name, {}))
+        out.append("")
+        return "\n".join(out)
+
+
+def _with_pid(labels: str, pid: int) -> str:
+    inner = labels[1:-1] + "," if labels else ""
+    return "{" + inner + f'pid="{pid}"' + "}"
+
+
+def _try_lock(path: str):
+    """An flock'ed handle on `path`, or None if a live process holds it"""
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class WorkerSnapshots:
+    """
+    One registry view across worker processes.
+
+    Each worker writes its values to `<pid>.json` in `directory` every
+    `interval_seconds` (and on every scrape it serves), and holds an flock
+    on `<pid>.lock` while alive. A scrape merges every worker's file:
+    counters and histograms are summed, gauges are combined per their
+    `multiprocess_mode`. The file of a worker whose lock is free has
+    exited; its counters and histograms are folded into `retired.json`
+    so totals never go backwards when a worker restarts.
+    """
+
+    RETIRED = "retired.json"
+
+    def __init__(self, registry: Registry, directory: str, interval_seconds: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self.pid = os.getpid()
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read(self, name: str) -> Dict[str, Series]:
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self, name: str, data: Dict[str, Series]) -> None:
+        tmp = self._path(f".{name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(name))
+
+    def _worker_files(self) -> List[Tuple[int, str]]:
+        files = []
+        for name in os.listdir(self.directory):
+            stem, _, suffix = name.partition(".")
+            if suffix == "json" and stem.isdigit():
+                files.append((int(stem), name))
+        return files
+
+    def _directory_lock(self, operation: int):
+        handle = open(self._path(".retire.lock"), "a")
+        fcntl.flock(handle, operation)
+        return handle
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        if not self.directory or self._lock_file is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.pid = os.getpid()
+        path = self._path(f"{self.pid}.lock")
+        while True:
+            handle = open(path, "a")
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            # A retiring worker may have unlinked the path while we waited for the inode
+            if os.path.exists(path) and os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino:
+                break
+            handle.close()
+        self._lock_file = handle
+        self._retire(include_own=True)  # Left behind by an earlier process with our pid
+        self.write()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prometheus-snapshots", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.write()
+            except Exception:
+                pass
+
+    def stop(self) -> None:
+        """Final snapshot; the file stays for the other workers to retire"""
+        if self._lock_file is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.write()
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # --- merging ---
+
+    def write(self) -> None:
+        self._write_file(f"{self.pid}.json", self.registry.collect())
+
+    def _retire(self, include_own: bool = False) -> None:
+        with self._directory_lock(fcntl.LOCK_EX):
+            retired = self._read(self.RETIRED)
+            changed = False
+            for pid, name in self._worker_files():
+                own = pid == self.pid
+                if own and not include_own:
+                    continue
+                lock_path = self._path(f"{pid}.lock")
+                lock = None if own else _try_lock(lock_path)
+                if not own and lock is None:
+                    continue  # Still running
+                try:
+                    snapshot = {
+                        metric: series for metric, series in self._read(name).items()
+                        if not isinstance(self.registry._metrics.get(metric), Gauge)
+                    }
+                    retired = self._merge([(None, retired), (None, snapshot)])
+                    os.unlink(self._path(name))
+                    if lock is not None:
+                        os.unlink(lock_path)
+                    changed = True
+                finally:
+                    if lock is not None:
+                        lock.close()
+            if changed:
+                self._write_file(self.RETIRED, retired)
+
+    def _merge(self, snapshots: List[Tuple[Optional[int], Dict[str, Series]]]) -> Dict[str, Series]:
+        """Combine per-worker snapshots; pid None marks retired totals"""
+        merged: Dict[str, Series] = {}
+        for name, metric in self.registry._metrics.items():
+            mode = getattr(metric, "multiprocess_mode", "sum")
+            combined: Series = {}
+            for pid, snapshot in snapshots:
+                for labels, values in snapshot.get(name, {}).items():
+                    if mode == "all":
+                        combined[_with_pid(labels, pid)] = values
+                    elif labels not in combined:
+                        combined[labels] = list(values)
+                    elif mode == "sum":
+                        combined[labels] = [a + b for a, b in zip(combined[labels], values)]
+                    else:
+                        pick = min if mode == "min" else max
+                        combined[labels] = [pick(a, b) for a, b in zip(combined[labels], values)]
+            merged[name] = combined
+        return merged
+
+    def render(self) -> str:
+        """Text exposition summed over every worker (this process only when not started)"""
+        if self._lock_file is None:
+            return self.registry.render()
+        self.write()
+        self._retire()
+        with self._directory_lock(fcntl.LOCK_SH):
+            snapshots = [(None, self._read(self.RETIRED))]
+            snapshots += [(pid, self._read(name)) for pid, name in self._worker_files()]
+        return self.registry.render(self._merge(snapshots))
@@ -0,0 +1,33 @@
+import sys
+import argparse
+from datetime import datetime, timezone
+sys.path.append('/app')
+
+from app.db.session import SessionLocal
+from app.services.analytics import AnalyticsService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollup tables from analytics_interactions")
+    parser.add_argument("--since", help="Only rebuild buckets from this ISO date onwards (e.g. 2026-01-01)")
+    args = parser.parse_args()
+
+    since = None
+    if args.since:
+        since = datetime.fromisoformat(args.since)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+    db = SessionLocal()
+    try:
+        logger.info(f"Backfilling analytics rollups{f' since {since}' if since else ''}...")
+        hourly, daily = AnalyticsService.rebuild_rollups(db, since)
+        logger.info(f"Backfill complete: {hourly} hourly and {daily} daily buckets written")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+sys.path.append('/app')
+
+from app.services.analytics_partitions import run_maintenance, list_partitions
+from app.db.session import SessionLocal
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    logger.info("Running analytics partition maintenance...")
+    result = run_maintenance()
+    logger.info(f"Created: {result['created'] or 'none'}")
+    logger.info(f"Removed: {result['removed'] or 'none'}")
+
+    db = SessionLocal()
+    try:
+        for partition in list_partitions(db):
+            logger.info(f"  {partition['name']} (< {partition['upper_bound']})")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
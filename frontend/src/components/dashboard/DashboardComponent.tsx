@@ -15,6 +15,7 @@ interface DashboardMetrics {
     percentageChange: number;
     lastMonthTotal: number;
     totalInteractions: number;
+    errorMargin?: number;
     interactionCounts: {
       project_click?: number;
       resume_view?: number;
@@ -100,10 +101,9 @@ const DashboardComponent = () => {
       setIsRefreshing(true);
       setError(null);
 
-      const [visitorsData, projectsData, sessionsData, systemData, networkData, healthData, deploymentData] = await Promise.all([
-        api.get<DashboardMetrics['visitors']>('/api/v1/metrics/visitors'),
-        api.get<DashboardMetrics['projects']>('/api/v1/metrics/projects'),
-        api.get<DashboardMetrics['sessions']>('/api/v1/metrics/sessions'),
+      // Visitors, projects and sessions come from one aggregated query
+      const [countsData, systemData, networkData, healthData, deploymentData] = await Promise.all([
+        api.get<Pick<DashboardMetrics, 'visitors' | 'projects' | 'sessions'>>('/api/v1/metrics/dashboard'),
         api.get<DashboardMetrics['system']>('/api/v1/metrics/system'),
         api.get<DashboardMetrics['network']>('/api/v1/metrics/network'),
         api.get<DashboardMetrics['health']>('/api/v1/metrics/health'),
@@ -111,9 +111,9 @@ const DashboardComponent = () => {
       ]);
 
       setMetrics({
-        visitors: visitorsData,
-        projects: projectsData,
-        sessions: sessionsData,
+        visitors: countsData.visitors,
+        projects: countsData.projects,
+        sessions: countsData.sessions,
         system: systemData,
         network: networkData,
         health: healthData,
@@ -201,7 +201,12 @@ const DashboardComponent = () => {
                   <div className="flex items-center gap-8 flex-nowrap flex-1 justify-center translate-x-[-12px]">
                     <div className="flex items-center gap-2">
                        <span className="text-[10px] text-gray-400 uppercase font-medium">Users</span>
-                       <span className="text-xs font-bold text-gray-900">{formatNumber(metrics.visitors?.total ?? 0)}</span>
+                       <span
+                         className="text-xs font-bold text-gray-900"
+                         title={metrics.visitors?.errorMargin ? `Approximate unique visitors (±${metrics.visitors.errorMargin}%)` : undefined}
+                       >
+                         {metrics.visitors?.errorMargin ? '≈' : ''}{formatNumber(metrics.visitors?.total ?? 0)}
+                       </span>
                     </div>
                     <div className="flex items-center gap-3 group/item scale-100 hover:scale-105 transition-transform">
                        <span className="text-[10px] text-blue-500 uppercase font-black tracking-tighter">Projects</span>
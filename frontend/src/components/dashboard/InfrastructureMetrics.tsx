@@ -36,6 +36,8 @@ interface NetworkMetrics {
   bytes_recv: number;
   packets_sent: number;
   packets_recv: number;
+  bytes_recv_per_sec?: number;
+  bytes_sent_per_sec?: number;
   active_connections: number;
   total_connections: number;
 }
@@ -70,7 +72,8 @@ const formatBytes = (bytes: number): string => {
   const gb = bytes / (1024 ** 3);
   if (gb > 1) return `${gb.toFixed(1)}GB`;
   const mb = bytes / (1024 ** 2);
-  return `${mb.toFixed(0)}MB`;
+  if (mb >= 1) return `${mb.toFixed(0)}MB`;
+  return `${(bytes / 1024).toFixed(0)}KB`;
 };
 
 const formatNumber = (num: number): string => {
@@ -138,10 +141,10 @@ export const InfrastructureMetrics: React.FC<InfrastructureMetricsProps> = ({
     },
     {
       title: "Network",
-      value: network ? formatBytes(network.bytes_recv) : "0B",
+      value: network ? `${formatBytes(network.bytes_recv_per_sec || 0)}/s` : "0B/s",
       change: network ? `${network.active_connections} connections` : "offline",
       icon: Wifi,
-      description: "received",
+      description: network ? `${formatBytes(network.bytes_recv)} received` : "received",
       trend: "up" as const,
       healthStatus: "healthy" as const
     },